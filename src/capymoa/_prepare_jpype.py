@@ -6,7 +6,7 @@ from pathlib import Path
 from hashlib import sha256
 import subprocess
 from .__about__ import __version__
-from .env import capymoa_datasets_dir, capymoa_jvm_args, capymoa_moa_jar, capymoa_datasets_dir
+from .env import capymoa_datasets_dir, capymoa_jvm_args, capymoa_moa_jar, capymoa_datasets_dir, capymoa_float_dtype
 
 _CAPYMOA_PACKAGE_ROOT = Path(__file__).parent
 
@@ -70,6 +70,7 @@ def about():
     print(f"  CAPYMOA_DATASETS_DIR: {capymoa_datasets_dir()}")
     print(f"  CAPYMOA_MOA_JAR:      {capymoa_moa_jar()}")
     print(f"  CAPYMOA_JVM_ARGS:     {capymoa_jvm_args()}")
+    print(f"  CAPYMOA_FLOAT_DTYPE:  {capymoa_float_dtype()}")
     print(f"  JAVA_HOME:            {_get_java_home()}")
     print(f"  MOA version:          {_moa_hash()}")
     print(f"  JAVA version:         {java_version}")
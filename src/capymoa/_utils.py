@@ -1,6 +1,7 @@
 """Contains private utility functions used throughout the library."""
 
 from typing import Dict, Any
+import functools
 import re
 
 # Create a single mapping dictionary
@@ -42,26 +43,39 @@ _metrics_name_mapping = {
 _reverse_metrics_name_mapping = {v: k for k, v in _metrics_name_mapping.items()}
 
 
+def _compile_templates(mapping: Dict[str, str]):
+    """Compile the ``{N}`` templates of a mapping into (pattern, value) pairs."""
+    return [
+        (re.compile(re.escape(template).replace(r'\{N\}', r'(\d+)')), value_template)
+        for template, value_template in mapping.items()
+        if '{N}' in template
+    ]
+
+
+# The templates are compiled once, as translation happens for every measurement
+_metrics_name_templates = _compile_templates(_metrics_name_mapping)
+_reverse_metrics_name_templates = _compile_templates(_reverse_metrics_name_mapping)
+
+
+@functools.lru_cache(maxsize=None)
 def _translate_metric_name(metric_name, to='capymoa'):
     # Function to handle template-based translation
-    def translate_template(template_mapping, _metric_name):
-        for template, value_template in template_mapping.items():
-            if '{N}' in template:
-                pattern = re.escape(template).replace(r'\{N\}', r'(\d+)')
-                match = re.match(pattern, _metric_name)
-                if match:
-                    return value_template.replace('{N}', match.group(1))
+    def translate_template(compiled_templates, _metric_name):
+        for pattern, value_template in compiled_templates:
+            match = pattern.match(_metric_name)
+            if match:
+                return value_template.replace('{N}', match.group(1))
         return _metric_name
 
     if to == 'moa':
         translation = _metrics_name_mapping.get(metric_name)
         if translation is None:
-            translation = translate_template(_metrics_name_mapping, metric_name)
+            translation = translate_template(_metrics_name_templates, metric_name)
         return translation
     elif to == 'capymoa':
         translation = _reverse_metrics_name_mapping.get(metric_name)
         if translation is None:
-            translation = translate_template(_reverse_metrics_name_mapping, metric_name)
+            translation = translate_template(_reverse_metrics_name_templates, metric_name)
         return translation
     else:
         raise ValueError("Invalid translation direction. Use 'moa' or 'capymoa'.")
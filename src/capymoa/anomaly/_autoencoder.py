@@ -1,7 +1,8 @@
 
 from capymoa.base import AnomalyDetector
-from capymoa.instance import Instance
+from capymoa.instance import Instance, InstanceBatch
 from capymoa.type_alias import AnomalyScore, LabelIndex
+import numpy as np
 import torch
 import torch.nn as nn
 import torch.optim as optim
@@ -48,6 +49,9 @@ class Autoencoder(AnomalyDetector):
         :param learning_rate: Learning rate
         :param threshold: Anomaly threshold
         :param random_seed: Random seed
+
+        The network works in the floating point type of the features of the
+        schema, :attr:`capymoa.stream.Schema.dtype`.
         """
 
         super().__init__(schema, random_seed=random_seed)
@@ -62,12 +66,14 @@ class Autoencoder(AnomalyDetector):
         self._initialise()
 
     def _initialise(self):
+        dtype = torch.float32 if self.schema.dtype == np.float32 else torch.double
+
         class _AEModel(nn.Module):
             def __init__(self, input_size, hidden_size):
                 super(_AEModel, self).__init__()
-                self.encoder = nn.Sequential(nn.Linear(input_size, hidden_size, dtype=torch.double),
+                self.encoder = nn.Sequential(nn.Linear(input_size, hidden_size, dtype=dtype),
                                              nn.Sigmoid())
-                self.decoder = nn.Sequential(nn.Linear(hidden_size, input_size, dtype=torch.double),
+                self.decoder = nn.Sequential(nn.Linear(hidden_size, input_size, dtype=dtype),
                                              nn.Sigmoid())
 
             def forward(self, x):
@@ -86,7 +92,7 @@ class Autoencoder(AnomalyDetector):
 
     def train(self, instance: Instance):
         # Convert the input to a tensor
-        input = torch.from_numpy(instance.x)
+        input = torch.from_numpy(np.asarray(instance.x, dtype=self.schema.dtype))
 
         # Forward pass
         self.optimizer.zero_grad()
@@ -107,7 +113,7 @@ class Autoencoder(AnomalyDetector):
 
     def score_instance(self, instance: Instance) -> AnomalyScore:
         # Convert the input to a tensor
-        input = torch.from_numpy(instance.x)
+        input = torch.from_numpy(np.asarray(instance.x, dtype=self.schema.dtype))
         
         # Pass the input through the autoencoder
         output = self.model(input)
@@ -116,3 +122,14 @@ class Autoencoder(AnomalyDetector):
         error = torch.mean(torch.square(input - output))
 
         return 2.0 ** (-(error.item() / self.threshold))
+
+    def score_batch(self, batch: InstanceBatch) -> np.ndarray:
+        x = batch.x.toarray() if batch.is_sparse else batch.x
+        input = torch.from_numpy(np.asarray(x, dtype=self.schema.dtype))
+
+        # One forward pass for the whole batch, then the reconstruction error of each row
+        with torch.no_grad():
+            output = self.model(input)
+        error = torch.mean(torch.square(input - output), dim=1).numpy().astype(np.float64)
+
+        return 2.0 ** (-(error / self.threshold))
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import Optional, Union
 
+import numpy as np
 from jpype import _jpype
 import jpype
 from moa.classifiers import (
@@ -14,7 +15,14 @@ SelfOptimisingBaseTree as MOA_SOKNLBT,
 )
 from moa.core import Utils
 
-from capymoa.instance import Instance, LabeledInstance, RegressionInstance
+from capymoa.instance import (
+    Instance,
+    InstanceBatch,
+    LabeledInstance,
+    RegressionInstance,
+    SparseLabeledInstance,
+    SparseRegressionInstance,
+)
 from capymoa.stream._stream import Schema
 from capymoa.type_alias import LabelIndex, LabelProbabilities, TargetValue, AnomalyScore
 
@@ -107,6 +115,14 @@ def _extract_moa_learner_CLI(learner):
     return learner
 
 
+def _sklearn_features(instance: Instance):
+    """The features of an instance as a single row for scikit-learn. Sparse
+    instances are given as a CSR row so that they are never densified."""
+    if isinstance(instance, (SparseLabeledInstance, SparseRegressionInstance)):
+        return instance.x_csr
+    return [instance.x]
+
+
 ##############################################################
 ######################### CLASSIFIERS ########################
 ##############################################################
@@ -143,6 +159,30 @@ class Classifier(ABC):
     def predict_proba(self, instance: Instance) -> LabelProbabilities:
         pass
 
+    def predict_batch(self, batch: InstanceBatch) -> np.ndarray:
+        """Predict the class indexes of a batch of instances.
+
+        The default calls :meth:`predict` for each instance. Learners that
+        predict many instances at once more cheaply should override it.
+
+        :param batch: The instances to predict.
+        :return: An integer array with the predicted class index of each
+            instance, or -1 where the classifier abstains.
+        """
+        predictions = [self.predict(instance) for instance in batch]
+        return np.array([-1 if y is None else y for y in predictions], dtype=np.int_)
+
+    def train_batch(self, batch: InstanceBatch):
+        """Train on a batch of instances, in order.
+
+        The default calls :meth:`train` for each instance. Learners that
+        train on many instances at once more cheaply should override it.
+
+        :param batch: The labeled instances to train on.
+        """
+        for instance in batch:
+            self.train(instance)
+
 
 class MOAClassifier(Classifier):
     """
@@ -273,7 +313,7 @@ class SKClassifier(Classifier):
 
     def train(self, instance: LabeledInstance):
         self.sklearner.partial_fit(
-            [instance.x],
+            _sklearn_features(instance),
             [instance.y_index],
             classes=self.schema.get_label_indexes(),
         )
@@ -283,13 +323,25 @@ class SKClassifier(Classifier):
         if not self._trained_at_least_once:
             # scikit-learn does not allows invoking predict in a model that was not fit before
             return None
-        return self.sklearner.predict([instance.x])[0]
+        return self.sklearner.predict(_sklearn_features(instance))[0]
 
     def predict_proba(self, instance: Instance):
         if not self._trained_at_least_once:
             # scikit-learn does not allows invoking predict in a model that was not fit before
             return None
-        self.sklearner.predict_proba([instance.x])
+        self.sklearner.predict_proba(_sklearn_features(instance))
+
+    def train_batch(self, batch: InstanceBatch):
+        # A single partial_fit call on the whole batch.
+        self.sklearner.partial_fit(
+            batch.x, batch.y, classes=self.schema.get_label_indexes()
+        )
+        self._trained_at_least_once = True
+
+    def predict_batch(self, batch: InstanceBatch) -> np.ndarray:
+        if not self._trained_at_least_once:
+            return np.full(len(batch), -1, dtype=np.int_)
+        return np.asarray(self.sklearner.predict(batch.x), dtype=np.int_)
 
 
 ##############################################################
@@ -333,6 +385,33 @@ class Regressor(ABC):
     def predict(self, instance: RegressionInstance) -> TargetValue:
         pass
 
+    def predict_batch(self, batch: InstanceBatch) -> np.ndarray:
+        """Predict the target values of a batch of instances.
+
+        The default calls :meth:`predict` for each instance. Learners that
+        predict many instances at once more cheaply should override it.
+
+        :param batch: The instances to predict.
+        :return: A float array with the prediction of each instance, NaN where
+            the regressor made none. Prediction interval learners return one
+            row per instance.
+        """
+        predictions = [self.predict(instance) for instance in batch]
+        return np.array(
+            [np.nan if y is None else y for y in predictions], dtype=np.float64
+        )
+
+    def train_batch(self, batch: InstanceBatch):
+        """Train on a batch of instances, in order.
+
+        The default calls :meth:`train` for each instance. Learners that
+        train on many instances at once more cheaply should override it.
+
+        :param batch: The regression instances to train on.
+        """
+        for instance in batch:
+            self.train(instance)
+
 
 class MOARegressor(Regressor):
     def __init__(self, schema=None, CLI=None, random_seed=1, moa_learner=None):
@@ -448,7 +527,7 @@ class SKRegressor(Regressor):
 
     def train(self, instance: RegressionInstance):
         self.sklearner.partial_fit(
-            [instance.x],
+            _sklearn_features(instance),
             [instance.y_value],
         )
         self._trained_at_least_once = True
@@ -457,7 +536,17 @@ class SKRegressor(Regressor):
         if not self._trained_at_least_once:
             # scikit-learn does not allows invoking predict in a model that was not fit before
             return None
-        return self.sklearner.predict([instance.x])[0]
+        return self.sklearner.predict(_sklearn_features(instance))[0]
+
+    def train_batch(self, batch: InstanceBatch):
+        # A single partial_fit call on the whole batch.
+        self.sklearner.partial_fit(batch.x, batch.y)
+        self._trained_at_least_once = True
+
+    def predict_batch(self, batch: InstanceBatch) -> np.ndarray:
+        if not self._trained_at_least_once:
+            return np.full(len(batch), np.nan)
+        return np.asarray(self.sklearner.predict(batch.x), dtype=np.float64)
 
 
 ### Prediction Interval Learner ###
@@ -517,6 +606,41 @@ class AnomalyDetector(ABC):
         # Returns the anomaly score for the instance. A high score is indicative of a normal instance.
         pass
 
+    def predict_batch(self, batch: InstanceBatch) -> np.ndarray:
+        """Predict the labels of a batch of instances.
+
+        The default calls :meth:`predict` for each instance.
+
+        :param batch: The instances to predict.
+        :return: An integer array with the predicted label of each instance, or
+            -1 where the detector made no prediction.
+        """
+        predictions = [self.predict(instance) for instance in batch]
+        return np.array([-1 if y is None else y for y in predictions], dtype=np.int_)
+
+    def score_batch(self, batch: InstanceBatch) -> np.ndarray:
+        """Return the anomaly scores of a batch of instances.
+
+        The default calls :meth:`score_instance` for each instance. Detectors
+        that score many instances at once more cheaply should override it.
+
+        :param batch: The instances to score.
+        :return: A float array with the score of each instance.
+        """
+        return np.array(
+            [self.score_instance(instance) for instance in batch], dtype=np.float64
+        )
+
+    def train_batch(self, batch: InstanceBatch):
+        """Train on a batch of instances, in order.
+
+        The default calls :meth:`train` for each instance.
+
+        :param batch: The instances to train on.
+        """
+        for instance in batch:
+            self.train(instance)
+
 
 class MOAAnomalyDetector(AnomalyDetector):
     def __init__(self, schema=None, CLI=None, random_seed=1, moa_learner=None):
@@ -147,3 +147,12 @@ class ShrubsClassifier(_ShrubEnsembles, Classifier):
     def predict(self, instance):
         # Return the index of the class with the highest probability
         return self.predict_proba(instance).argmax(axis=0)
+
+    def predict_batch(self, batch):
+        if len(self.estimators_) == 0:
+            return np.zeros(len(batch), dtype=np.int_)
+        # Weight the probabilities of every shrub for the whole batch at once
+        x = batch.x.toarray() if batch.is_sparse else batch.x
+        all_proba = self._individual_proba(x)
+        combined_proba = np.tensordot(self.estimator_weights_, all_proba, axes=1)
+        return combined_proba.argmax(axis=1)
@@ -150,7 +150,7 @@ class _ShrubEnsembles(ABC):
         self.estimator_weights_ = np.empty(shape=(0,), dtype=float)
 
         # Shrubs are trained over a sliding window. To enhance performance, we use a circular buffer for the data and for the targets
-        self.buffer_data = np.zeros((batch_size, schema.get_num_attributes()))  
+        self.buffer_data = np.zeros((batch_size, schema.get_num_attributes()), dtype=schema.dtype)
         self.buffer_target = np.zeros(batch_size, dtype=np.int32)  
         self.current_index = 0  # Current index for inserting
         # If false, the buffer is filled up to self.current_index. If true, it is full and we can use the entire buffer
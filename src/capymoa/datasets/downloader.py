@@ -7,7 +7,8 @@ from typing import Any, Optional
 import wget
 from moa.streams import ArffFileStream
 
-from capymoa.stream import Stream
+from capymoa.stream import ARFFStream, Stream
+from capymoa.stream._compressed import _COMPRESSION_SUFFIXES
 from capymoa.datasets._utils import extract, get_download_dir
 import os
 
@@ -23,12 +24,41 @@ class DownloadableDataset(ABC, Stream):
         auto_download: bool = True,
         CLI: Optional[str] = None,
         schema: Optional[str] = None,
+        compressed: bool = False,
     ):
+        """Construct a dataset, downloading it first if needed.
+
+        :param directory: The directory the dataset is stored in.
+        :param auto_download: Download the dataset if it is not in ``directory``.
+        :param CLI: Additional command line arguments to pass to the MOA stream.
+        :param schema: The schema of the stream, inferred if None.
+        :param compressed: Keep the downloaded archive and stream from it with
+            streaming decompression instead of extracting it to disk. This saves
+            disk space and startup time, but instances are parsed in Python
+            rather than by MOA. The schema is then always read from the archive.
+        :raises ValueError: If ``compressed`` is True and the dataset cannot be
+            read from its archive, or a ``schema`` is given with it.
+        """
         assert self._filename is not None, "Filename must be set in subclass"
-        self._path = self._resolve_dataset(
-            auto_download,
-            Path(directory).resolve(),
-        )
+        self._compressed_stream: Optional[Stream] = None
+        directory = Path(directory).resolve()
+        if compressed:
+            # Checked before anything is downloaded.
+            if type(self).to_compressed_stream is DownloadableDataset.to_compressed_stream:
+                raise ValueError(
+                    f"{type(self).__name__} cannot be read from a compressed archive"
+                )
+            if schema is not None:
+                raise ValueError(
+                    "schema cannot be given with compressed=True, the schema "
+                    "is read from the archive"
+                )
+            self._path = self._resolve_compressed_dataset(auto_download, directory)
+            self._compressed_stream = self.to_compressed_stream(self._path)
+            super().__init__(schema=self._compressed_stream.get_schema(), CLI=CLI)
+            return
+
+        self._path = self._resolve_dataset(auto_download, directory)
         moa_stream = self.to_stream(self._path)
         super().__init__(schema=schema, CLI=CLI, moa_stream=moa_stream)
 
@@ -50,6 +80,21 @@ class DownloadableDataset(ABC, Stream):
 
         return stream
 
+    def _resolve_compressed_dataset(self, auto_download: bool, directory: Path):
+        directory.mkdir(parents=True, exist_ok=True)
+        for suffix in _COMPRESSION_SUFFIXES:
+            archive = directory / (self._filename + suffix)
+            if archive.exists():
+                return archive
+
+        if not auto_download:
+            raise FileNotFoundError(
+                f"Compressed dataset {self._filename} not found in {directory}"
+            )
+        with TemporaryDirectory() as working_directory:
+            stream_archive = self.download(Path(working_directory))
+            return Path(shutil.move(stream_archive, directory / stream_archive.name))
+
     def get_path(self):
         return self._path
 
@@ -82,6 +127,39 @@ class DownloadableDataset(ABC, Stream):
         """
         pass
 
+    def to_compressed_stream(self, stream_archive: Path) -> Stream:
+        """Create a stream that reads the dataset directly from its archive.
+
+        Subclasses override it to support ``compressed=True``, which is
+        rejected by the constructor otherwise.
+
+        :param stream_archive: The path to the compressed dataset.
+        :return: A stream over the decompressed contents of the archive.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} cannot be read from a compressed archive"
+        )
+
+    def has_more_instances(self) -> bool:
+        if self._compressed_stream is not None:
+            return self._compressed_stream.has_more_instances()
+        return super().has_more_instances()
+
+    def next_instance(self):
+        if self._compressed_stream is not None:
+            return self._compressed_stream.next_instance()
+        return super().next_instance()
+
+    def next_batch(self, n: int):
+        if self._compressed_stream is not None:
+            return self._compressed_stream.next_batch(n)
+        return super().next_batch(n)
+
+    def restart(self):
+        if self._compressed_stream is not None:
+            return self._compressed_stream.restart()
+        return super().restart()
+
     def __len__(self) -> int:
         return self._length
     
@@ -109,3 +187,6 @@ class DownloadARFFGzip(DownloadableDataset):
 
     def to_stream(self, stream: Path) -> Any:
         return ArffFileStream(stream.as_posix(), -1)
+
+    def to_compressed_stream(self, stream_archive: Path) -> Stream:
+        return ARFFStream(stream_archive.as_posix())
@@ -9,6 +9,8 @@ None of these are required, but they can be useful in certain situations.
     (See :func:`capymoa_jvm_args`)
 * Use ``CAPYMOA_MOA_JAR`` to specify a custom MOA jar file.
     (See :func:`capymoa_moa_jar`)
+* Use ``CAPYMOA_FLOAT_DTYPE`` to store features as ``float32`` instead of ``float64``.
+    (See :func:`capymoa_float_dtype`)
 * Use ``JAVA_HOME`` to specify the path to your Java installation.
 """
 
@@ -16,6 +18,10 @@ from os import environ
 from pathlib import Path
 from typing import List
 
+import numpy as np
+
+_FLOAT_DTYPES = ("float64", "float32")
+
 
 def capymoa_datasets_dir() -> Path:
     """Return the ``CAPYMOA_DATASETS_DIR`` environment variable or the default value ``./data``.
@@ -68,4 +74,31 @@ def capymoa_moa_jar() -> Path:
     :return: The path to the MOA jar file.
     """
     default_moa_jar = Path(__file__).parent / "jar" / "moa.jar"
-    return Path(environ.get("CAPYMOA_MOA_JAR", default_moa_jar))
\ No newline at end of file
+    return Path(environ.get("CAPYMOA_MOA_JAR", default_moa_jar))
+
+
+def capymoa_float_dtype() -> np.dtype:
+    """Return the ``CAPYMOA_FLOAT_DTYPE`` environment variable or the default value ``float64``.
+
+    The ``CAPYMOA_FLOAT_DTYPE`` environment variable sets the default floating
+    point type of the features of every stream, see
+    :attr:`capymoa.stream.Schema.dtype`. ``float32`` halves the memory and
+    bandwidth used by feature arrays. Set it to a custom value in bash like this:
+
+    ..  code-block:: bash
+
+        export CAPYMOA_FLOAT_DTYPE=float32
+        python my_capy_moa_script.py
+
+    MOA always works in ``float64``, so features are converted when they cross
+    the JVM boundary.
+
+    :raises ValueError: If the variable is neither ``float64`` nor ``float32``.
+    :return: The NumPy dtype of the features.
+    """
+    dtype = environ.get("CAPYMOA_FLOAT_DTYPE", "float64")
+    if dtype not in _FLOAT_DTYPES:
+        raise ValueError(
+            f"CAPYMOA_FLOAT_DTYPE must be one of {_FLOAT_DTYPES}, got {dtype!r}"
+        )
+    return np.dtype(dtype)
@@ -1,5 +1,6 @@
 from .evaluation import (
     prequential_evaluation,
+    async_prequential_evaluation,
     prequential_evaluation_multiple_learners,
     prequential_ssl_evaluation,
     prequential_evaluation_anomaly,
@@ -12,12 +13,15 @@ from .evaluation import (
     AnomalyDetectionEvaluator,
 	ClusteringEvaluator,
 )
+from ._parallel import parallel_prequential_evaluation_multiple_learners
 from . import results
 
 __all__ = [
     "prequential_evaluation",
+    "async_prequential_evaluation",
     "prequential_ssl_evaluation",
     "prequential_evaluation_multiple_learners",
+    "parallel_prequential_evaluation_multiple_learners",
     "prequential_evaluation_anomaly",
     "ClassificationEvaluator",
     "ClassificationWindowedEvaluator",
@@ -0,0 +1,189 @@
+"""Classification measurements computed from an incremental confusion matrix."""
+
+from collections import deque
+from typing import List, Optional
+
+import numpy as np
+
+_CHUNK_SIZE = 1 << 20  # class counts held at once by add_batch
+
+
+def _running_counts(labels: np.ndarray, num_classes: int) -> np.ndarray:
+    """Return the number of instances of each class among the first ``i + 1``
+    labels, for every ``i``."""
+    counts = np.zeros((len(labels), num_classes), dtype=np.int64)
+    counts[np.arange(len(labels)), labels] = 1
+    return np.cumsum(counts, axis=0, out=counts)
+
+
+class _ConfusionMatrix:
+    """The confusion matrix of a classifier, over the whole stream or over its
+    last ``window_size`` instances, and the measurements of MOA's
+    ``BasicClassificationPerformanceEvaluator`` (or
+    ``WindowClassificationPerformanceEvaluator``) computed from it.
+
+    :meth:`add` costs a few scalar increments per instance. The measurements
+    are only computed, with NumPy, when they are requested. They follow MOA's
+    definitions:
+
+    * precision and recall are macro averages of the per-class values, which
+      are NaN for a class that was never predicted (precision) or seen
+      (recall), and F1 scores are the harmonic means of precision and recall;
+    * the no-change classifier of kappa_t predicts the class of the previous
+      instance, class 0 for the first instance;
+    * the majority classifier of kappa_m predicts the most frequent class
+      among the instances seen, *including* the current one, with ties going
+      to the lowest class index.
+    """
+
+    def __init__(self, num_classes: int, window_size: Optional[int] = None):
+        self.num_classes = num_classes
+        self.window_size = window_size
+        self.instances_seen = 0
+        # Rows are the true classes, columns the predicted classes.
+        self.matrix = np.zeros((num_classes, num_classes), dtype=np.int64)
+        self._true_counts = [0] * num_classes
+        self._majority_class = 0
+        self._last_class = 0
+        self._no_change_correct = 0
+        self._majority_correct = 0
+        # The (true, predicted, no-change correct, majority correct) results of
+        # the instances in the window, oldest first.
+        self._window = deque()
+        self._names: Optional[List[str]] = None
+
+    def add(self, y_true: int, y_pred: int):
+        """Count the prediction ``y_pred`` of an instance of class ``y_true``."""
+        counts = self._true_counts
+        if self.window_size is not None and len(self._window) == self.window_size:
+            old_true, old_pred, old_no_change, old_majority = self._window.popleft()
+            self.matrix[old_true, old_pred] -= 1
+            counts[old_true] -= 1
+            self._no_change_correct -= old_no_change
+            self._majority_correct -= old_majority
+
+        self.matrix[y_true, y_pred] += 1
+        counts[y_true] += 1
+        if self.window_size is None:
+            # Counts only grow, so only the current class can take the lead.
+            majority = self._majority_class
+            if counts[y_true] > counts[majority] or (
+                counts[y_true] == counts[majority] and y_true < majority
+            ):
+                self._majority_class = y_true
+        else:
+            self._majority_class = max(range(self.num_classes), key=counts.__getitem__)
+
+        no_change = self._last_class == y_true
+        majority = self._majority_class == y_true
+        self._no_change_correct += no_change
+        self._majority_correct += majority
+        self._last_class = y_true
+        self.instances_seen += 1
+        if self.window_size is not None:
+            self._window.append((y_true, y_pred, no_change, majority))
+
+    def add_batch(self, y_true: np.ndarray, y_pred: np.ndarray):
+        """Count the predictions of consecutive instances at once, with the
+        same result as calling :meth:`add` for each of them in order.
+
+        The instances are counted in chunks of at most ``_CHUNK_SIZE`` class
+        counts, so the memory used does not grow with the size of the batch.
+        """
+        step = max(1, _CHUNK_SIZE // self.num_classes)
+        for start in range(0, len(y_true), step):
+            self._add_chunk(y_true[start : start + step], y_pred[start : start + step])
+
+    def _add_chunk(self, y_true: np.ndarray, y_pred: np.ndarray):
+        n = len(y_true)
+        if n == 0:
+            return
+        k = self.num_classes
+        previous = np.concatenate([[self._last_class], y_true[:-1]])
+        no_change = previous == y_true
+        # The class counts after each instance, including it.
+        counts = np.asarray(self._true_counts) + _running_counts(y_true, k)
+
+        if self.window_size is None:
+            majority = counts.argmax(axis=1)
+            self.matrix += np.bincount(y_true * k + y_pred, minlength=k * k).reshape(k, k)
+            self._no_change_correct += int(no_change.sum())
+            self._majority_correct += int((majority == y_true).sum())
+        else:
+            window = np.array(self._window, dtype=np.int64).reshape(-1, 4)
+            # The number of instances, counted from the oldest one in the
+            # window, that have left the window once each new instance is in.
+            evicted = np.maximum(np.arange(1, n + 1) + len(window) - self.window_size, 0)
+            if evicted[-1] > 0:
+                oldest = np.concatenate([window[:, 0], y_true])[: evicted[-1]]
+                removed = np.zeros((evicted[-1] + 1, k), dtype=np.int64)
+                removed[1:] = _running_counts(oldest, k)
+                counts -= removed[evicted]
+            majority = counts.argmax(axis=1)
+            new_rows = np.column_stack([y_true, y_pred, no_change, majority == y_true])
+            rows = np.concatenate([window, new_rows])[-self.window_size :]
+            self.matrix = np.bincount(
+                rows[:, 0] * k + rows[:, 1], minlength=k * k
+            ).reshape(k, k)
+            self._no_change_correct = int(rows[:, 2].sum())
+            self._majority_correct = int(rows[:, 3].sum())
+            self._window = deque(map(tuple, rows.tolist()))
+
+        self._true_counts = counts[-1].tolist()
+        self._majority_class = int(majority[-1])
+        self._last_class = int(y_true[-1])
+        self.instances_seen += n
+
+    def measurement_names(self) -> List[str]:
+        """Return the names of the measurements, in the order of MOA."""
+        if self._names is None:
+            classes = range(self.num_classes)
+            self._names = [
+                "instances",
+                "accuracy",
+                "kappa",
+                "kappa_t",
+                "kappa_m",
+                "f1_score",
+                *(f"f1_score_{i}" for i in classes),
+                "precision",
+                *(f"precision_{i}" for i in classes),
+                "recall",
+                *(f"recall_{i}" for i in classes),
+            ]
+        return self._names
+
+    def measurements(self) -> List[float]:
+        """Return the measurements, as percentages except for the number of
+        instances seen."""
+        matrix = self.matrix.astype(np.float64)
+        n = matrix.sum()
+        true_totals = matrix.sum(axis=1)
+        predicted_totals = matrix.sum(axis=0)
+        hits = np.diag(matrix)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            accuracy = hits.sum() / n
+            chance = np.sum((predicted_totals / n) * (true_totals / n))
+            no_change = self._no_change_correct / n
+            majority = self._majority_correct / n
+            kappas = [
+                (accuracy - expected) / (1.0 - expected) if n > 0 else 0.0
+                for expected in (chance, no_change, majority)
+            ]
+            precision = hits / predicted_totals
+            recall = hits / true_totals
+            f1 = 2 * (precision * recall) / (precision + recall)
+            mean_precision = precision.sum() / self.num_classes
+            mean_recall = recall.sum() / self.num_classes
+            mean_f1 = 2 * (mean_precision * mean_recall) / (mean_precision + mean_recall)
+        percentages = np.concatenate(
+            [
+                [accuracy, *kappas, mean_f1],
+                f1,
+                [mean_precision],
+                precision,
+                [mean_recall],
+                recall,
+            ]
+        )
+        return [float(self.instances_seen)] + (100.0 * percentages).tolist()
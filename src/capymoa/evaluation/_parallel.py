@@ -0,0 +1,334 @@
+"""Prequential evaluation of several learners in parallel worker processes."""
+
+import io
+import multiprocessing
+import os
+import queue
+import traceback
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from tqdm import tqdm
+
+from capymoa._pickle import JPickler, JUnpickler
+from capymoa.evaluation._progress_bar import resolve_progress_bar
+from capymoa.evaluation.evaluation import (
+    _get_expected_length,
+    _setup_evaluators,
+    start_time_measuring,
+    stop_time_measuring,
+)
+from capymoa.evaluation.results import PrequentialResults
+from capymoa.instance import InstanceBatch
+from capymoa.stream import Stream
+
+_NUM_BUFFERS = 2  # one buffer is filled while the workers copy the other
+
+
+def _dumps(obj) -> bytes:
+    """Pickle an object that may hold Java objects, as
+    :func:`capymoa.misc.save_model` does."""
+    buffer = io.BytesIO()
+    JPickler(buffer).dump(obj)
+    return buffer.getvalue()
+
+
+def _loads(data: bytes):
+    return JUnpickler(io.BytesIO(data)).load()
+
+
+class _BatchBuffer:
+    """The features and targets of up to ``shape[0]`` instances in shared
+    memory, written by the parent process and read by every worker."""
+
+    def __init__(
+        self,
+        shape: Tuple[int, int],
+        x_dtype,
+        y_dtype,
+        names: Optional[Tuple[str, str]] = None,
+    ):
+        self.shape = shape
+        self.x_dtype, self.y_dtype = np.dtype(x_dtype), np.dtype(y_dtype)
+        sizes = (
+            max(1, shape[0] * shape[1] * self.x_dtype.itemsize),
+            max(1, shape[0] * self.y_dtype.itemsize),
+        )
+        if names is None:
+            self._memory = [SharedMemory(create=True, size=size) for size in sizes]
+        else:
+            self._memory = [SharedMemory(name=name) for name in names]
+        self.x = np.ndarray(shape, self.x_dtype, buffer=self._memory[0].buf)
+        self.y = np.ndarray(shape[0], self.y_dtype, buffer=self._memory[1].buf)
+
+    @property
+    def spec(self) -> tuple:
+        """The arguments that attach a worker to this buffer."""
+        names = tuple(memory.name for memory in self._memory)
+        return self.shape, self.x_dtype.str, self.y_dtype.str, names
+
+    def close(self, unlink: bool = False):
+        # The arrays must be released before the memory can be closed.
+        self.x = self.y = None
+        for memory in self._memory:
+            memory.close()
+            if unlink:
+                memory.unlink()
+
+
+def _worker(
+    payload: bytes,
+    buffer_specs: List[tuple],
+    window_size: Optional[int],
+    store_predictions: bool,
+    store_y: bool,
+    tasks: multiprocessing.Queue,
+    done: multiprocessing.Queue,
+):
+    """Evaluate a group of learners on the batches announced on ``tasks``.
+
+    Runs in a spawned process with its own JVM. Every batch is acknowledged
+    on ``done`` once it has been copied out of its buffer, and the evaluators
+    are sent back on ``done`` when ``tasks`` yields None.
+    """
+    buffers = []
+    try:
+        schema, learners = _loads(payload)
+        buffers = [_BatchBuffer(*spec) for spec in buffer_specs]
+        is_classification = schema.is_classification()
+
+        start_wallclock_time, start_cpu_time = start_time_measuring()
+        evaluations = {}
+        for learner_name, learner in learners.items():
+            evaluations[learner_name] = (
+                learner,
+                *_setup_evaluators(schema, learner, window_size),
+                [] if store_predictions else None,
+                [] if store_y else None,
+            )
+
+        for slot, n in iter(tasks.get, None):
+            # Copied, as learners may keep instances after the buffer is reused.
+            batch = InstanceBatch(
+                schema, buffers[slot].x[:n].copy(), buffers[slot].y[:n].copy()
+            )
+            done.put(("ack", slot))
+            # The same steps, in the same order, as
+            # prequential_evaluation_multiple_learners.
+            for instance in batch:
+                y = instance.y_index if is_classification else instance.y_value
+                for learner, cumulative, windowed, predictions, ground_truth_y in (
+                    evaluations.values()
+                ):
+                    prediction = learner.predict(instance)
+                    cumulative.update(y, prediction)
+                    if windowed is not None:
+                        windowed.update(y, prediction)
+                    learner.train(instance)
+
+                    if predictions is not None:
+                        predictions.append(prediction)
+                    if ground_truth_y is not None:
+                        ground_truth_y.append(y)
+
+        elapsed_wallclock_time, elapsed_cpu_time = stop_time_measuring(
+            start_wallclock_time, start_cpu_time
+        )
+        results = {}
+        for learner_name, evaluation in evaluations.items():
+            learner, cumulative, windowed, predictions, ground_truth_y = evaluation
+            if windowed is not None and windowed.get_instances_seen() % window_size != 0:
+                windowed.result_windows.append(windowed.metrics())
+            results[learner_name] = {
+                "learner": str(learner),
+                "wallclock": elapsed_wallclock_time,
+                "cpu_time": elapsed_cpu_time,
+                "cumulative_evaluator": cumulative,
+                "windowed_evaluator": windowed,
+                "ground_truth_y": ground_truth_y,
+                "predictions": predictions,
+            }
+        done.put(("result", _dumps(results)))
+    except BaseException:
+        done.put(("error", traceback.format_exc()))
+    finally:
+        for buffer in buffers:
+            buffer.close()
+
+
+def parallel_prequential_evaluation_multiple_learners(
+    stream: Stream,
+    learners: Dict[str, object],
+    max_instances: Optional[int] = None,
+    window_size: int = 1000,
+    store_predictions: bool = False,
+    store_y: bool = False,
+    progress_bar: Union[bool, tqdm] = False,
+    n_workers: Optional[int] = None,
+    batch_size: int = 1000,
+) -> Dict[str, PrequentialResults]:
+    """Evaluate several learners on one pass over a stream, in parallel worker
+    processes.
+
+    This is the parallel counterpart of
+    :func:`capymoa.evaluation.prequential_evaluation_multiple_learners` and
+    returns the same results. The stream is read once, in the calling
+    process, and its batches are written to shared memory buffers that every
+    worker reads, so the data is not serialised once per worker. The learners
+    are split between ``n_workers`` processes, each with its own JVM, which
+    evaluate them test-then-train on every instance.
+
+    The learners are copied into the workers with the same pickling as
+    :func:`capymoa.misc.save_model`, so they must support it, and the objects
+    in ``learners`` are left untrained. Workers are started with the
+    ``spawn`` method, so scripts must call this function from within an
+    ``if __name__ == "__main__":`` block. Sparse streams are not supported.
+
+    >>> from capymoa.classifier import HoeffdingTree, NaiveBayes
+    >>> from capymoa.datasets import ElectricityTiny
+    >>> from capymoa.evaluation import parallel_prequential_evaluation_multiple_learners
+    >>> stream = ElectricityTiny()
+    >>> learners = {
+    ...     "nb": NaiveBayes(schema=stream.get_schema()),
+    ...     "ht": HoeffdingTree(schema=stream.get_schema()),
+    ... }
+    >>> results = parallel_prequential_evaluation_multiple_learners(stream, learners)
+    >>> results["nb"].cumulative.get_instances_seen()
+    2000
+
+    :param stream: The stream to evaluate the learners on. It is restarted.
+    :param learners: The learners to evaluate, by name.
+    :param max_instances: The number of instances to evaluate before exiting. If
+        None, the evaluation will continue until the stream is empty.
+    :param window_size: The size of the window used for windowed evaluation,
+        defaults to 1000
+    :param store_predictions: Store the learners' predictions in lists, defaults
+        to False
+    :param store_y: Store the ground truth targets in lists, defaults to False
+    :param progress_bar: Enable, disable, or override the progress bar.
+    :param n_workers: The number of worker processes, defaults to None which
+        uses one per learner, up to the number of CPUs.
+    :param batch_size: The number of instances sent to the workers at once,
+        defaults to 1000.
+    :raises ValueError: If ``n_workers`` or ``batch_size`` is not a positive
+        integer, or the stream is sparse.
+    :raises RuntimeError: If a worker fails.
+    :return: A dictionary with the results of each learner, by name.
+    """
+    if n_workers is None:
+        n_workers = min(len(learners), os.cpu_count() or 1)
+    if n_workers < 1 or batch_size < 1:
+        raise ValueError("n_workers and batch_size must be positive integers")
+
+    schema = stream.get_schema()
+    stream.restart()
+    names = list(learners)
+    groups = [group for group in (names[i::n_workers] for i in range(n_workers)) if group]
+
+    context = multiprocessing.get_context("spawn")
+    y_dtype = np.int64 if schema.is_classification() else np.float64
+    buffers = []
+    workers = []
+    done = context.Queue()
+    pending = [0] * _NUM_BUFFERS
+    results = {}
+
+    def receive():
+        """Handle the next message of the workers."""
+        while True:
+            try:
+                kind, content = done.get(timeout=1.0)
+                break
+            except queue.Empty:
+                for process, _ in workers:
+                    if process.exitcode not in (None, 0):
+                        raise RuntimeError(
+                            f"A worker process exited with code {process.exitcode}"
+                        )
+        if kind == "ack":
+            pending[content] -= 1
+        elif kind == "result":
+            results.update(_loads(content))
+        else:
+            raise RuntimeError(f"A worker failed with:\n{content}")
+
+    progress_bar = resolve_progress_bar(
+        progress_bar, f"Eval {len(learners)} learners on {type(stream).__name__}"
+    )
+    expected_length = _get_expected_length(stream, max_instances)
+    if progress_bar is not None and expected_length is not None:
+        progress_bar.set_total(expected_length)
+
+    try:
+        for _ in range(_NUM_BUFFERS):
+            buffers.append(
+                _BatchBuffer(
+                    (batch_size, schema.get_num_attributes()), schema.dtype, y_dtype
+                )
+            )
+        for group in groups:
+            tasks = context.Queue()
+            payload = _dumps((schema, {name: learners[name] for name in group}))
+            process = context.Process(
+                target=_worker,
+                args=(
+                    payload,
+                    [buffer.spec for buffer in buffers],
+                    window_size,
+                    store_predictions,
+                    store_y,
+                    tasks,
+                    done,
+                ),
+                daemon=True,
+            )
+            process.start()
+            workers.append((process, tasks))
+
+        slot = 0
+        instances_processed = 0
+        while max_instances is None or instances_processed < max_instances:
+            n = batch_size
+            if max_instances is not None:
+                n = min(n, max_instances - instances_processed)
+            batch = stream.next_batch(n)
+            if batch is None:
+                break
+            if batch.is_sparse:
+                raise ValueError("Sparse streams are not supported")
+
+            # Wait until every worker has copied the previous batch of the slot.
+            while pending[slot] > 0:
+                receive()
+            buffers[slot].x[: len(batch)] = batch.x
+            buffers[slot].y[: len(batch)] = batch.y
+            pending[slot] = len(workers)
+            for _, tasks in workers:
+                tasks.put((slot, len(batch)))
+            slot = (slot + 1) % _NUM_BUFFERS
+
+            instances_processed += len(batch)
+            if progress_bar is not None:
+                progress_bar.update(len(batch))
+
+        for _, tasks in workers:
+            tasks.put(None)
+        while len(results) < len(learners):
+            receive()
+    finally:
+        if progress_bar is not None:
+            progress_bar.close()
+        for process, _ in workers:
+            if process.is_alive() and len(results) < len(learners):
+                process.terminate()
+            process.join()
+        for buffer in buffers:
+            buffer.close(unlink=True)
+
+    return {
+        learner_name: PrequentialResults(
+            stream=stream, max_instances=max_instances, **results[learner_name]
+        )
+        for learner_name in names
+    }
@@ -1,4 +1,4 @@
-from typing import Optional, Sized
+from typing import Callable, List, Optional, Sequence, Sized, Tuple
 from typing import Any, Dict, Union
 
 import pandas as pd
@@ -8,8 +8,10 @@ import warnings
 import json
 import csv
 import os
+import asyncio
 
-from capymoa.stream import Schema, Stream
+from capymoa.instance import InstanceBatch
+from capymoa.stream import AsyncStream, Schema, Stream
 
 from capymoa.base import (
     AnomalyDetector,
@@ -19,6 +21,7 @@ from capymoa.base import (
 )
 
 from capymoa.evaluation.results import PrequentialResults
+from capymoa.evaluation._confusion_matrix import _ConfusionMatrix
 from capymoa._utils import _translate_metric_name
 from capymoa.base import Classifier, Regressor
 from capymoa.evaluation._progress_bar import Union, resolve_progress_bar
@@ -41,6 +44,78 @@ from java.util import ArrayList
 from moa.evaluation import EfficientEvaluationLoops
 from moa.streams import InstanceStream
 
+_BACKENDS = ("moa", "numpy")
+
+
+def _batch_arrays(y: Sequence, y_pred: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the targets and predictions of a batch as arrays with one row
+    per instance."""
+    y, y_pred = np.asarray(y), np.asarray(y_pred)
+    if y.ndim != 1 or y_pred.ndim == 0 or len(y_pred) != len(y):
+        raise ValueError(
+            f"Expected y of shape (n,) and y_pred with n rows, "
+            f"got {y.shape} and {y_pred.shape}"
+        )
+    return y, y_pred
+
+
+def _update_in_windows(evaluator, n: int, add: Callable[[int, int], None]):
+    """Add ``n`` new results to an evaluator by calling ``add(start, stop)``
+    on slices that end at its window boundaries, and record the measurements
+    at each boundary exactly as per-instance updates do."""
+    window_size = evaluator.window_size
+    start = 0
+    while start < n:
+        stop = n
+        if window_size is not None:
+            stop = min(n, start + window_size - evaluator.instances_seen % window_size)
+        add(start, stop)
+        evaluator.instances_seen += stop - start
+        if window_size is not None and evaluator.instances_seen % window_size == 0:
+            evaluator.result_windows.append(evaluator.metrics())
+        start = stop
+
+
+def _moa_metrics_header(evaluator, moa_evaluator, measurements=None) -> List[str]:
+    """Return the translated names of the measurements of a MOA evaluator.
+
+    The names are cached on ``evaluator`` once it has seen an instance, since
+    MOA only knows how many per-class measurements to report from then on.
+    """
+    header = getattr(evaluator, "_metrics_header_cache", None)
+    if header is not None:
+        return header
+    if measurements is None:
+        measurements = moa_evaluator.getPerformanceMeasurements()
+    header = [
+        _translate_metric_name("".join(measurement.getName()), to='capymoa')
+        for measurement in measurements
+    ]
+    if evaluator.instances_seen > 0:
+        evaluator._metrics_header_cache = header
+    return header
+
+
+def _moa_metrics_dict(evaluator, moa_evaluator) -> Dict[str, float]:
+    """Return the metrics of a MOA evaluator by name, from a single snapshot
+    of its measurements."""
+    measurements = moa_evaluator.getPerformanceMeasurements()
+    header = _moa_metrics_header(evaluator, moa_evaluator, measurements)
+    return dict(zip(header, [measurement.getValue() for measurement in measurements]))
+
+
+def _metric_value(evaluator, metric: str):
+    """Return a single metric of an evaluator from one snapshot of its
+    measurements, looking its position up in a dict built once per header."""
+    header = evaluator.metrics_header()
+    indexes = getattr(evaluator, "_metric_indexes", None)
+    if indexes is None or indexes[0] is not header:
+        indexes = (header, {name: index for index, name in enumerate(header)})
+        evaluator._metric_indexes = indexes
+    if metric not in indexes[1]:
+        raise ValueError(f"{metric!r} is not a metric of {type(evaluator).__name__}")
+    return evaluator.metrics()[indexes[1][metric]]
+
 
 def _is_fast_mode_compilable(stream: Stream, learner, optimise=True) -> bool:
 
@@ -63,10 +138,18 @@ def _get_expected_length(
     stream: Stream, max_instances: Optional[int] = None
 ) -> Optional[int]:
     """Get the expected length of the stream."""
-    if isinstance(stream, Sized) and max_instances is not None:
-        return min(len(stream), max_instances)
-    elif isinstance(stream, Sized) and max_instances is None:
-        return len(stream)
+    length = None
+    if isinstance(stream, Sized):
+        try:
+            length = len(stream)
+        except TypeError:
+            # Wrappers are sized only when the stream they wrap is.
+            length = None
+
+    if length is not None and max_instances is not None:
+        return min(length, max_instances)
+    elif length is not None:
+        return length
     elif max_instances is not None:
         return max_instances
     else:
@@ -85,8 +168,24 @@ def _setup_progress_bar(msg: str, progress_bar: Union[bool, tqdm], stream: Strea
 
 class ClassificationEvaluator:
     """
-    Wrapper for the Classification Performance Evaluator from MOA. By default, it uses the
-    BasicClassificationPerformanceEvaluator
+    Evaluator of the accuracy, kappa statistics, precision, recall and F1 scores
+    of a classifier.
+
+    By default, every update is passed to MOA's
+    ``BasicClassificationPerformanceEvaluator`` (``backend="moa"``). With
+    ``backend="numpy"``, the measurements are instead computed in Python from
+    an incremental confusion matrix, which costs a few increments per instance
+    and gives the same values without calls into the JVM. The numpy backend
+    has no ``moa_basic_evaluator``.
+
+    >>> from capymoa.evaluation import ClassificationEvaluator
+    >>> from capymoa.stream import Schema
+    >>> schema = Schema.from_custom(["f1"], values_for_class_label=["yes", "no"])
+    >>> evaluator = ClassificationEvaluator(schema)
+    >>> for y_true, y_pred in [(0, 0), (1, 1), (1, 0), (0, 0)]:
+    ...     evaluator.update(y_true, y_pred)
+    >>> evaluator.accuracy(), evaluator.recall_1()
+    (75.0, 50.0)
     """
 
     def __init__(
@@ -95,13 +194,49 @@ class ClassificationEvaluator:
             window_size=None,
             allow_abstaining=True,
             moa_evaluator=None,
+            backend: str = "moa",
     ):
+        """Construct a ClassificationEvaluator.
+
+        :param schema: The schema of the stream.
+        :param window_size: Record the measurements every ``window_size``
+            instances, see :meth:`metrics_per_window`. Defaults to None.
+        :param allow_abstaining: Count predictions that are not a valid class
+            index as errors rather than raising an error, defaults to True.
+        :param moa_evaluator: The MOA evaluator to use with the ``"moa"``
+            backend, defaults to a ``BasicClassificationPerformanceEvaluator``.
+        :param backend: ``"moa"`` or ``"numpy"``, defaults to ``"moa"``.
+        :raises ValueError: If the schema is missing, the backend is unknown or
+            a ``moa_evaluator`` is given with the ``"numpy"`` backend.
+        """
+        self._confusion: Optional[_ConfusionMatrix] = None
+        self.moa_basic_evaluator = None
         self.instances_seen = 0
         self.result_windows = []
         self.window_size = window_size
 
         self.allow_abstaining = allow_abstaining
 
+        if backend not in _BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {_BACKENDS}")
+        if backend == "numpy" and moa_evaluator is not None:
+            raise ValueError("A moa_evaluator can only be used with backend='moa'")
+        self.backend = backend
+
+        self.schema = schema
+        self._header = None
+        if self.schema is None:
+            raise ValueError("Schema is None, please define a proper Schema.")
+        if self.schema.get_label_indexes() is None:
+            raise ValueError(
+                "Schema was not initialised properly, please define a proper Schema."
+            )
+
+        self.pred_template = [0] * len(self.schema.get_label_indexes())
+        if backend == "numpy":
+            self._confusion = _ConfusionMatrix(self.schema.get_num_classes())
+            return
+
         self.moa_basic_evaluator = moa_evaluator
         if self.moa_basic_evaluator is None:
             self.moa_basic_evaluator = BasicClassificationPerformanceEvaluator()
@@ -113,27 +248,13 @@ class ClassificationEvaluator:
         self.moa_basic_evaluator.prepareForUse()
 
         _attributeValues = ArrayList()
-        self.pred_template = [0, 0]
-
-        self.schema = schema
-        self._header = None
-        if self.schema is not None:
-            if self.schema.get_label_indexes() is not None:
-                for value in self.schema.get_label_indexes():
-                    _attributeValues.append(value)
-                _classAttribute = Attribute("Class", _attributeValues)
-                attSub = ArrayList()
-                attSub.append(_classAttribute)
-                self._header = Instances("", attSub, 1)
-                self._header.setClassIndex(0)
-            else:
-                raise ValueError(
-                    "Schema was not initialised properly, please define a proper Schema."
-                )
-        else:
-            raise ValueError("Schema is None, please define a proper Schema.")
-
-        self.pred_template = [0] * len(self.schema.get_label_indexes())
+        for value in self.schema.get_label_indexes():
+            _attributeValues.append(value)
+        _classAttribute = Attribute("Class", _attributeValues)
+        attSub = ArrayList()
+        attSub.append(_classAttribute)
+        self._header = Instances("", attSub, 1)
+        self._header.setClassIndex(0)
 
         # Create the denseInstance just once and keep reusing it by changing the classValue (more efficient).
         self._instance = DenseInstance(1)
@@ -177,16 +298,6 @@ class ClassificationEvaluator:
             else:
                 raise ValueError(f"Invalid prediction y_pred_index = {y_pred_index}")
 
-        # Notice, in MOA the class value is an index, not the actual value
-        # (e.g. not "one" but 0 assuming labels=["one", "two"])
-        self._instance.setClassValue(y_target_index)
-        example = InstanceExample(self._instance)
-
-        # Shallow copy of the pred_template
-        # MOA evaluator accepts the result of getVotesForInstance which is similar to a predict_proba
-        #    (may or may not be normalised, but for our purposes it doesn't matter)
-        prediction_array = self.pred_template[:]
-
         # if y_pred is None, it indicates the learner did not produce a prediction for this instance,
         # count as an error
         if y_pred_index is None:
@@ -204,8 +315,10 @@ class ClassificationEvaluator:
             # random_y_pred = random.choice(indexesWithoutY)
             # y_pred_index = self.schema.get_label_indexes()[random_y_pred]
 
-        prediction_array[int(y_pred_index)] += 1
-        self.moa_basic_evaluator.addResult(example, prediction_array)
+        if self._confusion is not None:
+            self._confusion.add(int(y_target_index), int(y_pred_index))
+        else:
+            self._moa_add(InstanceExample(self._instance), y_target_index, y_pred_index)
 
         self.instances_seen += 1
 
@@ -214,25 +327,88 @@ class ClassificationEvaluator:
             performance_values = self.metrics()
             self.result_windows.append(performance_values)
 
+    def _moa_add(self, example: InstanceExample, y_target_index: int, y_pred_index: int):
+        # Notice, in MOA the class value is an index, not the actual value
+        # (e.g. not "one" but 0 assuming labels=["one", "two"])
+        self._instance.setClassValue(y_target_index)
+
+        # Shallow copy of the pred_template
+        # MOA evaluator accepts the result of getVotesForInstance which is similar to a predict_proba
+        #    (may or may not be normalised, but for our purposes it doesn't matter)
+        prediction_array = self.pred_template[:]
+        prediction_array[int(y_pred_index)] += 1
+        self.moa_basic_evaluator.addResult(example, prediction_array)
+
+    def update_batch(self, y_target_index: Sequence[int], y_pred_index: Sequence[int]):
+        """Update the evaluator with the ground-truths and predictions of
+        consecutive instances.
+
+        It is equivalent to calling :meth:`update` for each instance in order,
+        including the measurements recorded every ``window_size`` instances.
+        With the ``"numpy"`` backend, the confusion matrix is updated in a few
+        vectorised steps per window.
+
+        >>> import numpy as np
+        >>> from capymoa.evaluation import ClassificationEvaluator
+        >>> from capymoa.stream import Schema
+        >>> schema = Schema.from_custom(["f1"], values_for_class_label=["yes", "no"])
+        >>> evaluator = ClassificationEvaluator(schema, window_size=2)
+        >>> evaluator.update_batch(np.array([0, 1, 1, 0]), np.array([0, 1, 0, 0]))
+        >>> evaluator.metrics_per_window()["accuracy"].tolist()
+        [100.0, 75.0]
+
+        :param y_target_index: The ground-truth class indexes.
+        :param y_pred_index: The predicted class indexes. An index that is not
+            valid, such as -1, marks an instance where the classifier abstained.
+        :raises ValueError: If the arrays do not have one integer per instance,
+            or a prediction is invalid and abstaining is not allowed.
+        """
+        y_true, y_pred = _batch_arrays(y_target_index, y_pred_index)
+        if len(y_true) == 0:
+            return
+        if not (
+            np.issubdtype(y_true.dtype, np.integer)
+            and np.issubdtype(y_pred.dtype, np.integer)
+            and y_pred.ndim == 1
+        ):
+            raise ValueError("y_target_index and y_pred_index must be 1D integer arrays")
+        invalid = (y_pred < 0) | (y_pred >= self.schema.get_num_classes())
+        if invalid.any():
+            if not self.allow_abstaining:
+                raise ValueError(f"Invalid prediction y_pred_index = {y_pred[invalid][0]}")
+            y_pred = np.where(invalid, 0, y_pred)
+
+        if self._confusion is not None:
+            def add(start: int, stop: int):
+                self._confusion.add_batch(y_true[start:stop], y_pred[start:stop])
+        else:
+            example = InstanceExample(self._instance)
+
+            def add(start: int, stop: int):
+                for target, prediction in zip(
+                    y_true[start:stop].tolist(), y_pred[start:stop].tolist()
+                ):
+                    self._moa_add(example, target, prediction)
+
+        _update_in_windows(self, len(y_true), add)
+
     def metrics_header(self):
-        performance_measurements = self.moa_basic_evaluator.getPerformanceMeasurements()
-        performance_names = [
-            _translate_metric_name("".join(measurement.getName()), to='capymoa')
-            for measurement in performance_measurements
-        ]
-        return performance_names
+        if self._confusion is not None:
+            return self._confusion.measurement_names()
+        return _moa_metrics_header(self, self.moa_basic_evaluator)
 
     def metrics(self):
+        if self._confusion is not None:
+            return self._confusion.measurements()
         return [
             measurement.getValue()
             for measurement in self.moa_basic_evaluator.getPerformanceMeasurements()
         ]
 
     def metrics_dict(self):
-        return {
-            header: value
-            for header, value in zip(self.metrics_header(), self.metrics())
-        }
+        if self._confusion is not None:
+            return dict(zip(self.metrics_header(), self.metrics()))
+        return _moa_metrics_dict(self, self.moa_basic_evaluator)
 
     def metrics_per_window(self):
         return pd.DataFrame(self.result_windows, columns=self.metrics_header())
@@ -245,42 +421,36 @@ class ClassificationEvaluator:
 
     # This allows access to metrics that are generated dynamically like recall_0, f1_score_3, ...
     def __getattr__(self, metric):
+        if metric.startswith("_"):
+            raise AttributeError(metric)
         if metric in self.metrics_header():
-            index = self.metrics_header().index(metric)
 
             def metric_value():
-                return float(self.metrics()[index])
+                return float(_metric_value(self, metric))
 
             return metric_value
         return None
 
     def accuracy(self):
-        index = self.metrics_header().index("accuracy")
-        return float(self.metrics()[index])
+        return float(_metric_value(self, "accuracy"))
 
     def kappa(self):
-        index = self.metrics_header().index("kappa")
-        return float(self.metrics()[index])
+        return float(_metric_value(self, "kappa"))
 
     def kappa_t(self):
-        index = self.metrics_header().index("kappa_t")
-        return float(self.metrics()[index])
+        return float(_metric_value(self, "kappa_t"))
 
     def kappa_m(self):
-        index = self.metrics_header().index("kappa_m")
-        return float(self.metrics()[index])
+        return float(_metric_value(self, "kappa_m"))
 
     def f1_score(self):
-        index = self.metrics_header().index("f1_score")
-        return float(self.metrics()[index])
+        return float(_metric_value(self, "f1_score"))
 
     def precision(self):
-        index = self.metrics_header().index("precision")
-        return float(self.metrics()[index])
+        return float(_metric_value(self, "precision"))
 
     def recall(self):
-        index = self.metrics_header().index("recall")
-        return float(self.metrics()[index])
+        return float(_metric_value(self, "recall"))
 
 
 class RegressionEvaluator:
@@ -356,13 +526,36 @@ class RegressionEvaluator:
             ]
             self.result_windows.append(performance_values)
 
+    def update_batch(self, y: Sequence[float], y_pred: Sequence[float]):
+        """Update the evaluator with the ground-truths and predictions of
+        consecutive instances.
+
+        It is equivalent to calling :meth:`update` for each instance in order,
+        including the measurements recorded every ``window_size`` instances. It
+        is not vectorised: MOA's regression evaluator takes one instance at a
+        time, so each instance is still added with its own call to MOA.
+
+        :param y: The ground-truth target values.
+        :param y_pred: The predicted values.
+        :raises ValueError: If the arrays do not have one value per instance.
+        """
+        y, y_pred = _batch_arrays(y, y_pred)
+        if y_pred.ndim != 1:
+            raise ValueError("y_pred must be a 1D array")
+        targets = y.astype(np.float64).tolist()
+        predictions = y_pred.astype(np.float64).tolist()
+        example = InstanceExample(self._instance)
+
+        def add(start: int, stop: int):
+            for target, prediction in zip(targets[start:stop], predictions[start:stop]):
+                self._instance.setClassValue(target)
+                self.pred_template[0] = prediction
+                self.moa_basic_evaluator.addResult(example, self.pred_template)
+
+        _update_in_windows(self, len(targets), add)
+
     def metrics_header(self):
-        performance_measurements = self.moa_basic_evaluator.getPerformanceMeasurements()
-        performance_names = [
-            _translate_metric_name("".join(measurement.getName()), to='capymoa')
-            for measurement in performance_measurements
-        ]
-        return performance_names
+        return _moa_metrics_header(self, self.moa_basic_evaluator)
 
     def metrics(self):
         return [
@@ -371,7 +564,7 @@ class RegressionEvaluator:
         ]
 
     def metrics_dict(self):
-        return {header: value for header, value in zip(self.metrics_header(), self.metrics())}
+        return _moa_metrics_dict(self, self.moa_basic_evaluator)
 
     def metrics_per_window(self):
         return pd.DataFrame(self.result_windows, columns=self.metrics_header()).copy()
@@ -383,24 +576,19 @@ class RegressionEvaluator:
         return self.gt_y
 
     def mae(self):
-        index = self.metrics_header().index("mae")
-        return self.metrics()[index]
+        return _metric_value(self, "mae")
 
     def rmse(self):
-        index = self.metrics_header().index("rmse")
-        return self.metrics()[index]
+        return _metric_value(self, "rmse")
 
     def rmae(self):
-        index = self.metrics_header().index("rmae")
-        return self.metrics()[index]
+        return _metric_value(self, "rmae")
 
     def r2(self):
-        index = self.metrics_header().index("r2")
-        return self.metrics()[index]
+        return _metric_value(self, "r2")
 
     def adjusted_r2(self):
-        index = self.metrics_header().index("adjusted_r2")
-        return self.metrics()[index]
+        return _metric_value(self, "adjusted_r2")
 
 
 class AnomalyDetectionEvaluator:
@@ -480,13 +668,37 @@ class AnomalyDetectionEvaluator:
             performance_values = self.metrics()
             self.result_windows.append(performance_values)
 
+    def update_batch(self, y_target_index: Sequence[int], score: Sequence[float]):
+        """Update the evaluator with the ground-truths and scores of
+        consecutive instances.
+
+        It is equivalent to calling :meth:`update` for each instance in order,
+        including the measurements recorded every ``window_size`` instances. It
+        is not vectorised: MOA's AUC evaluator takes one instance at a time, so
+        each instance is still added with its own call to MOA.
+
+        :param y_target_index: The ground-truth class indexes.
+        :param score: The predicted scores, in the range [0, 1].
+        :raises ValueError: If the arrays do not have one value per instance.
+        """
+        y, score = _batch_arrays(y_target_index, score)
+        if len(y) > 0 and not np.issubdtype(y.dtype, np.integer):
+            raise ValueError("y_target_index must be an integer array")
+        if score.ndim != 1:
+            raise ValueError("score must be a 1D array")
+        targets = y.tolist()
+        scores = score.astype(np.float64).tolist()
+        example = InstanceExample(self._instance)
+
+        def add(start: int, stop: int):
+            for target, value in zip(targets[start:stop], scores[start:stop]):
+                self._instance.setClassValue(target)
+                self.moa_basic_evaluator.addResult(example, [value, 1 - value])
+
+        _update_in_windows(self, len(targets), add)
+
     def metrics_header(self):
-        performance_measurements = self.moa_basic_evaluator.getPerformanceMeasurements()
-        performance_names = [
-            _translate_metric_name("".join(measurement.getName()), to='capymoa')
-            for measurement in performance_measurements
-        ]
-        return performance_names
+        return _moa_metrics_header(self, self.moa_basic_evaluator)
 
     def metrics(self):
         return [
@@ -495,21 +707,16 @@ class AnomalyDetectionEvaluator:
         ]
 
     def metrics_dict(self):
-        return {
-            header: value
-            for header, value in zip(self.metrics_header(), self.metrics())
-        }
+        return _moa_metrics_dict(self, self.moa_basic_evaluator)
 
     def metrics_per_window(self):
         return pd.DataFrame(self.result_windows, columns=self.metrics_header())
 
     def auc(self):
-        index = self.metrics_header().index("auc")
-        return self.metrics()[index]
+        return _metric_value(self, "auc")
 
     def s_auc(self):
-        index = self.metrics_header().index("s_auc")
-        return self.metrics()[index]
+        return _metric_value(self, "s_auc")
 
 
 class AnomalyDetectionWindowedEvaluator:
@@ -588,13 +795,37 @@ class AnomalyDetectionWindowedEvaluator:
             performance_values = self.metrics()
             self.result_windows.append(performance_values)
 
+    def update_batch(self, y_target_index: Sequence[int], score: Sequence[float]):
+        """Update the evaluator with the ground-truths and scores of
+        consecutive instances.
+
+        It is equivalent to calling :meth:`update` for each instance in order,
+        including the measurements recorded every ``window_size`` instances. It
+        is not vectorised: MOA's windowed AUC evaluator takes one instance at a
+        time, so each instance is still added with its own call to MOA.
+
+        :param y_target_index: The ground-truth class indexes.
+        :param score: The predicted scores, in the range [0, 1].
+        :raises ValueError: If the arrays do not have one value per instance.
+        """
+        y, score = _batch_arrays(y_target_index, score)
+        if len(y) > 0 and not np.issubdtype(y.dtype, np.integer):
+            raise ValueError("y_target_index must be an integer array")
+        if score.ndim != 1:
+            raise ValueError("score must be a 1D array")
+        targets = y.tolist()
+        scores = score.astype(np.float64).tolist()
+        example = InstanceExample(self._instance)
+
+        def add(start: int, stop: int):
+            for target, value in zip(targets[start:stop], scores[start:stop]):
+                self._instance.setClassValue(target)
+                self.moa_evaluator.addResult(example, [value, 1 - value])
+
+        _update_in_windows(self, len(targets), add)
+
     def metrics_header(self):
-        performance_measurements = self.moa_evaluator.getPerformanceMeasurements()
-        performance_names = [
-            _translate_metric_name("".join(measurement.getName()), to='capymoa')
-            for measurement in performance_measurements
-        ]
-        return performance_names
+        return _moa_metrics_header(self, self.moa_evaluator)
 
     def metrics(self):
         return [
@@ -603,21 +834,16 @@ class AnomalyDetectionWindowedEvaluator:
         ]
 
     def metrics_dict(self):
-        return {
-            header: value
-            for header, value in zip(self.metrics_header(), self.metrics())
-        }
+        return _moa_metrics_dict(self, self.moa_evaluator)
 
     def metrics_per_window(self):
         return pd.DataFrame(self.result_windows, columns=self.metrics_header())
 
     def auc(self):
-        index = self.metrics_header().index("auc")
-        return self.metrics()[index]
+        return _metric_value(self, "auc")
 
     def s_auc(self):
-        index = self.metrics_header().index("s_auc")
-        return self.metrics()[index]
+        return _metric_value(self, "s_auc")
 
 class ClusteringEvaluator:
     """
@@ -694,16 +920,31 @@ class ClassificationWindowedEvaluator(ClassificationEvaluator):
     def __init__(
             self,
             schema=None,
-            window_size=1000
+            window_size=1000,
+            backend: str = "moa",
     ):
-        self.moa_evaluator = WindowClassificationPerformanceEvaluator()
-        self.moa_evaluator.widthOption.setValue(window_size)
+        """Construct a ClassificationWindowedEvaluator.
+
+        :param schema: The schema of the stream.
+        :param window_size: The number of instances in each window, defaults to 1000.
+        :param backend: ``"moa"`` to use MOA's
+            ``WindowClassificationPerformanceEvaluator``, or ``"numpy"`` to
+            compute the measurements from the confusion matrix of the last
+            ``window_size`` instances. Defaults to ``"moa"``.
+        """
+        self.moa_evaluator = None
+        if backend == "moa":
+            self.moa_evaluator = WindowClassificationPerformanceEvaluator()
+            self.moa_evaluator.widthOption.setValue(window_size)
 
         super().__init__(
             schema=schema,
             window_size=window_size,
             moa_evaluator=self.moa_evaluator,
+            backend=backend,
         )
+        if self._confusion is not None:
+            self._confusion = _ConfusionMatrix(self.schema.get_num_classes(), window_size)
 
     def __repr__(self):
         return str(self)
@@ -713,6 +954,8 @@ class ClassificationWindowedEvaluator(ClassificationEvaluator):
 
     # This allows access to metrics that are generated dynamically like recall_0, f1_score_3, ...
     def __getattr__(self, metric):
+        if metric.startswith("_"):
+            raise AttributeError(metric)
         if metric in self.metrics_header():
 
             def metric_value():
@@ -845,13 +1088,37 @@ class PredictionIntervalEvaluator(RegressionEvaluator):
             ]
             self.result_windows.append(performance_values)
 
+    def update_batch(self, y: Sequence[float], y_pred: Sequence[Sequence[float]]):
+        """Update the evaluator with the ground-truths and prediction intervals
+        of consecutive instances.
+
+        It is equivalent to calling :meth:`update` for each instance in order,
+        including the measurements recorded every ``window_size`` instances. It
+        is not vectorised: MOA's prediction interval evaluator takes one
+        instance at a time, so each instance is still added with its own call to
+        MOA.
+
+        :param y: The ground-truth target values.
+        :param y_pred: An array of shape (n, 3) with the lower bound, the
+            prediction and the upper bound of each instance.
+        :raises ValueError: If the arrays do not have one row per instance.
+        """
+        y, y_pred = _batch_arrays(y, y_pred)
+        if y_pred.ndim != 2 or y_pred.shape[1] != len(self.pred_template):
+            raise ValueError(f"y_pred must be of shape (n, {len(self.pred_template)})")
+        targets = y.astype(np.float64).tolist()
+        intervals = y_pred.astype(np.float64).tolist()
+        example = InstanceExample(self._instance)
+
+        def add(start: int, stop: int):
+            for target, interval in zip(targets[start:stop], intervals[start:stop]):
+                self._instance.setClassValue(target)
+                self.moa_basic_evaluator.addResult(example, interval)
+
+        _update_in_windows(self, len(targets), add)
+
     def metrics_header(self):
-        performance_measurements = self.moa_basic_evaluator.getPerformanceMeasurements()
-        performance_names = [
-            _translate_metric_name("".join(measurement.getName()), to='capymoa')
-            for measurement in performance_measurements
-        ]
-        return performance_names
+        return _moa_metrics_header(self, self.moa_basic_evaluator)
 
     def metrics(self):
         return [
@@ -863,16 +1130,13 @@ class PredictionIntervalEvaluator(RegressionEvaluator):
         return pd.DataFrame(self.result_windows, columns=self.metrics_header())
 
     def coverage(self):
-        index = self.metrics_header().index("coverage")
-        return self.metrics()[index]
+        return _metric_value(self, "coverage")
 
     def average_length(self):
-        index = self.metrics_header().index("average_length")
-        return self.metrics()[index]
+        return _metric_value(self, "average_length")
 
     def nmpiw(self):
-        index = self.metrics_header().index("nmpiw")
-        return self.metrics()[index]
+        return _metric_value(self, "nmpiw")
 
 
 class PredictionIntervalWindowedEvaluator(PredictionIntervalEvaluator):
@@ -913,6 +1177,42 @@ def stop_time_measuring(start_wallclock_time, start_cpu_time):
     return elapsed_wallclock_time, elapsed_cpu_time
 
 
+def _setup_evaluators(
+    schema: Schema, learner: Union[Classifier, Regressor], window_size: Optional[int]
+):
+    """Create the cumulative and windowed evaluators suited to a learner.
+
+    :return: The cumulative evaluator and the windowed evaluator, which is None
+        if ``window_size`` is None.
+    """
+    evaluator_windowed = None
+    if schema.is_classification():
+        evaluator_cumulative = ClassificationEvaluator(
+            schema=schema, window_size=window_size
+        )
+        if window_size is not None:
+            evaluator_windowed = ClassificationWindowedEvaluator(
+                schema=schema, window_size=window_size
+            )
+    elif not isinstance(learner, MOAPredictionIntervalLearner):
+        evaluator_cumulative = RegressionEvaluator(
+            schema=schema, window_size=window_size
+        )
+        if window_size is not None:
+            evaluator_windowed = RegressionWindowedEvaluator(
+                schema=schema, window_size=window_size
+            )
+    else:
+        evaluator_cumulative = PredictionIntervalEvaluator(
+            schema=schema, window_size=window_size
+        )
+        if window_size is not None:
+            evaluator_windowed = PredictionIntervalWindowedEvaluator(
+                schema=schema, window_size=window_size
+            )
+    return evaluator_cumulative, evaluator_windowed
+
+
 def prequential_evaluation(
     stream: Stream,
     learner: Union[Classifier, Regressor],
@@ -923,6 +1223,7 @@ def prequential_evaluation(
     optimise: bool = True,
     restart_stream: bool = True,
     progress_bar: Union[bool, tqdm] = False,
+    batch_size: Optional[int] = None,
 ) -> PrequentialResults:
     """Run and evaluate a learner on a stream using prequential evaluation.
 
@@ -930,6 +1231,23 @@ def prequential_evaluation(
     window-fashion (i.e. windowed prequential evaluation). Returns both
     evaluators so that the user has access to metrics from both evaluators.
 
+    With ``batch_size``, the stream is read in mini-batches that are
+    predicted with ``learner.predict_batch``, evaluated with the
+    evaluators' ``update_batch`` and then trained on with
+    ``learner.train_batch``. Every instance of a mini-batch is predicted by
+    the model as it was before the mini-batch, which lets learners amortise
+    their per-call overhead over many instances. ``batch_size=1`` gives the
+    same results as the instance-by-instance evaluation.
+
+    >>> from capymoa.classifier import SGDClassifier
+    >>> from capymoa.datasets import ElectricityTiny
+    >>> from capymoa.evaluation import prequential_evaluation
+    >>> stream = ElectricityTiny()
+    >>> learner = SGDClassifier(stream.get_schema())
+    >>> results = prequential_evaluation(stream, learner, batch_size=100)
+    >>> results.cumulative.get_instances_seen()
+    2000
+
     :param stream: A data stream to evaluate the learner on. Will be restarted if
         ``restart_stream`` is True.
     :param learner: The learner to evaluate.
@@ -948,11 +1266,33 @@ def prequential_evaluation(
         from the beginning of the stream.
     :param progress_bar: Enable, disable, or override the progress bar. Currently
         incompatible with ``optimize=True``.
+    :param batch_size: Evaluate in mini-batches of this many instances instead
+        of instance by instance, defaults to None. The Java native evaluation
+        loop is not used in this mode.
+    :raises ValueError: If ``batch_size`` is not a positive integer.
     :return: An object containing the results of the evaluation windowed metrics,
         cumulative metrics, ground truth targets, and predictions.
     """
+    if batch_size is not None and batch_size < 1:
+        raise ValueError("batch_size must be a positive integer")
     if restart_stream:
         stream.restart()
+    if batch_size is not None:
+        evaluator_cumulative, evaluator_windowed = _setup_evaluators(
+            stream.get_schema(), learner, window_size
+        )
+        return _prequential_evaluation_batch(
+            stream,
+            learner,
+            learner.predict_batch,
+            evaluator_cumulative,
+            evaluator_windowed,
+            max_instances,
+            batch_size,
+            store_predictions,
+            store_y,
+            _setup_progress_bar("Eval", progress_bar, stream, learner, max_instances),
+        )
     if _is_fast_mode_compilable(stream, learner, optimise):
         return _prequential_evaluation_fast(
             stream,
@@ -975,33 +1315,9 @@ def prequential_evaluation(
     start_wallclock_time, start_cpu_time = start_time_measuring()
     instancesProcessed = 1
 
-    evaluator_cumulative = None
-    evaluator_windowed = None
-    if stream.get_schema().is_classification():
-        evaluator_cumulative = ClassificationEvaluator(
-            schema=stream.get_schema(), window_size=window_size
-        )
-        if window_size is not None:
-            evaluator_windowed = ClassificationWindowedEvaluator(
-                schema=stream.get_schema(), window_size=window_size
-            )
-    else:
-        if not isinstance(learner, MOAPredictionIntervalLearner):
-            evaluator_cumulative = RegressionEvaluator(
-                schema=stream.get_schema(), window_size=window_size
-            )
-            if window_size is not None:
-                evaluator_windowed = RegressionWindowedEvaluator(
-                    schema=stream.get_schema(), window_size=window_size
-                )
-        else:
-            evaluator_cumulative = PredictionIntervalEvaluator(
-                schema=stream.get_schema(), window_size=window_size
-            )
-            if window_size is not None:
-                evaluator_windowed = PredictionIntervalWindowedEvaluator(
-                    schema=stream.get_schema(), window_size=window_size
-                )
+    evaluator_cumulative, evaluator_windowed = _setup_evaluators(
+        stream.get_schema(), learner, window_size
+    )
 
     progress_bar = _setup_progress_bar("Eval", progress_bar, stream, learner, max_instances)
     while stream.has_more_instances() and (
@@ -1062,6 +1378,199 @@ def prequential_evaluation(
 
     return results
 
+def _prequential_evaluation_batch(
+    stream: Stream,
+    learner,
+    predict: Callable[[InstanceBatch], np.ndarray],
+    evaluator_cumulative,
+    evaluator_windowed,
+    max_instances: Optional[int],
+    batch_size: int,
+    store_predictions: bool,
+    store_y: bool,
+    progress_bar: Optional[tqdm],
+) -> PrequentialResults:
+    """The mini-batch evaluation loop of :func:`prequential_evaluation` and
+    :func:`prequential_evaluation_anomaly`.
+
+    Each batch is predicted with ``predict(batch)``, the evaluators are updated
+    with the whole batch and the learner is then trained on it.
+    """
+    predictions = [] if store_predictions else None
+    ground_truth_y = [] if store_y else None
+    is_classification = stream.get_schema().is_classification()
+
+    start_wallclock_time, start_cpu_time = start_time_measuring()
+    instances_processed = 0
+    while max_instances is None or instances_processed < max_instances:
+        n = batch_size
+        if max_instances is not None:
+            n = min(n, max_instances - instances_processed)
+        batch = stream.next_batch(n)
+        if batch is None:
+            break
+
+        y_pred = np.asarray(predict(batch))
+        if not is_classification and np.isnan(y_pred).any():
+            # As RegressionEvaluator.update does for a missing prediction
+            warnings.warn("The learner did not produce a prediction for some instances")
+            y_pred = np.nan_to_num(y_pred, nan=0.0)
+        evaluator_cumulative.update_batch(batch.y, y_pred)
+        if evaluator_windowed is not None:
+            evaluator_windowed.update_batch(batch.y, y_pred)
+        learner.train_batch(batch)
+
+        if predictions is not None:
+            if is_classification and np.issubdtype(y_pred.dtype, np.integer):
+                predictions.extend(None if y < 0 else y for y in y_pred.tolist())
+            else:
+                predictions.extend(y_pred.tolist())
+        if ground_truth_y is not None:
+            ground_truth_y.extend(batch.y.tolist())
+
+        instances_processed += len(batch)
+        if progress_bar is not None:
+            progress_bar.update(len(batch))
+
+    if progress_bar is not None:
+        progress_bar.close()
+
+    elapsed_wallclock_time, elapsed_cpu_time = stop_time_measuring(
+        start_wallclock_time, start_cpu_time
+    )
+
+    if (
+        evaluator_windowed is not None
+        and evaluator_windowed.get_instances_seen() % evaluator_windowed.window_size != 0
+    ):
+        evaluator_windowed.result_windows.append(evaluator_windowed.metrics())
+
+    return PrequentialResults(
+        learner=str(learner),
+        stream=stream,
+        wallclock=elapsed_wallclock_time,
+        cpu_time=elapsed_cpu_time,
+        max_instances=max_instances,
+        cumulative_evaluator=evaluator_cumulative,
+        windowed_evaluator=evaluator_windowed,
+        ground_truth_y=ground_truth_y,
+        predictions=predictions,
+    )
+
+
+async def async_prequential_evaluation(
+    stream: AsyncStream,
+    learner: Union[Classifier, Regressor],
+    max_instances: Optional[int] = None,
+    window_size: int = 1000,
+    store_predictions: bool = False,
+    store_y: bool = False,
+    batch_size: int = 64,
+    batch_timeout: Optional[float] = None,
+) -> PrequentialResults:
+    """Run and evaluate a learner on an asynchronous stream using prequential
+    evaluation.
+
+    This is the ``asyncio`` counterpart of :func:`prequential_evaluation` for
+    live sources such as sockets or message queues. Instances are gathered in
+    micro-batches of up to ``batch_size`` instances, then each instance is
+    predicted, evaluated and trained on in order, so the results are the same as
+    those of :func:`prequential_evaluation` on the same instances. Control is
+    given back to the event loop between micro-batches, so that several
+    evaluations and producers can share one loop.
+
+    >>> import asyncio
+    >>> from capymoa.classifier import NaiveBayes
+    >>> from capymoa.evaluation import async_prequential_evaluation
+    >>> from capymoa.stream import QueueStream
+    >>> from capymoa.datasets import ElectricityTiny
+    >>> electricity = ElectricityTiny()
+    >>> async def main():
+    ...     stream = QueueStream(electricity.get_schema(), maxsize=100)
+    ...     async def produce():
+    ...         while electricity.has_more_instances():
+    ...             await stream.put_instance(electricity.next_instance())
+    ...         await stream.close()
+    ...     producer = asyncio.create_task(produce())
+    ...     learner = NaiveBayes(schema=stream.get_schema())
+    ...     results = await async_prequential_evaluation(stream, learner)
+    ...     await producer
+    ...     return results
+    >>> results = asyncio.run(main())
+    >>> results.cumulative.get_instances_seen()
+    2000
+
+    :param stream: The asynchronous stream to evaluate the learner on.
+    :param learner: The learner to evaluate.
+    :param max_instances: The number of instances to evaluate before exiting. If
+        None, the evaluation will continue until the stream ends.
+    :param window_size: The size of the window used for windowed evaluation,
+        defaults to 1000
+    :param store_predictions: Store the learner's prediction in a list, defaults
+        to False
+    :param store_y: Store the ground truth targets in a list, defaults to False
+    :param batch_size: The maximum number of instances in a micro-batch,
+        defaults to 64.
+    :param batch_timeout: The maximum time in seconds to wait to fill a
+        micro-batch once its first instance arrived. None waits until it is full
+        or the stream ends, defaults to None.
+    :return: An object containing the results of the evaluation windowed metrics,
+        cumulative metrics, ground truth targets, and predictions.
+    """
+    predictions = [] if store_predictions else None
+    ground_truth_y = [] if store_y else None
+    is_classification = stream.get_schema().is_classification()
+
+    start_wallclock_time, start_cpu_time = start_time_measuring()
+    evaluator_cumulative, evaluator_windowed = _setup_evaluators(
+        stream.get_schema(), learner, window_size
+    )
+
+    instances_processed = 0
+    while max_instances is None or instances_processed < max_instances:
+        n = batch_size
+        if max_instances is not None:
+            n = min(n, max_instances - instances_processed)
+        batch = await stream.next_batch(n, batch_timeout)
+        if batch is None:
+            break
+        for instance in batch:
+            prediction = learner.predict(instance)
+            y = instance.y_index if is_classification else instance.y_value
+            evaluator_cumulative.update(y, prediction)
+            if evaluator_windowed is not None:
+                evaluator_windowed.update(y, prediction)
+            learner.train(instance)
+
+            if predictions is not None:
+                predictions.append(prediction)
+            if ground_truth_y is not None:
+                ground_truth_y.append(y)
+        instances_processed += len(batch)
+        await asyncio.sleep(0)
+
+    elapsed_wallclock_time, elapsed_cpu_time = stop_time_measuring(
+        start_wallclock_time, start_cpu_time
+    )
+
+    if (
+        evaluator_windowed is not None
+        and evaluator_windowed.get_instances_seen() % window_size != 0
+    ):
+        evaluator_windowed.result_windows.append(evaluator_windowed.metrics())
+
+    return PrequentialResults(
+        learner=str(learner),
+        stream=stream,
+        wallclock=elapsed_wallclock_time,
+        cpu_time=elapsed_cpu_time,
+        max_instances=max_instances,
+        cumulative_evaluator=evaluator_cumulative,
+        windowed_evaluator=evaluator_windowed,
+        ground_truth_y=ground_truth_y,
+        predictions=predictions,
+    )
+
 
 def prequential_ssl_evaluation(
     stream: Stream,
@@ -1251,6 +1760,7 @@ def prequential_evaluation_anomaly(
     store_predictions=False,
     store_y=False,
     progress_bar: Union[bool, tqdm] = False,
+    batch_size: Optional[int] = None,
 ):
     """
     Calculates the metrics cumulatively (i.e. test-then-train) and in a window-fashion (i.e. windowed prequential
@@ -1258,8 +1768,32 @@ def prequential_evaluation_anomaly(
 
     :param progress_bar: Enable, disable, or override the progress bar. Currently
         incompatible with ``optimize=True``.
+    :param batch_size: Evaluate in mini-batches of this many instances, scored
+        with ``learner.score_batch`` and trained on with ``learner.train_batch``,
+        defaults to None. See :func:`prequential_evaluation`.
+    :raises ValueError: If ``batch_size`` is not a positive integer.
     """
+    if batch_size is not None and batch_size < 1:
+        raise ValueError("batch_size must be a positive integer")
     stream.restart()
+    if batch_size is not None:
+        evaluator_windowed = None
+        if window_size is not None:
+            evaluator_windowed = AnomalyDetectionWindowedEvaluator(
+                schema=stream.get_schema(), window_size=window_size
+            )
+        return _prequential_evaluation_batch(
+            stream,
+            learner,
+            learner.score_batch,
+            AnomalyDetectionEvaluator(schema=stream.get_schema(), window_size=window_size),
+            evaluator_windowed,
+            max_instances,
+            batch_size,
+            store_predictions,
+            store_y,
+            _setup_progress_bar("AD Eval", progress_bar, stream, learner, max_instances),
+        )
     if _is_fast_mode_compilable(stream, learner, optimise):
         return _prequential_evaluation_anomaly_fast(stream,
                                                     learner,
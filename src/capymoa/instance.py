@@ -1,9 +1,12 @@
 from typing import TYPE_CHECKING
 
 import numpy as np
+from jpype import JArray, JDouble, JInt
+from scipy import sparse
 from com.yahoo.labs.samoa.instances import DenseInstance
+from com.yahoo.labs.samoa.instances import SparseInstance as MOA_SparseInstance
 from moa.core import InstanceExample
-from typing import Optional, Union, Tuple
+from typing import Iterator, Optional, Sequence, Union, Tuple
 
 from capymoa.type_alias import FeatureVector, Label, LabelIndex, TargetValue
 
@@ -13,6 +16,41 @@ if TYPE_CHECKING:
     from capymoa.stream import Schema
 
 
+# The JVM boundary. MOA stores attribute values as Java ``double``, while the
+# features of a stream are of type ``Schema.dtype``. Values are copied out of
+# Java as float64, and features are converted to ``Schema.dtype`` only once the
+# target has been split off, so targets never lose precision. Going the other
+# way, ``_values_from_features`` and ``_java_sparse_instance`` convert features
+# back to float64 to build Java instances.
+
+
+def _java_values(moa_instance) -> np.ndarray:
+    """Copy all attribute values of a MOA instance, including the target,
+    into a NumPy array.
+
+    ``toDoubleArray`` returns a Java ``double[]`` that JPype exposes through the
+    buffer protocol, so the values cross from Java in a single bulk copy rather
+    than one call per attribute.
+    """
+    return np.array(moa_instance.toDoubleArray(), dtype=np.float64)
+
+
+def _values_from_features(
+    x: np.ndarray, y: Union[float, np.ndarray], class_index: int
+) -> np.ndarray:
+    """Insert the target into the features of one (1D) or several (2D)
+    instances to get all of their attribute values, as MOA stores them."""
+    return np.insert(np.asarray(x, dtype=np.float64), class_index, y, axis=-1)
+
+
+def _features_from_values(values: np.ndarray, class_index: int) -> np.ndarray:
+    """Drop the target from the attribute values of one (1D) or several (2D)
+    instances."""
+    if class_index == values.shape[-1] - 1:
+        return values[..., :-1]
+    return np.delete(values, class_index, axis=-1)
+
+
 class Instance:
     """An instance is a single data point in a stream. It contains a feature vector
     and a schema that describes the datastream it belongs to.
@@ -20,8 +58,13 @@ class Instance:
     In supervised learning, your more likely to encounter :class:`LabeledInstance`
     or :class:`RegressionInstance` which are subclasses of :class:`Instance` with
     a class label or target value respectively.
+
+    Instances use ``__slots__`` and do not have a ``__dict__``, which keeps them
+    small and cheap to allocate.
     """
 
+    __slots__ = ("_schema", "_java_instance", "_x")
+
     def __init__(
         self, schema: "Schema", instance: Union[InstanceExample, FeatureVector]
     ) -> None:
@@ -33,6 +76,8 @@ class Instance:
 
         :param schema: A schema that describes the datastream the instance belongs to.
         :param instance: A vector of features (float values) or a Java instance.
+            Features are converted to :attr:`capymoa.stream.Schema.dtype`,
+            without a copy when they already have that type.
         :raises ValueError: If the given instance type is of an unsupported type.
         """
         self._schema: "Schema" = schema
@@ -42,7 +87,7 @@ class Instance:
         if isinstance(instance, InstanceExample):
             self._java_instance = instance
         elif isinstance(instance, np.ndarray):
-            self._x = instance
+            self._x = instance.astype(schema.dtype, copy=False)
         else:
             raise ValueError(f"Given instance type unsupported: {type(instance)}")
 
@@ -94,21 +139,21 @@ class Instance:
         if self._x is not None:
             return self._x
         elif self._java_instance is not None:
-            moa_instance = self.java_instance.getData()
-            self._x = np.empty(moa_instance.numInputAttributes())
-            for i in range(0, moa_instance.numInputAttributes()):
-                self._x[i] = moa_instance.value(i)
+            self._x = _features_from_values(
+                _java_values(self.java_instance.getData()),
+                self.schema._class_index,
+            ).astype(self.schema.dtype, copy=False)
             return self._x
         else:
             raise ValueError("Instance has no feature vector")
 
-    def _set_y(self, instance: DenseInstance) -> DenseInstance:
-        """Helper function to set the class label of an instance created in Python.
-        It is overridden by :class:`LabeledInstance` and :class:`RegressionInstance`
-        to change only the behavior of the target attribute.
+    def _y_java_value(self) -> float:
+        """Helper function to get the value of the target attribute of an instance
+        created in Python. It is overridden by :class:`LabeledInstance` and
+        :class:`RegressionInstance` to change only the behavior of the target
+        attribute. A missing value in MOA is ``NaN``.
         """
-        instance.setMissing(instance.classIndex())
-        return instance
+        return np.nan
 
     @property
     def java_instance(self) -> InstanceExample:
@@ -119,13 +164,14 @@ class Instance:
         if self._java_instance is not None:
             return self._java_instance
         elif self._x is not None:
-            instance = DenseInstance(self.schema._moa_header.numAttributes())
             assert self.x.ndim == 1, "Feature vector must be 1D"
-            for i, value in enumerate(self.x):
-                instance.setValue(i, value)
-            instance.setDataset(self.schema._moa_header)
-            instance.setWeight(1.0)
-            self._java_instance = InstanceExample(self._set_y(instance))
+            moa_header = self.schema.get_moa_header()
+            values = _values_from_features(
+                self.x, self._y_java_value(), self.schema._class_index
+            )
+            instance = DenseInstance(1.0, JArray(JDouble)(values))
+            instance.setDataset(moa_header)
+            self._java_instance = InstanceExample(instance)
             return self._java_instance
 
     def __repr__(self):
@@ -160,6 +206,8 @@ class LabeledInstance(Instance):
     array([0.      , 0.056443, 0.439155, 0.003467, 0.422915, 0.414912])
     """
 
+    __slots__ = ("_y_index",)
+
     def __init__(
         self,
         schema: "Schema",
@@ -229,9 +277,14 @@ class LabeledInstance(Instance):
         else:
             raise ValueError(f"{self.__class__.__name__} must have a y_index.")
 
-    def _set_y(self, instance: DenseInstance) -> DenseInstance:
-        instance.setClassValue(self.y_index)
-        return instance
+    def _y_java_value(self) -> float:
+        return float(self.y_index)
+
+    def _rebind(self, x: np.ndarray, y_index: LabelIndex) -> None:
+        """Point this instance at another feature vector and class index."""
+        self._x = x
+        self._y_index = y_index
+        self._java_instance = None
 
     def __repr__(self):
         return (
@@ -264,6 +317,8 @@ class RegressionInstance(Instance):
 
     """
 
+    __slots__ = ("_y_value",)
+
     def __init__(
         self,
         schema: "Schema",
@@ -333,6 +388,357 @@ class RegressionInstance(Instance):
             + "\n)"
         )
 
-    def _set_y(self, instance: DenseInstance) -> DenseInstance:
-        instance.setClassValue(self._y_value)
-        return instance
+    def _y_java_value(self) -> float:
+        return float(self._y_value)
+
+    def _rebind(self, x: np.ndarray, y_value: TargetValue) -> None:
+        """Point this instance at another feature vector and target value."""
+        self._x = x
+        self._y_value = y_value
+        self._java_instance = None
+
+
+def _dense_from_sparse(
+    indices: np.ndarray, values: np.ndarray, num_features: int, dtype
+) -> np.ndarray:
+    x = np.zeros(num_features, dtype=dtype)
+    x[indices] = values
+    return x
+
+
+def _java_sparse_instance(
+    schema: "Schema", indices: np.ndarray, values: np.ndarray, y: float
+) -> InstanceExample:
+    """Build a MOA ``SparseInstance`` from the non-zero features of an instance
+    and its target, at a cost proportional to the number of non-zeros."""
+    class_index = schema._class_index
+    # Attribute indexes skip over the target attribute.
+    attribute_indices = indices + (indices >= class_index)
+    position = int(np.searchsorted(attribute_indices, class_index))
+    all_indices = np.insert(attribute_indices, position, class_index).astype(np.int32)
+    all_values = np.insert(np.asarray(values, dtype=np.float64), position, y)
+    instance = MOA_SparseInstance(
+        1.0,
+        JArray(JDouble)(all_values),
+        JArray(JInt)(all_indices),
+        schema.get_num_attributes() + 1,
+    )
+    instance.setDataset(schema.get_moa_header())
+    return InstanceExample(instance)
+
+
+class _SparseFeatures:
+    """Features stored as the sorted ``indices`` of the non-zero features and
+    their ``values``, shared by the sparse instance types."""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_sparse(cls, schema: "Schema", indices: np.ndarray, values: np.ndarray, y):
+        """Creates a new instance from the sorted indexes of its non-zero
+        features, their values and its class index or target value."""
+        return cls(schema, indices, values, y)
+
+    @classmethod
+    def from_array(cls, schema: "Schema", x: FeatureVector, y):
+        """Creates a new sparse instance from a dense feature vector."""
+        indices = np.flatnonzero(x)
+        return cls(schema, indices, np.asarray(x)[indices], y)
+
+    @property
+    def indices(self) -> np.ndarray:
+        """Returns the sorted indexes of the non-zero features."""
+        return self._indices
+
+    @property
+    def values(self) -> np.ndarray:
+        """Returns the values of the non-zero features."""
+        return self._values
+
+    @property
+    def x(self) -> FeatureVector:
+        """Returns the features as a dense vector, built on first access."""
+        if self._x is None:
+            self._x = _dense_from_sparse(
+                self._indices,
+                self._values,
+                self._schema.get_num_attributes(),
+                self._schema.dtype,
+            )
+        return self._x
+
+    @property
+    def x_csr(self) -> sparse.csr_matrix:
+        """Returns the features as a ``(1, n_features)`` CSR matrix sharing the
+        arrays of the instance."""
+        return sparse.csr_matrix(
+            (self._values, self._indices, [0, len(self._indices)]),
+            shape=(1, self._schema.get_num_attributes()),
+        )
+
+    @property
+    def java_instance(self) -> InstanceExample:
+        """Returns the instance as a MOA ``SparseInstance``."""
+        if self._java_instance is None:
+            self._java_instance = _java_sparse_instance(
+                self._schema, self._indices, self._values, self._y_java_value()
+            )
+        return self._java_instance
+
+    def _sparse_repr(self) -> str:
+        return f"sparse(nnz={len(self._indices)}, {self._schema.get_num_attributes()})"
+
+
+class SparseLabeledInstance(_SparseFeatures, LabeledInstance):
+    """A :class:`LabeledInstance` that stores only its non-zero features.
+
+    The features are kept as sorted :attr:`indices` and their :attr:`values`,
+    and the MOA representation is a ``SparseInstance``, so memory and
+    conversion costs scale with the number of non-zeros rather than the number
+    of features. :attr:`x` is only built, and then cached, when it is read.
+
+    >>> from capymoa.stream import Schema
+    >>> from capymoa.instance import SparseLabeledInstance
+    >>> import numpy as np
+    >>> schema = Schema.from_custom(
+    ...     [f"w{i}" for i in range(5)], values_for_class_label=["ham", "spam"]
+    ... )
+    >>> instance = SparseLabeledInstance.from_sparse(
+    ...     schema, np.array([1, 3]), np.array([2.0, 1.0]), 1
+    ... )
+    >>> instance
+    SparseLabeledInstance(
+        Schema(No_Name),
+        x=sparse(nnz=2, 5),
+        y_index=1,
+        y_label='spam'
+    )
+    >>> data = instance.java_instance.getData()
+    >>> int(data.numValues()), float(data.value(1)), float(data.classValue())
+    (3, 2.0, 1.0)
+    >>> instance.x
+    array([0., 2., 0., 1., 0.])
+    """
+
+    __slots__ = ("_indices", "_values")
+
+    def __init__(
+        self,
+        schema: "Schema",
+        indices: np.ndarray,
+        values: np.ndarray,
+        y_index: LabelIndex,
+    ) -> None:
+        self._schema = schema
+        self._java_instance = None
+        self._x = None
+        self._indices = indices
+        self._values = values
+        self._y_index = y_index
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}("
+            + f"\n    Schema({self.schema.dataset_name}),"
+            + f"\n    x={self._sparse_repr()},"
+            + f"\n    y_index={self.y_index},"
+            + f"\n    y_label='{self.y_label}'"
+            + "\n)"
+        )
+
+
+class SparseRegressionInstance(_SparseFeatures, RegressionInstance):
+    """A :class:`RegressionInstance` that stores only its non-zero features,
+    like :class:`SparseLabeledInstance`."""
+
+    __slots__ = ("_indices", "_values")
+
+    def __init__(
+        self,
+        schema: "Schema",
+        indices: np.ndarray,
+        values: np.ndarray,
+        y_value: TargetValue,
+    ) -> None:
+        self._schema = schema
+        self._java_instance = None
+        self._x = None
+        self._indices = indices
+        self._values = values
+        self._y_value = y_value
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}("
+            + f"\n    Schema({self.schema.dataset_name}),"
+            + f"\n    x={self._sparse_repr()},"
+            + f"\n    y_value={self.y_value}"
+            + "\n)"
+        )
+
+
+class InstanceBatch:
+    """A batch of consecutive instances stored as contiguous arrays.
+
+    Batches are returned by :meth:`capymoa.stream.Stream.next_batch`. Learners
+    that work on arrays can use :attr:`x` and :attr:`y` directly, while
+    indexing or iterating over a batch gives :class:`LabeledInstance` or
+    :class:`RegressionInstance` views into the same arrays.
+
+    >>> from capymoa.stream import stream_from_file
+    >>> stream = stream_from_file("data/electricity_tiny.csv", dataset_name="Electricity")
+    >>> batch = stream.next_batch(4)
+    >>> batch
+    InstanceBatch(
+        Schema(Electricity),
+        x=ndarray(4, 6),
+        y=ndarray(4,)
+    )
+    >>> batch.y
+    array([1, 1, 1, 1])
+    >>> batch[0].y_label
+    '1'
+    """
+
+    __slots__ = ("_schema", "_x", "_y")
+
+    def __init__(self, schema: "Schema", x: np.ndarray, y: np.ndarray) -> None:
+        """Creates a new batch of instances.
+
+        :param schema: A schema that describes the datastream the batch belongs to.
+        :param x: A 2D array of shape (n_instances, n_features) with the features,
+            or a ``scipy.sparse.csr_matrix`` for sparse features. It is
+            converted to :attr:`capymoa.stream.Schema.dtype`, without a copy
+            when it already has that type.
+        :param y: A 1D array of shape (n_instances,) with the class indexes for
+            classification or the target values for regression.
+        :raises ValueError: If the shapes of ``x`` and ``y`` do not match.
+        """
+        if x.ndim != 2 or y.ndim != 1 or x.shape[0] != len(y):
+            raise ValueError(
+                f"Expected x of shape (n, d) and y of shape (n,), "
+                f"got {x.shape} and {y.shape}"
+            )
+        self._schema = schema
+        self._x = x.astype(schema.dtype, copy=False)
+        self._y = y
+
+    @classmethod
+    def from_instances(
+        cls, schema: "Schema", instances: Sequence[Instance]
+    ) -> "InstanceBatch":
+        """Stack a sequence of labeled or regression instances into a batch.
+
+        :param schema: A schema that describes the datastream the batch belongs to.
+        :param instances: A non-empty sequence of instances from that datastream.
+        :return: A new :class:`InstanceBatch` object.
+        """
+        x = np.empty((len(instances), schema.get_num_attributes()), dtype=schema.dtype)
+        for i, instance in enumerate(instances):
+            x[i] = instance.x
+        if schema.is_classification():
+            y = np.fromiter(
+                (instance.y_index for instance in instances), np.int_, len(instances)
+            )
+        else:
+            y = np.fromiter(
+                (instance.y_value for instance in instances),
+                np.float64,
+                len(instances),
+            )
+        return cls(schema, x, y)
+
+    @property
+    def schema(self) -> "Schema":
+        """Returns the schema of the datastream the batch belongs to."""
+        return self._schema
+
+    @property
+    def x(self) -> np.ndarray:
+        """Returns the features as a 2D array of shape (n_instances, n_features),
+        or as a CSR matrix for a sparse batch."""
+        return self._x
+
+    @property
+    def is_sparse(self) -> bool:
+        """Whether the features are stored in a ``scipy.sparse.csr_matrix``."""
+        return sparse.issparse(self._x)
+
+    @property
+    def y(self) -> np.ndarray:
+        """Returns the class indexes (classification) or target values
+        (regression) as a 1D array of shape (n_instances,).
+        """
+        return self._y
+
+    def __len__(self) -> int:
+        return len(self._y)
+
+    def __getitem__(self, index: int) -> Union[LabeledInstance, RegressionInstance]:
+        """Returns a view of the instance at ``index``."""
+        if self.is_sparse:
+            if index < 0:
+                index += len(self)
+            start, stop = self._x.indptr[index], self._x.indptr[index + 1]
+            cls = (
+                SparseLabeledInstance
+                if self._schema.is_classification()
+                else SparseRegressionInstance
+            )
+            y = self._y[index]
+            return cls(
+                self._schema,
+                self._x.indices[start:stop],
+                self._x.data[start:stop],
+                int(y) if self._schema.is_classification() else float(y),
+            )
+        if self._schema.is_classification():
+            return LabeledInstance.from_array(
+                self._schema, self._x[index], int(self._y[index])
+            )
+        return RegressionInstance.from_array(
+            self._schema, self._x[index], float(self._y[index])
+        )
+
+    def __iter__(self) -> Iterator[Union[LabeledInstance, RegressionInstance]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def iter_reused(self) -> Iterator[Union[LabeledInstance, RegressionInstance]]:
+        """Iterate over the instances of the batch with a single flyweight
+        instance object that is pointed at each row in turn.
+
+        No Python object is created per row, but each instance is only valid
+        until the iterator advances. Keep :attr:`x` and the target, not the
+        instance itself, to hold on to a row.
+
+        >>> from capymoa.stream import stream_from_file
+        >>> batch = stream_from_file("data/electricity_tiny.csv").next_batch(3)
+        >>> [instance.x[1] for instance in batch.iter_reused()]
+        [0.056443, 0.051699, 0.051489]
+        >>> len({id(instance) for instance in batch.iter_reused()})
+        1
+        """
+        if len(self) == 0:
+            return
+        if self.is_sparse:
+            yield from self
+            return
+        instance = self[0]
+        if self._schema.is_classification():
+            y = self._y.tolist()
+        else:
+            y = self._y.astype(np.float64, copy=False).tolist()
+        x = self._x
+        for i in range(len(self)):
+            instance._rebind(x[i], y[i])
+            yield instance
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}("
+            + f"\n    Schema({self.schema.dataset_name}),"
+            + f"\n    x={self.x.__class__.__name__}{tuple(self.x.shape)},"
+            + f"\n    y={self.y.__class__.__name__}{self.y.shape}"
+            + "\n)"
+        )
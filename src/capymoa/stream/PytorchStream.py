@@ -1,14 +1,21 @@
 import copy
+from typing import Optional
 
+import numpy as np
 import torch
 
 from capymoa.stream import Stream, Schema
-from capymoa.stream._stream import _init_moa_stream_and_create_moa_header
+from capymoa.stream._stream import (
+    _batch_targets,
+    _init_moa_stream_and_create_moa_header,
+    _next_batch_from_blocks,
+)
 from capymoa.instance import (
+    InstanceBatch,
     LabeledInstance,
     RegressionInstance,
 )
-from torch.utils.data import Dataset
+from torch.utils.data import DataLoader, Dataset
 
 
 class PytorchStream(Stream):
@@ -49,18 +56,51 @@ class PytorchStream(Stream):
     """
 
     # https://pytorch.org/tutorials/beginner/basics/data_tutorial.html
-    def __init__(self, dataset: Dataset, target_type='categorical'):
+    def __init__(
+        self,
+        dataset: Dataset,
+        target_type='categorical',
+        batch_size: Optional[int] = None,
+        num_workers: int = 0,
+        pin_memory: bool = False,
+        dtype=None,
+    ):
         """Construct PytorchStream from a PyTorch dataset.
 
+        By default, items are read from the dataset one at a time. When
+        ``batch_size`` is given, the dataset is read in order through a
+        :class:`~torch.utils.data.DataLoader`, so the transforms of the dataset
+        run in ``num_workers`` background processes, and each batch of tensors is
+        shared with NumPy without copying.
+
         :param dataset: PyTorch containing tuples of `x` and `y`
-        :param enforce_regression: Force the task to be a regression task, default is False
+        :param target_type: 'categorical' or 'numeric' target, defaults to 'categorical'
+        :param batch_size: Read the dataset in batches of this size with a
+            ``DataLoader``, defaults to None to index items one at a time.
+        :param num_workers: The number of ``DataLoader`` worker processes, defaults to 0.
+        :param pin_memory: Let the ``DataLoader`` copy batches into pinned memory,
+            defaults to False.
+        :param dtype: The floating point type of the features, see
+            :attr:`capymoa.stream.Schema.dtype`.
         """
         self.__init_args_kwargs__ = copy.copy(locals())  # save init args for recreation. not a deep copy to avoid unnecessary use of memory
 
+        if batch_size is None and num_workers > 0:
+            raise ValueError("num_workers requires a batch_size")
+        if batch_size is not None and batch_size < 1:
+            raise ValueError("batch_size must be a positive integer")
+
         self.training_data = dataset
-        # self.train_dataloader = DataLoader(self.training_data, batch_size=1, shuffle=False)
+        self.batch_size = batch_size
+        self.num_workers = num_workers
+        self.pin_memory = pin_memory
         self.current_instance_index = 0
 
+        self._batches = None
+        self._x_block: Optional[np.ndarray] = None
+        self._y_block: Optional[np.ndarray] = None
+        self._block_index = 0
+
         X, _ = self.training_data[0]
         X_numpy = torch.flatten(X).view(1, -1).detach().numpy()
 
@@ -78,24 +118,62 @@ class PytorchStream(Stream):
             )
         )
 
-        self.schema = Schema(moa_header=self.moa_header)
+        self.schema = Schema(moa_header=self.moa_header, dtype=dtype)
         super().__init__(schema=self.schema, CLI=None, moa_stream=None)
 
+    def __len__(self) -> int:
+        return len(self.training_data)
+
+    def _next_block(self) -> bool:
+        """Load the next batch of the ``DataLoader`` as NumPy views."""
+        if self._batches is None:
+            self._batches = iter(
+                DataLoader(
+                    self.training_data,
+                    batch_size=self.batch_size,
+                    shuffle=False,
+                    num_workers=self.num_workers,
+                    pin_memory=self.pin_memory,
+                )
+            )
+        try:
+            X, y = next(self._batches)
+        except StopIteration:
+            self._x_block, self._y_block = None, None
+            return False
+
+        # CPU tensors, pinned or not, share their memory with NumPy, so
+        # batches are only copied when their type differs from the schema.
+        self._x_block = X.reshape(len(X), -1).numpy().astype(
+            self.schema.dtype, copy=False
+        )
+        self._y_block = _batch_targets(self.schema, torch.as_tensor(y).numpy())
+        self._block_index = 0
+        return True
+
     def has_more_instances(self):
-        return len(self.training_data) > self.current_instance_index
+        if self.batch_size is None:
+            return len(self.training_data) > self.current_instance_index
+        if self._x_block is not None and self._block_index < len(self._x_block):
+            return True
+        return self._next_block()
 
     def next_instance(self):
         if not self.has_more_instances():
             return None
 
-        X, y = self.training_data[self.current_instance_index]
+        if self.batch_size is not None:
+            X = self._x_block[self._block_index]
+            y = self._y_block[self._block_index].item()
+            self._block_index += 1
+        else:
+            X, y = self.training_data[self.current_instance_index]
+            # Tensors on the CPU and NumPy arrays share their underlying memory locations
+            # We should prefer numpy over tensors in instances to improve compatibility
+            # See: https://pytorch.org/tutorials/beginner/blitz/tensor_tutorial.html#bridge-to-np-label
+            X = X.view(-1).numpy()
         self.current_instance_index += 1  # increment counter for next call
 
-        # Tensors on the CPU and NumPy arrays share their underlying memory locations
-        # We should prefer numpy over tensors in instances to improve compatibility
-        # See: https://pytorch.org/tutorials/beginner/blitz/tensor_tutorial.html#bridge-to-np-label
-        X = X.view(-1).numpy()
-
         if self.schema.is_classification():
             return LabeledInstance.from_array(self.schema, X, y)
         elif self.schema.is_regression():
@@ -109,8 +187,35 @@ class PytorchStream(Stream):
     def get_schema(self):
         return self.schema
 
+    def next_batch(self, n: int) -> Optional[InstanceBatch]:
+        if self.batch_size is not None:
+            batch = _next_batch_from_blocks(self, n)
+            if batch is not None:
+                self.current_instance_index += len(batch)
+            return batch
+
+        if n < 1:
+            raise ValueError("n must be a positive integer")
+        if not self.has_more_instances():
+            return None
+
+        stop = min(self.current_instance_index + n, len(self.training_data))
+        xs, ys = [], []
+        for index in range(self.current_instance_index, stop):
+            X, y = self.training_data[index]
+            xs.append(torch.flatten(X))
+            ys.append(y)
+        self.current_instance_index = stop
+
+        X = torch.stack(xs).numpy().astype(self.schema.dtype, copy=False)
+        y = np.asarray(ys, dtype=np.int_ if self.schema.is_classification() else np.float64)
+        return InstanceBatch(self.schema, X, y)
+
     def get_moa_stream(self):
         raise ValueError("Not a moa_stream, a numpy read file")
 
     def restart(self):
         self.current_instance_index = 0
+        self._batches = None
+        self._x_block, self._y_block = None, None
+        self._block_index = 0
@@ -1,4 +1,11 @@
 from ._stream import Stream, Schema, ARFFStream, stream_from_file, CSVStream, NumpyStream
+from ._arrow_stream import ParquetStream, ArrowStream
+from ._memmap_stream import MemmapStream, to_binary
+from ._prefetch_stream import PrefetchStream
+from ._sharded_stream import ShardedStream
+from ._cached_stream import CachedStream
+from ._sparse_stream import SparseNumpyStream
+from ._async_stream import AsyncStream, QueueStream, SocketStream
 from .PytorchStream import PytorchStream
 from . import drift, generator, preprocessing
 
@@ -12,5 +19,16 @@ __all__ = [
     "drift",
     "generator",
     "preprocessing",
-    "NumpyStream"
+    "NumpyStream",
+    "ParquetStream",
+    "ArrowStream",
+    "MemmapStream",
+    "to_binary",
+    "PrefetchStream",
+    "ShardedStream",
+    "AsyncStream",
+    "QueueStream",
+    "SocketStream",
+    "CachedStream",
+    "SparseNumpyStream",
 ]
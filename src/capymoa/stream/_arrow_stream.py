@@ -0,0 +1,412 @@
+"""Datastreams over columnar Apache Arrow data (Parquet and Arrow IPC files)."""
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Sequence, Union
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from capymoa.instance import InstanceBatch, LabeledInstance, RegressionInstance
+from capymoa.stream._stream import (
+    Schema,
+    Stream,
+    _init_moa_stream_and_create_moa_header,
+    _next_batch_from_blocks,
+    _target_is_categorical,
+)
+
+
+def _is_nominal(data_type: pa.DataType) -> bool:
+    return (
+        pa.types.is_dictionary(data_type)
+        or pa.types.is_string(data_type)
+        or pa.types.is_large_string(data_type)
+    )
+
+
+def _nominal_value_set(column: pa.ChunkedArray) -> pa.Array:
+    """Return the possible values of a nominal column.
+
+    The dictionary of a dictionary-encoded column is used as is, so the order of
+    the categories is preserved. Plain string columns use their unique values.
+    """
+    if pa.types.is_dictionary(column.type):
+        column = column.unify_dictionaries()
+        if column.num_chunks > 0:
+            return column.chunk(0).dictionary
+        return pa.array([], type=column.type.value_type)
+    return pc.unique(column).drop_null()
+
+
+def _nominal_codes(array: pa.Array, value_set: pa.Array) -> np.ndarray:
+    """Translate nominal values into their index in ``value_set``.
+
+    Nulls and values missing from ``value_set`` become NaN (missing in MOA).
+    """
+    if isinstance(array, pa.DictionaryArray):
+        # Dictionaries can differ between record batches, so the dictionary of
+        # this batch is remapped onto the value set before gathering.
+        codes = pc.index_in(array.dictionary, value_set=value_set)
+        codes = codes.to_numpy(zero_copy_only=False).astype(np.float64)
+        values = codes[array.indices.fill_null(0).to_numpy(zero_copy_only=False)]
+    else:
+        values = pc.index_in(array, value_set=value_set)
+        values = values.to_numpy(zero_copy_only=False).astype(np.float64)
+    if array.null_count > 0:
+        values[array.is_null().to_numpy(zero_copy_only=False)] = np.nan
+    return values
+
+
+def _numeric_values(array: pa.Array) -> np.ndarray:
+    # Nulls are converted to NaN by pyarrow which MOA treats as missing.
+    return array.to_numpy(zero_copy_only=False).astype(np.float64, copy=False)
+
+
+class _ArrowStream(ABC, Stream):
+    """Shared logic for streams reading record batches from Arrow sources.
+
+    Record batches are converted one at a time into a row-major NumPy block, and
+    the instances handed out are views into that block. Subclasses implement
+    :meth:`_read_column` and :meth:`_record_batches` for their source.
+    """
+
+    def __init__(
+        self,
+        arrow_schema: pa.Schema,
+        num_rows: int,
+        target: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+        target_type: Optional[str] = None,
+        values_for_class_label: Optional[Sequence[str]] = None,
+        dataset_name: str = "No_Name",
+        max_instances: Optional[int] = None,
+        dtype=None,
+    ):
+        if max_instances is not None and max_instances < 0:
+            raise ValueError("max_instances must be a non-negative integer")
+
+        target = arrow_schema.names[-1] if target is None else target
+        if target not in arrow_schema.names:
+            raise ValueError(f"Target column {target!r} not found")
+        if columns is None:
+            columns = [name for name in arrow_schema.names if name != target]
+        columns = [name for name in columns if name != target]
+        for name in columns:
+            if name not in arrow_schema.names:
+                raise ValueError(f"Column {name!r} not found")
+
+        self.target = target
+        self.columns = list(columns)
+        self.max_instances = max_instances
+        self._num_rows = num_rows
+
+        # Nominal features are described by the values of their dictionary.
+        self._nominal_value_sets: Dict[str, pa.Array] = {}
+        for name in self.columns:
+            if _is_nominal(arrow_schema.field(name).type):
+                self._nominal_value_sets[name] = _nominal_value_set(
+                    self._read_column(name)
+                )
+
+        target_field_type = arrow_schema.field(target).type
+        self._label_value_set: Optional[pa.Array] = None
+        if values_for_class_label is not None and target_type != "numeric":
+            values = pa.array(values_for_class_label)
+            if not _is_nominal(target_field_type):
+                values = values.cast(target_field_type)
+            self._label_value_set = values
+        elif _is_nominal(target_field_type) or pa.types.is_boolean(target_field_type):
+            if target_type == "numeric":
+                raise ValueError(f"Target column {target!r} cannot be numeric")
+            target_column = self._read_column(target)
+            if _is_nominal(target_field_type):
+                self._label_value_set = _nominal_value_set(target_column)
+            else:
+                self._label_value_set = pa.array([False, True])
+        elif target_type != "numeric":
+            # Only the target column is read to decide between classification
+            # and regression.
+            targets = self._read_column(target).to_numpy()
+            if _target_is_categorical(targets, target_type):
+                self._label_value_set = pa.array(
+                    np.unique(targets), type=target_field_type
+                )
+
+        _, moa_header = _init_moa_stream_and_create_moa_header(
+            number_of_instances=1,
+            feature_names=self.columns,
+            values_for_nominal_features={
+                name: [str(value) for value in value_set.to_pylist()]
+                for name, value_set in self._nominal_value_sets.items()
+            },
+            values_for_class_label=(
+                None
+                if self._label_value_set is None
+                else [str(value) for value in self._label_value_set.to_pylist()]
+            ),
+            dataset_name=dataset_name,
+            target_attribute_name=target,
+            target_type="numeric" if self._label_value_set is None else "categorical",
+        )
+        super().__init__(schema=Schema(moa_header=moa_header, dtype=dtype))
+        self.restart()
+
+    @abstractmethod
+    def _read_column(self, name: str) -> pa.ChunkedArray:
+        """Read a single column of the whole source."""
+
+    @abstractmethod
+    def _record_batches(self) -> Iterator[pa.RecordBatch]:
+        """Iterate lazily over the record batches holding the first
+        ``len(self)`` rows of the projected columns."""
+
+    def _next_block(self) -> bool:
+        """Convert the next record batch into the current block of rows."""
+        remaining = len(self) - self._rows_read
+        for batch in self._batches:
+            if remaining <= 0:
+                break
+            if batch.num_rows == 0:
+                continue
+            batch = batch.slice(0, remaining)
+
+            x_block = np.empty(
+                (batch.num_rows, len(self.columns)), dtype=self.schema.dtype
+            )
+            for j, name in enumerate(self.columns):
+                column = batch.column(name)
+                if name in self._nominal_value_sets:
+                    x_block[:, j] = _nominal_codes(column, self._nominal_value_sets[name])
+                else:
+                    x_block[:, j] = _numeric_values(column)
+
+            column = batch.column(self.target)
+            if self._label_value_set is not None:
+                codes = _nominal_codes(column, self._label_value_set)
+                unknown = np.flatnonzero(np.isnan(codes))
+                if len(unknown) > 0:
+                    label = column[int(unknown[0])].as_py()
+                    raise ValueError(
+                        f"Class label {label!r} of row {self._rows_read + unknown[0]} "
+                        f"is not one of the values of the target {self.target!r}"
+                    )
+                self._y_block = codes.astype(np.int_)
+            else:
+                self._y_block = _numeric_values(column)
+
+            self._x_block = x_block
+            self._block_index = 0
+            self._rows_read += batch.num_rows
+            return True
+        return False
+
+    def __len__(self) -> int:
+        if self.max_instances is None:
+            return self._num_rows
+        return min(self._num_rows, self.max_instances)
+
+    def has_more_instances(self) -> bool:
+        if self._x_block is not None and self._block_index < len(self._x_block):
+            return True
+        return self._next_block()
+
+    def next_instance(self) -> Union[LabeledInstance, RegressionInstance]:
+        if not self.has_more_instances():
+            return None
+
+        x = self._x_block[self._block_index]
+        y = self._y_block[self._block_index]
+        self._block_index += 1
+
+        if self.schema.is_classification():
+            return LabeledInstance.from_array(self.schema, x, int(y))
+        elif self.schema.is_regression():
+            return RegressionInstance.from_array(self.schema, x, y)
+        else:
+            raise ValueError(
+                "Unknown machine learning task must be a regression or "
+                "classification task"
+            )
+
+    def next_batch(self, n: int) -> Optional[InstanceBatch]:
+        return _next_batch_from_blocks(self, n)
+
+    def get_moa_stream(self):
+        raise ValueError("Not a moa_stream, an Arrow backed stream")
+
+    def restart(self):
+        self._batches = self._record_batches()
+        self._x_block: Optional[np.ndarray] = None
+        self._y_block: Optional[np.ndarray] = None
+        self._block_index = 0
+        self._rows_read = 0
+
+
+class ParquetStream(_ArrowStream):
+    """A datastream originating from a Parquet file.
+
+    Record batches are read lazily, only the projected ``columns`` are
+    decoded and row groups beyond ``max_instances`` are never read.
+
+    >>> import pandas as pd
+    >>> from tempfile import mkdtemp
+    >>> from capymoa.stream import ParquetStream
+    >>> path = f"{mkdtemp()}/electricity_tiny.parquet"
+    >>> pd.read_csv("data/electricity_tiny.csv").to_parquet(path)
+    >>> stream = ParquetStream(path, target_type="categorical")
+    >>> stream.next_instance()
+    LabeledInstance(
+        Schema(electricity_tiny),
+        x=ndarray(..., 6),
+        y_index=1,
+        y_label='1'
+    )
+    >>> len(stream)
+    2000
+
+    Columns with a string or dictionary type become nominal attributes
+    whose values are taken from the dictionary of the column.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        target: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+        target_type: Optional[str] = None,
+        values_for_class_label: Optional[Sequence[str]] = None,
+        dataset_name: Optional[str] = None,
+        max_instances: Optional[int] = None,
+        batch_size: int = 1024,
+        dtype=None,
+    ):
+        """Construct a ParquetStream from a file path.
+
+        :param path: A path to a Parquet file.
+        :param target: The name of the target column, defaults to the last column.
+        :param columns: The feature columns to read, defaults to all columns
+            except the target.
+        :param target_type: 'categorical' or 'numeric' target, None to detect automatically.
+        :param values_for_class_label: Possible values for the class label. If None,
+            they are taken from the target column. Reading a row whose class
+            label is missing or not one of them raises a ValueError.
+        :param dataset_name: The name of the stream, defaults to the file name.
+        :param max_instances: Stop after this many instances, defaults to None.
+        :param batch_size: The maximum number of rows decoded at once, defaults to 1024.
+        :param dtype: The floating point type of the features, see
+            :attr:`capymoa.stream.Schema.dtype`.
+        """
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self._parquet_file = pq.ParquetFile(self.path)
+        super().__init__(
+            arrow_schema=self._parquet_file.schema_arrow,
+            num_rows=self._parquet_file.metadata.num_rows,
+            target=target,
+            columns=columns,
+            target_type=target_type,
+            values_for_class_label=values_for_class_label,
+            dataset_name=self.path.stem if dataset_name is None else dataset_name,
+            max_instances=max_instances,
+            dtype=dtype,
+        )
+
+    def _read_column(self, name: str) -> pa.ChunkedArray:
+        return self._parquet_file.read(columns=[name]).column(name)
+
+    def _record_batches(self) -> Iterator[pa.RecordBatch]:
+        # Skip every row group that lies beyond the instances we need.
+        metadata = self._parquet_file.metadata
+        row_groups, rows = [], 0
+        for i in range(metadata.num_row_groups):
+            if rows >= len(self):
+                break
+            row_groups.append(i)
+            rows += metadata.row_group(i).num_rows
+        if len(row_groups) == 0:
+            return iter(())
+        return self._parquet_file.iter_batches(
+            batch_size=self.batch_size,
+            row_groups=row_groups,
+            columns=self.columns + [self.target],
+        )
+
+
+class ArrowStream(_ArrowStream):
+    """A datastream originating from an Arrow IPC file (also known as Feather V2).
+
+    The file is memory mapped, so record batches are only paged in as they are
+    consumed.
+
+    >>> import pandas as pd
+    >>> from tempfile import mkdtemp
+    >>> from capymoa.stream import ArrowStream
+    >>> path = f"{mkdtemp()}/electricity_tiny.arrow"
+    >>> pd.read_csv("data/electricity_tiny.csv").to_feather(path)
+    >>> stream = ArrowStream(path, target_type="categorical")
+    >>> stream.next_instance()
+    LabeledInstance(
+        Schema(electricity_tiny),
+        x=ndarray(..., 6),
+        y_index=1,
+        y_label='1'
+    )
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        target: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+        target_type: Optional[str] = None,
+        values_for_class_label: Optional[Sequence[str]] = None,
+        dataset_name: Optional[str] = None,
+        max_instances: Optional[int] = None,
+        dtype=None,
+    ):
+        """Construct an ArrowStream from a file path.
+
+        :param path: A path to an Arrow IPC file.
+        :param target: The name of the target column, defaults to the last column.
+        :param columns: The feature columns to read, defaults to all columns
+            except the target.
+        :param target_type: 'categorical' or 'numeric' target, None to detect automatically.
+        :param values_for_class_label: Possible values for the class label. If None,
+            they are taken from the target column. Reading a row whose class
+            label is missing or not one of them raises a ValueError.
+        :param dataset_name: The name of the stream, defaults to the file name.
+        :param max_instances: Stop after this many instances, defaults to None.
+        :param dtype: The floating point type of the features, see
+            :attr:`capymoa.stream.Schema.dtype`.
+        """
+        self.path = Path(path)
+        self._reader = pa.ipc.open_file(pa.memory_map(str(self.path), "r"))
+        num_rows = sum(
+            self._reader.get_batch(i).num_rows
+            for i in range(self._reader.num_record_batches)
+        )
+        super().__init__(
+            arrow_schema=self._reader.schema,
+            num_rows=num_rows,
+            target=target,
+            columns=columns,
+            target_type=target_type,
+            values_for_class_label=values_for_class_label,
+            dataset_name=self.path.stem if dataset_name is None else dataset_name,
+            max_instances=max_instances,
+            dtype=dtype,
+        )
+
+    def _read_column(self, name: str) -> pa.ChunkedArray:
+        # Reading from a memory map is zero-copy, only the column is touched.
+        return self._reader.read_all().column(name)
+
+    def _record_batches(self) -> Iterator[pa.RecordBatch]:
+        columns = self.columns + [self.target]
+        return (
+            self._reader.get_batch(i).select(columns)
+            for i in range(self._reader.num_record_batches)
+        )
@@ -0,0 +1,247 @@
+"""Datastreams whose instances arrive asynchronously, e.g. from a live feed."""
+
+import asyncio
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Optional, Sequence, Union
+
+import numpy as np
+
+from capymoa.instance import InstanceBatch, LabeledInstance, RegressionInstance
+from capymoa.stream._stream import Schema
+
+_END = object()  # marks the end of a QueueStream
+
+
+class AsyncStream(ABC):
+    """A datastream that is consumed with ``async for``.
+
+    Unlike :class:`capymoa.stream.Stream`, waiting for the next instance does
+    not block the event loop, so a single loop can serve several sources and
+    learners while they wait for data.
+
+    >>> import asyncio
+    >>> import numpy as np
+    >>> from capymoa.stream import QueueStream, Schema
+    >>> schema = Schema.from_custom(["f1", "f2"], values_for_class_label=["no", "yes"])
+    >>> async def main():
+    ...     stream = QueueStream(schema)
+    ...     await stream.put(np.array([0.1, 0.2]), 1)
+    ...     await stream.close()
+    ...     return [instance.y_label async for instance in stream]
+    >>> asyncio.run(main())
+    ['yes']
+    """
+
+    def __init__(self, schema: Schema):
+        """:param schema: The schema of the instances of the stream."""
+        self.schema = schema
+
+    def get_schema(self) -> Schema:
+        """Return the schema of the stream."""
+        return self.schema
+
+    def _instance(
+        self, x: np.ndarray, y: Union[int, float]
+    ) -> Union[LabeledInstance, RegressionInstance]:
+        if self.schema.is_classification():
+            return LabeledInstance.from_array(self.schema, x, int(y))
+        return RegressionInstance.from_array(self.schema, x, float(y))
+
+    @abstractmethod
+    async def next_instance(
+        self,
+    ) -> Optional[Union[LabeledInstance, RegressionInstance]]:
+        """Wait for the next instance.
+
+        :return: The next instance, or None once the stream has ended.
+        """
+
+    async def next_batch(
+        self, n: int, timeout: Optional[float] = None
+    ) -> Optional[InstanceBatch]:
+        """Wait for a micro-batch of up to ``n`` instances.
+
+        The batch is returned as soon as it is full, the stream ends or
+        ``timeout`` seconds have passed since its first instance arrived.
+
+        :param n: The maximum number of instances in the batch.
+        :param timeout: The maximum time to wait to fill the batch, None to wait
+            until the batch is full or the stream ends.
+        :raises ValueError: If ``n`` is not a positive integer.
+        :return: A batch of instances or None once the stream has ended.
+        """
+        if n < 1:
+            raise ValueError("n must be a positive integer")
+        first = await self.next_instance()
+        if first is None:
+            return None
+
+        instances = [first]
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while len(instances) < n:
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                break
+            try:
+                instance = await asyncio.wait_for(self.next_instance(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if instance is None:
+                break
+            instances.append(instance)
+        return InstanceBatch.from_instances(self.schema, instances)
+
+    async def iter_batches(
+        self, n: int, timeout: Optional[float] = None
+    ) -> AsyncIterator[InstanceBatch]:
+        """Iterate over micro-batches until the stream ends.
+
+        :param n: The maximum number of instances in each batch.
+        :param timeout: See :meth:`next_batch`.
+        """
+        while True:
+            batch = await self.next_batch(n, timeout)
+            if batch is None:
+                return
+            yield batch
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Union[LabeledInstance, RegressionInstance]:
+        instance = await self.next_instance()
+        if instance is None:
+            raise StopAsyncIteration
+        return instance
+
+    def __str__(self):
+        return str(self.schema.dataset_name).replace(" ", "")
+
+
+class QueueStream(AsyncStream):
+    """An asynchronous stream fed from within the same process.
+
+    Producers :meth:`put` instances into a bounded queue. When the queue is
+    full, :meth:`put` waits for the consumer, which gives backpressure to
+    producers that run faster than the learner.
+    """
+
+    def __init__(self, schema: Schema, maxsize: int = 1024):
+        """:param schema: The schema of the instances of the stream.
+        :param maxsize: The maximum number of queued instances, defaults to 1024.
+        """
+        super().__init__(schema)
+        self.maxsize = maxsize
+        self._queue: Optional[asyncio.Queue] = None
+        self._ended = False
+
+    def _get_queue(self) -> asyncio.Queue:
+        # Created on first use so that the queue belongs to the running event
+        # loop. Before Python 3.10, a queue binds to the loop current when it
+        # is constructed, which need not be the one that later runs the stream.
+        if self._queue is None:
+            self._queue = asyncio.Queue(self.maxsize)
+        return self._queue
+
+    async def put(self, x: Sequence[float], y: Union[int, float]):
+        """Queue an instance, waiting while the queue is full.
+
+        :param x: The feature values of the instance.
+        :param y: The class index for classification or the target value for
+            regression.
+        """
+        await self._get_queue().put(self._instance(np.asarray(x, dtype=self.schema.dtype), y))
+
+    async def put_instance(self, instance: Union[LabeledInstance, RegressionInstance]):
+        """Queue an existing instance, waiting while the queue is full."""
+        await self._get_queue().put(instance)
+
+    async def close(self):
+        """End the stream once the queued instances have been consumed."""
+        await self._get_queue().put(_END)
+
+    async def next_instance(self):
+        if self._ended:
+            return None
+        instance = await self._get_queue().get()
+        if instance is _END:
+            self._ended = True
+            return None
+        return instance
+
+
+class SocketStream(AsyncStream):
+    """An asynchronous stream reading a line protocol from a TCP or Unix socket.
+
+    Each line holds the comma separated feature values followed by the target:
+    a class label (or its index) for classification, a number for regression.
+    Only as many lines are read as are consumed, so the kernel's flow control
+    slows down the sender when the learner falls behind. The stream ends when
+    the connection is closed.
+    """
+
+    def __init__(
+        self,
+        schema: Schema,
+        reader: asyncio.StreamReader,
+        writer: Optional[asyncio.StreamWriter] = None,
+        delimiter: str = ",",
+    ):
+        """Construct a SocketStream from an open connection. Prefer
+        :meth:`connect_tcp` or :meth:`connect_unix`.
+
+        :param schema: The schema of the instances of the stream.
+        :param reader: The reader of the connection.
+        :param writer: The writer of the connection, closed with the stream.
+        :param delimiter: The string separating the values of a line.
+        """
+        super().__init__(schema)
+        self._reader = reader
+        self._writer = writer
+        self.delimiter = delimiter
+
+    @classmethod
+    async def connect_tcp(
+        cls, schema: Schema, host: str, port: int, **kwargs
+    ) -> "SocketStream":
+        """Connect to a TCP server sending instances."""
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(schema, reader, writer, **kwargs)
+
+    @classmethod
+    async def connect_unix(
+        cls, schema: Schema, path: str, **kwargs
+    ) -> "SocketStream":
+        """Connect to a Unix socket sending instances."""
+        reader, writer = await asyncio.open_unix_connection(path)
+        return cls(schema, reader, writer, **kwargs)
+
+    def _parse(self, line: str) -> Union[LabeledInstance, RegressionInstance]:
+        *x, y = line.split(self.delimiter)
+        if len(x) != self.schema.get_num_attributes():
+            raise ValueError(
+                f"Expected {self.schema.get_num_attributes()} features, got {len(x)}"
+            )
+        y = y.strip()
+        if self.schema.is_classification():
+            label_values = self.schema.get_label_values()
+            y = self.schema.get_index_for_label(y) if y in label_values else int(y)
+        return self._instance(np.array(x, dtype=self.schema.dtype), y)
+
+    async def next_instance(self):
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                await self.close()
+                return None
+            line = line.decode().strip()
+            if line:
+                return self._parse(line)
+
+    async def close(self):
+        """Close the connection."""
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+            self._writer = None
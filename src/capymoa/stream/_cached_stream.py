@@ -0,0 +1,251 @@
+"""A stream wrapper that records the first pass of a stream and replays it."""
+
+import shutil
+import tempfile
+import weakref
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+from capymoa.instance import InstanceBatch, LabeledInstance, RegressionInstance
+from capymoa.stream._memmap_stream import _X_FILE, _Y_FILE, _write_header
+from capymoa.stream._stream import Schema, Stream
+
+_BACKENDS = ("memory", "mmap")
+
+
+class _MemoryCache:
+    """Recorded rows kept in arrays that double in capacity as they fill."""
+
+    def __init__(self, num_attributes: int, x_dtype, y_dtype):
+        self._X = np.empty((1024, num_attributes), dtype=x_dtype)
+        self._y = np.empty(1024, dtype=y_dtype)
+        self.n = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.n * (self._X.itemsize * self._X.shape[1] + self._y.itemsize)
+
+    def append(self, x: np.ndarray, y: np.ndarray):
+        stop = self.n + len(x)
+        if stop > len(self._X):
+            capacity = max(stop, 2 * len(self._X))
+            # Rows handed out as views keep the old buffers alive.
+            grown_X = np.empty((capacity, self._X.shape[1]), dtype=self._X.dtype)
+            grown_y = np.empty(capacity, dtype=self._y.dtype)
+            grown_X[: self.n], grown_y[: self.n] = self._X[: self.n], self._y[: self.n]
+            self._X, self._y = grown_X, grown_y
+        self._X[self.n : stop] = x
+        self._y[self.n : stop] = y
+        self.n = stop
+
+    def rows(self, start: int, stop: int) -> Tuple[np.ndarray, np.ndarray]:
+        return self._X[start:stop], self._y[start:stop]
+
+
+class _DiskCache:
+    """Recorded rows appended to the ``x.bin`` and ``y.bin`` files of
+    :func:`capymoa.stream.to_binary` and read back through ``np.memmap``."""
+
+    def __init__(self, path: Path, num_attributes: int, x_dtype, y_dtype):
+        self.path = path
+        self.n = 0
+        self._num_attributes = num_attributes
+        self._x_dtype = np.dtype(x_dtype)
+        self._y_dtype = np.dtype(y_dtype)
+        self._x_file = open(path / _X_FILE, "wb")
+        self._y_file = open(path / _Y_FILE, "wb")
+        self._mapped = 0
+        self._X: Optional[np.memmap] = None
+        self._y: Optional[np.memmap] = None
+
+    def append(self, x: np.ndarray, y: np.ndarray):
+        np.ascontiguousarray(x, dtype=self._x_dtype).tofile(self._x_file)
+        np.ascontiguousarray(y, dtype=self._y_dtype).tofile(self._y_file)
+        self.n += len(x)
+
+    def rows(self, start: int, stop: int) -> Tuple[np.ndarray, np.ndarray]:
+        if stop > self._mapped:
+            if not self._x_file.closed:
+                self._x_file.flush()
+                self._y_file.flush()
+            shape = (self.n, self._num_attributes)
+            self._X = np.memmap(self.path / _X_FILE, self._x_dtype, "r", shape=shape)
+            self._y = np.memmap(self.path / _Y_FILE, self._y_dtype, "r", shape=(self.n,))
+            self._mapped = self.n
+        return (
+            np.asarray(self._X[start:stop]),
+            np.asarray(self._y[start:stop]),
+        )
+
+    def finish(self, schema: Schema):
+        """Close the files and write ``header.json``, which makes the directory
+        readable by :class:`capymoa.stream.MemmapStream`."""
+        self._x_file.close()
+        self._y_file.close()
+        _write_header(self.path, schema, self.n, self._y_dtype)
+
+
+class CachedStream(Stream):
+    """Record the first pass over a stream and replay it on later passes.
+
+    Instances are recorded into compact NumPy arrays as they are first read.
+    :meth:`restart` replays the recording instead of restarting the wrapped
+    stream, so expensive generators and drift compositions are only generated
+    once however many learners or configurations are evaluated on them.
+
+    >>> from capymoa.stream import CachedStream
+    >>> from capymoa.stream.generator import RandomTreeGenerator
+    >>> stream = CachedStream(RandomTreeGenerator(), max_instances=1000)
+    >>> first_pass = stream.next_batch(1000)
+    >>> stream.restart()
+    >>> second_pass = stream.next_batch(1000)
+    >>> (first_pass.x == second_pass.x).all()
+    True
+    >>> len(stream)
+    1000
+
+    With ``backend="mmap"``, or once the recording outgrows ``max_memory``
+    bytes, the recording is written to disk in the format of
+    :func:`capymoa.stream.to_binary` and read back through ``np.memmap``.
+    Once the first pass is complete, the directory can also be opened with
+    :class:`capymoa.stream.MemmapStream`.
+
+    The wrapped stream is read only once, from its current position, and must
+    not be used directly while it is cached.
+    """
+
+    def __init__(
+        self,
+        stream: Stream,
+        max_instances: Optional[int] = None,
+        backend: str = "memory",
+        max_memory: Optional[int] = None,
+        directory: Union[str, Path, None] = None,
+        chunk_size: int = 1024,
+    ):
+        """Construct a CachedStream wrapping another stream.
+
+        :param stream: The stream to record.
+        :param max_instances: The number of instances to record, defaults to
+            None which records until the stream ends. Infinite streams, such as
+            generators, require it.
+        :param backend: ``"memory"`` to keep the recording in RAM or ``"mmap"``
+            to write it to disk, defaults to ``"memory"``.
+        :param max_memory: With the memory backend, spill the recording to disk
+            once it takes more than this many bytes, defaults to None which
+            never spills.
+        :param directory: The directory to write the recording to, defaults to
+            None which uses a temporary directory removed with the stream.
+        :param chunk_size: The number of instances read from the wrapped stream
+            at once, defaults to 1024.
+        :raises ValueError: If the backend is unknown or a size is not positive.
+        """
+        if backend not in _BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {_BACKENDS}")
+        if chunk_size < 1 or (max_instances is not None and max_instances < 1):
+            raise ValueError("chunk_size and max_instances must be positive integers")
+
+        self.stream = stream
+        self.max_instances = max_instances
+        self.backend = backend
+        self.max_memory = max_memory
+        self.chunk_size = chunk_size
+        self.directory = None if directory is None else Path(directory)
+
+        schema = stream.get_schema()
+        self._y_dtype = np.int64 if schema.is_classification() else np.float64
+        self._cache: Union[_MemoryCache, _DiskCache] = _MemoryCache(
+            schema.get_num_attributes(), schema.dtype, self._y_dtype
+        )
+        self._complete = False
+        self._position = 0
+        super().__init__(schema=schema, CLI=None, moa_stream=None)
+        if backend == "mmap":
+            self._spill()
+
+    def _spill(self):
+        """Move the recording to disk and keep recording there."""
+        if self.directory is None:
+            self.directory = Path(tempfile.mkdtemp(prefix="capymoa_cache_"))
+            weakref.finalize(self, shutil.rmtree, self.directory, True)
+        else:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        cache = _DiskCache(
+            self.directory, self.schema.get_num_attributes(), self.schema.dtype, self._y_dtype
+        )
+        if self._cache.n > 0:
+            cache.append(*self._cache.rows(0, self._cache.n))
+        self._cache = cache
+
+    def _record(self) -> bool:
+        """Record the next chunk of the wrapped stream. Return False once the
+        first pass is complete."""
+        if self._complete:
+            return False
+        size = self.chunk_size
+        if self.max_instances is not None:
+            size = min(size, self.max_instances - self._cache.n)
+        batch = self.stream.next_batch(size) if size > 0 else None
+        if batch is not None:
+            self._cache.append(batch.x, batch.y)
+            if (
+                isinstance(self._cache, _MemoryCache)
+                and self.max_memory is not None
+                and self._cache.nbytes > self.max_memory
+            ):
+                self._spill()
+        if batch is None or (
+            self.max_instances is not None and self._cache.n >= self.max_instances
+        ):
+            self._complete = True
+            if isinstance(self._cache, _DiskCache):
+                self._cache.finish(self.schema)
+        return batch is not None
+
+    @property
+    def is_complete(self) -> bool:
+        """Whether the whole first pass has been recorded."""
+        return self._complete
+
+    def __len__(self) -> int:
+        if self._complete:
+            return self._cache.n
+        length = len(self.stream)
+        return length if self.max_instances is None else min(length, self.max_instances)
+
+    def has_more_instances(self) -> bool:
+        while self._position >= self._cache.n:
+            if not self._record():
+                return False
+        return True
+
+    def next_instance(self) -> Union[LabeledInstance, RegressionInstance]:
+        if not self.has_more_instances():
+            return None
+        x, y = self._cache.rows(self._position, self._position + 1)
+        self._position += 1
+        if self.schema.is_classification():
+            return LabeledInstance.from_array(self.schema, x[0], int(y[0]))
+        return RegressionInstance.from_array(self.schema, x[0], float(y[0]))
+
+    def next_batch(self, n: int) -> Optional[InstanceBatch]:
+        if n < 1:
+            raise ValueError("n must be a positive integer")
+        if not self.has_more_instances():
+            return None
+        while self._cache.n < self._position + n and self._record():
+            pass
+        start = self._position
+        self._position = min(start + n, self._cache.n)
+        return InstanceBatch(self.schema, *self._cache.rows(start, self._position))
+
+    def get_schema(self):
+        return self.schema
+
+    def get_moa_stream(self):
+        raise ValueError("Not a moa_stream, a cache of another stream")
+
+    def restart(self):
+        self._position = 0
@@ -0,0 +1,192 @@
+"""Read compressed datastream files with streaming decompression."""
+
+import bz2
+import csv
+import gzip
+import io
+import itertools
+import lzma
+from pathlib import Path
+from typing import IO, List, Optional, Union
+
+import numpy as np
+from com.yahoo.labs.samoa.instances import Instances, InstancesHeader
+from java.io import StringReader
+
+_COMPRESSION_SUFFIXES = (".gz", ".bz2", ".xz", ".zst")
+
+
+def _compression(path: Union[str, Path]) -> Optional[str]:
+    """Return the compression suffix of a path or None if it is not compressed.
+
+    >>> _compression("electricity.arff.gz")
+    '.gz'
+    >>> _compression("electricity.csv") is None
+    True
+    """
+    suffix = Path(path).suffix.lower()
+    return suffix if suffix in _COMPRESSION_SUFFIXES else None
+
+
+def _uncompressed_suffix(path: Union[str, Path]) -> str:
+    """Return the suffix of a path once decompressed.
+
+    >>> _uncompressed_suffix("electricity.arff.xz")
+    '.arff'
+    """
+    path = Path(path)
+    if _compression(path) is not None:
+        path = path.with_suffix("")
+    return path.suffix.lower()
+
+
+def _open_binary(path: Union[str, Path]) -> IO[bytes]:
+    """Open a file for reading bytes, decompressing it while it is read if it
+    is compressed with gzip, bzip2, xz or zstd.
+
+    Nothing is extracted to disk. Reading zstd files requires the optional
+    ``zstandard`` package.
+    """
+    compression = _compression(path)
+    if compression == ".gz":
+        return gzip.open(path, "rb")
+    elif compression == ".bz2":
+        return bz2.open(path, "rb")
+    elif compression == ".xz":
+        return lzma.open(path, "rb")
+    elif compression == ".zst":
+        try:
+            import zstandard
+        except ImportError as error:
+            raise ImportError(
+                "Reading zstd compressed files requires the zstandard package. "
+                "Install it with `pip install zstandard`."
+            ) from error
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"))
+        return io.BufferedReader(reader)
+    return open(path, "rb")
+
+
+class _ArffDataReader:
+    """Parse an ARFF file from a (possibly compressed) byte stream.
+
+    The header is parsed by MOA so that the resulting ``InstancesHeader`` is
+    exactly the one an ``ArffFileStream`` would produce. The data section is
+    parsed in chunks of lines into arrays of attribute values, as MOA stores
+    them: numeric values, indexes of nominal values and ``NaN`` for missing
+    values. Dense and sparse rows are supported.
+    """
+
+    def __init__(self, path: Union[str, Path], class_index: int = -1, chunk_size: int = 1024):
+        """
+        :param path: A path to an ARFF file, compressed or not.
+        :param class_index: The class attribute as given to MOA's ``ArffFileStream``:
+            -1 for the last attribute, otherwise the 1-based attribute index.
+        :param chunk_size: The number of rows parsed at once.
+        :raises ValueError: If the file has string, date or relational attributes.
+        """
+        if class_index == 0:
+            raise ValueError("A class attribute is required")
+        self.path = path
+        self.chunk_size = chunk_size
+        self._file: Optional[IO[bytes]] = None
+
+        header = self._open()
+        instances = Instances(StringReader(header), 0, -1)
+        instances.setClassIndex(
+            instances.numAttributes() - 1 if class_index < 0 else class_index - 1
+        )
+        self.moa_header = InstancesHeader(instances)
+
+        self._num_attributes = self.moa_header.numAttributes()
+        self._nominal_indexes: List[Optional[dict]] = []
+        self._sparse_defaults: List[str] = []
+        for j in range(self._num_attributes):
+            attribute = self.moa_header.attribute(j)
+            if attribute.isNominal():
+                values = [str(value) for value in attribute.getAttributeValues()]
+                indexes = {value: float(i) for i, value in enumerate(values)}
+                indexes["?"] = np.nan
+                self._nominal_indexes.append(indexes)
+                self._sparse_defaults.append(values[0])
+            elif attribute.isNumeric():
+                self._nominal_indexes.append(None)
+                self._sparse_defaults.append("0")
+            else:
+                raise ValueError(
+                    f"Unsupported ARFF attribute type: {attribute.name()}"
+                )
+
+    def _open(self) -> str:
+        """(Re)open the file, position it at the first row of data and return
+        the text of the header."""
+        self.close()
+        self._file = _open_binary(self.path)
+        header = []
+        for line in self._file:
+            line = line.decode()
+            header.append(line)
+            if line.strip().lower().startswith("@data"):
+                return "".join(header)
+        raise ValueError(f"No @data section found in {self.path}")
+
+    def restart(self):
+        self._open()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _dense_row(self, line: str) -> List[str]:
+        """Convert a sparse row ``{index value, ...}`` to a dense row."""
+        row = list(self._sparse_defaults)
+        content = line.strip()[1:-1]
+        for item in next(csv.reader([content], quotechar="'", skipinitialspace=True), []):
+            index, value = item.strip().split(maxsplit=1)
+            row[int(index)] = value
+        return row
+
+    def read_chunk(self) -> Optional[np.ndarray]:
+        """Parse the next ``chunk_size`` rows.
+
+        :return: An array of shape (n_rows, n_attributes) with the values of all
+            attributes, including the class, or None at the end of the file.
+        """
+        lines = []
+        while len(lines) == 0:
+            raw_lines = list(itertools.islice(self._file, self.chunk_size))
+            if len(raw_lines) == 0:
+                return None
+            # Skip blank lines and comments.
+            lines = [line.decode().strip() for line in raw_lines]
+            lines = [line for line in lines if line and not line.startswith("%")]
+
+        rows = [
+            self._dense_row(line) if line.startswith("{") else row
+            for line, row in zip(
+                lines, csv.reader(lines, quotechar="'", skipinitialspace=True)
+            )
+        ]
+        if any(len(row) != self._num_attributes for row in rows):
+            raise ValueError(
+                f"Expected {self._num_attributes} values in every row of {self.path}"
+            )
+
+        values = np.empty((len(rows), self._num_attributes))
+        for j, column in enumerate(zip(*rows)):
+            nominal_indexes = self._nominal_indexes[j]
+            if nominal_indexes is None:
+                try:
+                    values[:, j] = np.array(column, dtype=np.float64)
+                except ValueError:
+                    values[:, j] = [np.nan if v == "?" else float(v) for v in column]
+            else:
+                try:
+                    values[:, j] = [nominal_indexes[v.strip().strip('"')] for v in column]
+                except KeyError as error:
+                    raise ValueError(
+                        f"Unknown value {error} for attribute "
+                        f"{self.moa_header.attribute(j).name()}"
+                    ) from None
+        return values
@@ -0,0 +1,119 @@
+"""Line counts and row offsets of text files, cached in a sidecar file."""
+
+import json
+from pathlib import Path
+from typing import IO, List, Union
+
+import numpy as np
+
+from capymoa.stream._compressed import _compression, _open_binary
+
+_INDEX_SUFFIX = ".index.json"
+_INDEX_VERSION = 2
+_READ_SIZE = 1 << 20
+_BLANK = b" \t\r\n"
+
+
+class _LineIndex:
+    """The number of lines of a file and the byte offset of every
+    ``every``-th line, so that any line can be reached without a scan.
+
+    The index is computed with a buffered binary scan counting newlines, and
+    cached next to the file in ``<file>.index.json``. Blank lines at the end of
+    the file are not counted. The cache is keyed by the
+    size and modification time of the file, so it is rebuilt whenever the file
+    changes. Compressed files cannot be seeked, so only their line count is
+    kept.
+    """
+
+    def __init__(self, path: Union[str, Path], num_lines: int, offsets: List[int], every: int):
+        self.path = Path(path)
+        self.num_lines = num_lines
+        self.offsets = offsets
+        self.every = every
+
+    @classmethod
+    def load_or_build(cls, path: Union[str, Path], every: int = 10_000) -> "_LineIndex":
+        """Load the cached index of a file, or build it and try to cache it.
+
+        :param path: The file to index.
+        :param every: Keep the byte offset of every ``every``-th line.
+        """
+        path = Path(path)
+        stat = path.stat()
+        key = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "every": every}
+        index_path = path.with_name(path.name + _INDEX_SUFFIX)
+        try:
+            with open(index_path) as file:
+                cached = json.load(file)
+            if cached.get("version") == _INDEX_VERSION and all(
+                cached.get(name) == value for name, value in key.items()
+            ):
+                return cls(path, cached["num_lines"], cached["offsets"], every)
+        except (OSError, ValueError):
+            pass
+
+        index = cls.build(path, every)
+        try:
+            with open(index_path, "w") as file:
+                json.dump(
+                    {
+                        "version": _INDEX_VERSION,
+                        **key,
+                        "num_lines": index.num_lines,
+                        "offsets": index.offsets,
+                    },
+                    file,
+                )
+        except OSError:
+            # A read-only directory only costs a rescan next time.
+            pass
+        return index
+
+    @classmethod
+    def build(cls, path: Union[str, Path], every: int = 10_000) -> "_LineIndex":
+        """Scan a file to count its lines and record the line offsets."""
+        seekable = _compression(path) is None
+        offsets = [0]
+        newlines = 0
+        # The newlines after the last byte that is not blank.
+        trailing_newlines = 0
+        has_content = False
+        position = 0
+        with _open_binary(path) as file:
+            for chunk in iter(lambda: file.read(_READ_SIZE), b""):
+                if seekable:
+                    # Line k starts just after the k-th newline.
+                    ends = np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8) == 10)
+                    line_numbers = newlines + 1 + np.arange(len(ends))
+                    selected = ends[line_numbers % every == 0]
+                    offsets.extend((position + selected + 1).tolist())
+                    newlines += len(ends)
+                else:
+                    newlines += chunk.count(b"\n")
+                position += len(chunk)
+                content = chunk.rstrip(_BLANK)
+                if len(content) > 0:
+                    has_content = True
+                    trailing_newlines = chunk.count(b"\n", len(content))
+                else:
+                    trailing_newlines += chunk.count(b"\n")
+
+        num_lines = newlines - trailing_newlines + 1 if has_content else 0
+        # Offsets past the last line start blank lines or the end of the file.
+        offsets = offsets[: max(1, (num_lines - 1) // every + 1)]
+        return cls(path, num_lines, offsets if seekable else [], every)
+
+    def open_at(self, line: int) -> IO[bytes]:
+        """Open the file positioned at the start of ``line``."""
+        file = _open_binary(self.path)
+        skip = line
+        if len(self.offsets) > 0:
+            block = min(line // self.every, len(self.offsets) - 1)
+            file.seek(self.offsets[block])
+            skip = line - block * self.every
+        for _ in range(skip):
+            if not file.readline():
+                break
+        return file
+
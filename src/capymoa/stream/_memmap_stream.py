@@ -0,0 +1,213 @@
+"""A compact binary on-disk format for datastreams read through ``np.memmap``."""
+
+import json
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+from com.yahoo.labs.samoa.instances import Instances, InstancesHeader
+from java.io import StringReader
+
+from capymoa.instance import InstanceBatch, LabeledInstance, RegressionInstance
+from capymoa.stream._stream import Schema, Stream
+
+_FORMAT_VERSION = 1
+_HEADER_FILE = "header.json"
+_X_FILE = "x.bin"
+_Y_FILE = "y.bin"
+
+
+def _schema_from_arff_header(arff_header: str, class_index: int, dtype=None) -> Schema:
+    """Rebuild a schema from the ARFF header text of a MOA ``InstancesHeader``."""
+    instances = Instances(StringReader(arff_header), 0, -1)
+    instances.setClassIndex(class_index)
+    return Schema(moa_header=InstancesHeader(instances), dtype=dtype)
+
+
+def to_binary(
+    stream: Stream,
+    path: Union[str, Path],
+    max_instances: Optional[int] = None,
+    batch_size: int = 4096,
+) -> Path:
+    """Write the remaining instances of a stream to the binary format read by
+    :class:`MemmapStream`.
+
+    The format is a directory holding the features as a raw row-major matrix
+    of the :attr:`~capymoa.stream.Schema.dtype` of the stream (``x.bin``),
+    the class indexes or target values
+    (``y.bin``) and a ``header.json`` sidecar with the shapes and the ARFF
+    header of the schema.
+
+    >>> from tempfile import mkdtemp
+    >>> from capymoa.stream import MemmapStream, stream_from_file, to_binary
+    >>> path = to_binary(stream_from_file("data/electricity_tiny.arff"), mkdtemp())
+    >>> len(MemmapStream(path))
+    2000
+
+    :param stream: The stream to convert, read from its current position.
+    :param path: The directory to write to. It is created if needed.
+    :param max_instances: Stop after this many instances, defaults to None
+        which requires the stream to end.
+    :param batch_size: The number of instances read at once, defaults to 4096.
+    :return: The directory the stream was written to.
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    schema = stream.get_schema()
+    y_dtype = np.int64 if schema.is_classification() else np.float64
+
+    n = 0
+    with open(path / _X_FILE, "wb") as x_file, open(path / _Y_FILE, "wb") as y_file:
+        while max_instances is None or n < max_instances:
+            size = batch_size
+            if max_instances is not None:
+                size = min(batch_size, max_instances - n)
+            batch = stream.next_batch(size)
+            if batch is None:
+                break
+            np.ascontiguousarray(batch.x, dtype=schema.dtype).tofile(x_file)
+            np.ascontiguousarray(batch.y, dtype=y_dtype).tofile(y_file)
+            n += len(batch)
+
+    _write_header(path, schema, n, y_dtype)
+    return path
+
+
+def _write_header(path: Path, schema: Schema, num_instances: int, y_dtype) -> None:
+    """Write the ``header.json`` sidecar describing ``x.bin`` and ``y.bin``."""
+    header = {
+        "version": _FORMAT_VERSION,
+        "num_instances": num_instances,
+        "num_attributes": schema.get_num_attributes(),
+        "x_dtype": schema.dtype.str,
+        "y_dtype": np.dtype(y_dtype).str,
+        "class_index": int(schema.get_moa_header().classIndex()),
+        "arff_header": str(schema),
+    }
+    with open(path / _HEADER_FILE, "w") as header_file:
+        json.dump(header, header_file, indent=2)
+
+
+class MemmapStream(Stream):
+    """A datastream over the binary format written by :func:`to_binary`.
+
+    The feature matrix and the targets are memory mapped, so opening a stream
+    costs no parsing and only the pages that are read are loaded. Restarting,
+    seeking and slicing are O(1). Features stored with another type than
+    ``dtype`` are converted as they are read.
+
+    >>> from tempfile import mkdtemp
+    >>> from capymoa.stream import MemmapStream, stream_from_file, to_binary
+    >>> path = to_binary(stream_from_file("data/electricity_tiny.arff"), mkdtemp())
+    >>> stream = MemmapStream(path)
+    >>> stream.next_instance()
+    LabeledInstance(
+        Schema(electricity),
+        x=ndarray(..., 6),
+        y_index=1,
+        y_label='1'
+    )
+    >>> stream.seek(1999)
+    >>> stream.next_instance().x[0]
+    0.659574
+    >>> stream[10:20].x.shape
+    (10, 6)
+    """
+
+    def __init__(self, path: Union[str, Path], dtype=None):
+        """Construct a MemmapStream from a directory written by :func:`to_binary`.
+
+        :param path: The directory holding the binary stream.
+        :param dtype: The floating point type of the features, see
+            :attr:`capymoa.stream.Schema.dtype`.
+        :raises ValueError: If the directory was written by an unsupported version.
+        """
+        self.path = Path(path)
+        with open(self.path / _HEADER_FILE) as header_file:
+            header = json.load(header_file)
+        if header["version"] != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported binary stream version: {header['version']}")
+
+        n, d = header["num_instances"], header["num_attributes"]
+        # np.memmap cannot map empty files.
+        if n == 0:
+            self._X = np.empty((0, d), dtype=header["x_dtype"])
+            self._y = np.empty(0, dtype=header["y_dtype"])
+        else:
+            self._X = np.memmap(
+                self.path / _X_FILE, dtype=header["x_dtype"], mode="r", shape=(n, d)
+            )
+            self._y = np.memmap(
+                self.path / _Y_FILE, dtype=header["y_dtype"], mode="r", shape=(n,)
+            )
+        self.current_instance_index = 0
+
+        self.schema = _schema_from_arff_header(
+            header["arff_header"], header["class_index"], dtype
+        )
+        super().__init__(schema=self.schema, CLI=None, moa_stream=None)
+
+    def __len__(self) -> int:
+        return len(self._X)
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[LabeledInstance, RegressionInstance, InstanceBatch]:
+        """Return the instance at an index, or a batch for a slice, without
+        moving the position of the stream."""
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("Only contiguous slices are supported")
+            return InstanceBatch(
+                self.schema,
+                np.asarray(self._X[start:stop], dtype=self.schema.dtype),
+                np.asarray(self._y[start:stop]),
+            )
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"Index {index} out of range for a stream of {len(self)}")
+        x = np.asarray(self._X[index], dtype=self.schema.dtype)
+        if self.schema.is_classification():
+            return LabeledInstance.from_array(self.schema, x, int(self._y[index]))
+        return RegressionInstance.from_array(self.schema, x, float(self._y[index]))
+
+    def seek(self, index: int):
+        """Move the stream so that the next instance is the one at ``index``.
+
+        :param index: The index of the next instance, between 0 and ``len(self)``.
+        :raises IndexError: If the index is out of range.
+        """
+        if not 0 <= index <= len(self):
+            raise IndexError(f"Index {index} out of range for a stream of {len(self)}")
+        self.current_instance_index = index
+
+    def has_more_instances(self):
+        return len(self._X) > self.current_instance_index
+
+    def next_instance(self) -> Union[LabeledInstance, RegressionInstance]:
+        if not self.has_more_instances():
+            return None
+        instance = self[self.current_instance_index]
+        self.current_instance_index += 1
+        return instance
+
+    def next_batch(self, n: int) -> Optional[InstanceBatch]:
+        if n < 1:
+            raise ValueError("n must be a positive integer")
+        if not self.has_more_instances():
+            return None
+        start = self.current_instance_index
+        self.current_instance_index = min(start + n, len(self))
+        return self[start : self.current_instance_index]
+
+    def get_schema(self):
+        return self.schema
+
+    def get_moa_stream(self):
+        raise ValueError("Not a moa_stream, a memory mapped binary file")
+
+    def restart(self):
+        self.current_instance_index = 0
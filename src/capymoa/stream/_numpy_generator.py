@@ -0,0 +1,264 @@
+"""Vectorised NumPy implementations of simple MOA synthetic generators.
+
+Each generator produces a whole block of instances per call and follows the
+generating process of its MOA counterpart in ``moa.streams.generators``. The
+random numbers come from :func:`numpy.random.default_rng` seeded with the
+``instance_random_seed`` (and ``model_random_seed``) of the stream instead of
+``java.util.Random``, so the instances are statistically equivalent to MOA's,
+not identical.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Tuple
+
+import numpy as np
+
+_Block = Tuple[np.ndarray, np.ndarray]
+
+
+class _NumpyGenerator(ABC):
+    """Generate blocks of instances as arrays of features and targets."""
+
+    def __init__(self, instance_random_seed: int):
+        self.instance_random_seed = instance_random_seed
+        self.restart()
+
+    def restart(self):
+        self._rng = np.random.default_rng(self.instance_random_seed)
+        # MOA's balanced generators start with class 1 and then alternate.
+        self._next_class_is_zero = False
+
+    @abstractmethod
+    def generate(self, n: int) -> _Block:
+        """Return the features and targets of the next ``n`` instances."""
+
+    def _flip_labels(self, y: np.ndarray, noise_percentage: int) -> np.ndarray:
+        """Flip binary labels with ``noise_percentage`` percent probability."""
+        if noise_percentage <= 0:
+            return y
+        noisy = self._rng.integers(1, 101, size=len(y)) <= noise_percentage
+        return np.where(noisy, 1 - y, y)
+
+    def _balanced(self, sample, n: int) -> _Block:
+        """Draw candidates from ``sample(size)`` and keep them so that classes
+        0 and 1 alternate, as MOA does when balancing classes."""
+        first = 0 if self._next_class_is_zero else 1
+        needed = {first: (n + 1) // 2, 1 - first: n // 2}
+        pools = {0: [], 1: []}
+        counts = {0: 0, 1: 0}
+        while counts[0] < needed[0] or counts[1] < needed[1]:
+            x, y = sample(2 * n)
+            for label in (0, 1):
+                if counts[label] < needed[label]:
+                    selected = x[y == label][: needed[label] - counts[label]]
+                    pools[label].append(selected)
+                    counts[label] += len(selected)
+
+        x = np.empty((n, x.shape[1]))
+        y = np.empty(n, dtype=np.int_)
+        x[0::2], y[0::2] = np.concatenate(pools[first]), first
+        x[1::2], y[1::2] = np.concatenate(pools[1 - first]), 1 - first
+        if n % 2 == 1:
+            self._next_class_is_zero = not self._next_class_is_zero
+        return x, y
+
+
+class _NumpySEA(_NumpyGenerator):
+    """Three attributes uniform in [0, 10). The class is 0 (``groupA``) when
+    the first two attributes sum to at most the threshold of the function."""
+
+    _THRESHOLDS = {1: 8.0, 2: 9.0, 3: 7.0, 4: 9.5}
+
+    def __init__(
+        self,
+        instance_random_seed: int = 1,
+        function: int = 1,
+        balance_classes: bool = False,
+        noise_percentage: int = 10,
+    ):
+        if function not in self._THRESHOLDS:
+            raise ValueError(f"function must be one of {list(self._THRESHOLDS)}")
+        self.threshold = self._THRESHOLDS[function]
+        self.balance_classes = balance_classes
+        self.noise_percentage = noise_percentage
+        super().__init__(instance_random_seed)
+
+    def _sample(self, n: int) -> _Block:
+        x = 10.0 * self._rng.random((n, 3))
+        y = (x[:, 0] + x[:, 1] > self.threshold).astype(np.int_)
+        return x, y
+
+    def generate(self, n: int) -> _Block:
+        x, y = self._balanced(self._sample, n) if self.balance_classes else self._sample(n)
+        return x, self._flip_labels(y, self.noise_percentage)
+
+
+class _NumpyHyperplane(_NumpyGenerator):
+    """Attributes uniform in [0, 1) on either side of a rotating hyperplane.
+
+    The hyperplane weights start uniform in [0, 1). After each instance, the
+    first ``number_of_drifting_attributes`` weights move by
+    ``magnitude_of_change`` in their direction, which reverses with
+    ``sigma_percentage`` percent probability.
+    """
+
+    def __init__(
+        self,
+        instance_random_seed: int = 1,
+        number_of_attributes: int = 10,
+        number_of_drifting_attributes: int = 2,
+        magnitude_of_change: float = 0.0,
+        noise_percentage: int = 5,
+        sigma_percentage: int = 10,
+    ):
+        self.number_of_attributes = number_of_attributes
+        self.number_of_drifting_attributes = min(
+            number_of_drifting_attributes, number_of_attributes
+        )
+        self.magnitude_of_change = magnitude_of_change
+        self.noise_percentage = noise_percentage
+        self.sigma_percentage = sigma_percentage
+        super().__init__(instance_random_seed)
+
+    def restart(self):
+        super().restart()
+        self._weights = self._rng.random(self.number_of_attributes)
+        self._sigma = np.zeros(self.number_of_attributes)
+        self._sigma[: self.number_of_drifting_attributes] = 1.0
+
+    def _hyperplane(self, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the attributes of ``n`` instances and the weights in effect
+        for each of them, then drift the weights past the block."""
+        x = self._rng.random((n, self.number_of_attributes))
+        if self.magnitude_of_change == 0.0 or self.number_of_drifting_attributes == 0:
+            return x, np.broadcast_to(self._weights, x.shape)
+
+        k = self.number_of_drifting_attributes
+        flips = self._rng.integers(0, 100, size=(n, k)) < self.sigma_percentage
+        # The direction used for the i-th step, before its possible reversal.
+        signs = np.cumprod(np.where(flips, -1.0, 1.0), axis=0)
+        sigma = self._sigma[:k] * np.vstack([np.ones((1, k)), signs[:-1]])
+        steps = self.magnitude_of_change * np.cumsum(sigma, axis=0)
+
+        weights = np.tile(self._weights, (n, 1))
+        weights[1:, :k] += steps[:-1]
+        self._weights[:k] += steps[-1]
+        self._sigma[:k] *= signs[-1]
+        return x, weights
+
+
+class _NumpyHyperplaneClassification(_NumpyHyperplane):
+    """The class is 1 when the weighted sum of the attributes is at least half
+    the sum of the weights."""
+
+    def generate(self, n: int) -> _Block:
+        x, weights = self._hyperplane(n)
+        total = np.einsum("ij,ij->i", weights, x)
+        y = (total >= 0.5 * weights.sum(axis=1)).astype(np.int_)
+        return x, self._flip_labels(y, self.noise_percentage)
+
+
+class _NumpyRandomRBF(_NumpyGenerator):
+    """Attributes drawn around randomly placed centroids.
+
+    Each centroid has a uniform centre, a class, a standard deviation and a
+    weight drawn with ``model_random_seed``. An instance picks a centroid with
+    probability proportional to its weight and is placed in a uniform random
+    direction from its centre, at a Gaussian distance scaled by the standard
+    deviation of the centroid.
+    """
+
+    def __init__(
+        self,
+        model_random_seed: int = 1,
+        instance_random_seed: int = 1,
+        number_of_classes: int = 2,
+        number_of_attributes: int = 10,
+        number_of_centroids: int = 50,
+    ):
+        model_rng = np.random.default_rng(model_random_seed)
+        self.centres = model_rng.random((number_of_centroids, number_of_attributes))
+        self.labels = model_rng.integers(0, number_of_classes, size=number_of_centroids)
+        self.std_devs = model_rng.random(number_of_centroids)
+        weights = model_rng.random(number_of_centroids)
+        self.probabilities = weights / weights.sum()
+        super().__init__(instance_random_seed)
+
+    def generate(self, n: int) -> _Block:
+        centroids = self._rng.choice(len(self.centres), size=n, p=self.probabilities)
+        direction = 2.0 * self._rng.random((n, self.centres.shape[1])) - 1.0
+        magnitude = np.linalg.norm(direction, axis=1)
+        distance = self._rng.standard_normal(n) * self.std_devs[centroids]
+        x = self.centres[centroids] + direction * (distance / magnitude)[:, None]
+        return x, self.labels[centroids]
+
+
+class _NumpySTAGGER(_NumpyGenerator):
+    """Three nominal attributes, ``size`` {small, medium, large}, ``color``
+    {red, blue, green} and ``shape`` {circle, square, triangle}, with the
+    class given by one of the three STAGGER concepts."""
+
+    def __init__(
+        self,
+        instance_random_seed: int = 1,
+        classification_function: int = 1,
+        balance_classes: bool = False,
+    ):
+        if classification_function not in (1, 2, 3):
+            raise ValueError("classification_function must be 1, 2 or 3")
+        self.classification_function = classification_function
+        self.balance_classes = balance_classes
+        super().__init__(instance_random_seed)
+
+    def _sample(self, n: int) -> _Block:
+        x = self._rng.integers(0, 3, size=(n, 3)).astype(np.float64)
+        size, color, shape = x.T
+        if self.classification_function == 1:
+            y = (size == 0) & (color == 0)
+        elif self.classification_function == 2:
+            y = (color == 2) | (shape == 0)
+        else:
+            y = (size == 1) | (size == 2)
+        return x, y.astype(np.int_)
+
+    def generate(self, n: int) -> _Block:
+        if self.balance_classes:
+            return self._balanced(self._sample, n)
+        return self._sample(n)
+
+
+class _NumpySine(_NumpyGenerator):
+    """Two relevant attributes ``x`` and ``y`` uniform in [0, 1), followed by
+    two irrelevant ones unless they are suppressed. The class is 0
+    (``positive``) below the sine curve of the function, or above it for the
+    reversed functions 2 and 4."""
+
+    def __init__(
+        self,
+        instance_random_seed: int = 1,
+        classification_function: int = 1,
+        suppress_irrelevant_attributes: bool = False,
+        balance_classes: bool = False,
+    ):
+        if classification_function not in (1, 2, 3, 4):
+            raise ValueError("classification_function must be 1, 2, 3 or 4")
+        self.classification_function = classification_function
+        self.number_of_attributes = 2 if suppress_irrelevant_attributes else 4
+        self.balance_classes = balance_classes
+        super().__init__(instance_random_seed)
+
+    def _sample(self, n: int) -> _Block:
+        x = self._rng.random((n, self.number_of_attributes))
+        if self.classification_function in (1, 2):
+            curve = np.sin(x[:, 0])
+        else:
+            curve = 0.5 + 0.3 * np.sin(3 * np.pi * x[:, 0])
+        below = x[:, 1] < curve
+        if self.classification_function in (2, 4):
+            below = ~below
+        return x, (~below).astype(np.int_)
+
+    def generate(self, n: int) -> _Block:
+        if self.balance_classes:
+            return self._balanced(self._sample, n)
+        return self._sample(n)
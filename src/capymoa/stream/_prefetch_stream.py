@@ -0,0 +1,189 @@
+"""A stream wrapper that reads ahead of the learner on background threads."""
+
+import threading
+from typing import Dict, List, Optional, Union
+
+from capymoa.instance import InstanceBatch, LabeledInstance, RegressionInstance
+from capymoa.stream._stream import Stream
+
+
+class PrefetchStream(Stream):
+    """Read instances of another stream ahead of time on background threads.
+
+    Parsing, generating and converting the next instances overlaps with
+    learning on the current ones. Instances are read from the wrapped stream in
+    chunks of ``chunk_size`` and their feature vectors are materialised before
+    they are queued, at most ``buffer_size`` instances ahead of the consumer.
+    Instances are always returned in the order of the wrapped stream.
+
+    >>> from capymoa.stream import PrefetchStream, stream_from_file
+    >>> stream = PrefetchStream(stream_from_file("data/electricity_tiny.csv"))
+    >>> stream.next_instance()
+    LabeledInstance(
+        Schema(NoName),
+        x=ndarray(..., 6),
+        y_index=1,
+        y_label='1'
+    )
+    >>> len(stream)
+    2000
+
+    The wrapped stream must not be used directly while it is being prefetched.
+    """
+
+    def __init__(
+        self,
+        stream: Stream,
+        buffer_size: int = 1024,
+        workers: int = 1,
+        chunk_size: int = 64,
+    ):
+        """Construct a PrefetchStream wrapping another stream.
+
+        :param stream: The stream to read from.
+        :param buffer_size: The maximum number of instances read ahead, defaults to 1024.
+        :param workers: The number of background threads, defaults to 1. Reading
+            from the wrapped stream is serialised, more workers only help when
+            materialising instances is expensive.
+        :param chunk_size: The number of instances read at once, defaults to 64.
+        :raises ValueError: If a parameter is not a positive integer or the
+            buffer cannot hold a chunk per worker.
+        """
+        if workers < 1 or chunk_size < 1:
+            raise ValueError("workers and chunk_size must be positive integers")
+        if buffer_size < chunk_size * workers:
+            raise ValueError("buffer_size must hold at least one chunk per worker")
+
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.workers = workers
+        self.chunk_size = chunk_size
+
+        self._threads: List[threading.Thread] = []
+        self._read_lock = threading.Lock()
+        self._ready = threading.Condition()
+        self._free_chunks = threading.Semaphore(buffer_size // chunk_size)
+        self._chunks: Dict[int, List[Union[LabeledInstance, RegressionInstance]]] = {}
+        self._error: Optional[BaseException] = None
+        self._reset_state()
+
+        super().__init__(schema=stream.get_schema(), CLI=None, moa_stream=None)
+
+    def _reset_state(self):
+        self._stopping = False
+        self._next_read = 0  # sequence number of the next chunk to read
+        self._last_chunk: Optional[int] = None  # set once the stream ends
+        self._next_chunk = 0  # sequence number of the next chunk to return
+        self._chunk: List[Union[LabeledInstance, RegressionInstance]] = []
+        self._chunk_index = 0
+        self._chunks.clear()
+        self._error = None
+
+    def _start(self):
+        self._threads = [
+            threading.Thread(target=self._work, daemon=True) for _ in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _stop(self):
+        with self._ready:
+            self._stopping = True
+            self._ready.notify_all()
+        for _ in self._threads:
+            self._free_chunks.release()  # wake workers waiting for space
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._free_chunks = threading.Semaphore(self.buffer_size // self.chunk_size)
+
+    def _work(self):
+        # JPype attaches the thread to the JVM as a daemon on its first Java
+        # call, so prefetching never keeps the JVM from shutting down.
+        try:
+            while True:
+                self._free_chunks.acquire()
+                with self._read_lock:
+                    if self._stopping or self._last_chunk is not None:
+                        return
+                    sequence = self._next_read
+                    self._next_read += 1
+                    chunk = []
+                    while len(chunk) < self.chunk_size and self.stream.has_more_instances():
+                        chunk.append(self.stream.next_instance())
+                    if len(chunk) < self.chunk_size:
+                        self._last_chunk = sequence
+
+                # Materialise the feature vectors outside of the read lock.
+                for instance in chunk:
+                    instance.x
+
+                with self._ready:
+                    self._chunks[sequence] = chunk
+                    self._ready.notify_all()
+        except BaseException as error:
+            with self._ready:
+                self._error = error
+                self._ready.notify_all()
+
+    def _next_chunk_ready(self) -> bool:
+        """Wait for the next chunk in order. Return False at the end of the stream."""
+        if len(self._threads) == 0:
+            if self._stopping:
+                raise RuntimeError("The stream is closed, restart it to read again")
+            self._start()
+        with self._ready:
+            while self._next_chunk not in self._chunks:
+                if self._error is not None:
+                    raise self._error
+                if self._last_chunk is not None and self._next_chunk > self._last_chunk:
+                    return False
+                self._ready.wait()
+            self._chunk = self._chunks.pop(self._next_chunk)
+        self._chunk_index = 0
+        self._next_chunk += 1
+        self._free_chunks.release()
+        return True
+
+    def __len__(self) -> int:
+        return len(self.stream)
+
+    def has_more_instances(self) -> bool:
+        while self._chunk_index >= len(self._chunk):
+            if not self._next_chunk_ready():
+                return False
+        return True
+
+    def next_instance(self) -> Union[LabeledInstance, RegressionInstance]:
+        if not self.has_more_instances():
+            return None
+        instance = self._chunk[self._chunk_index]
+        self._chunk_index += 1
+        return instance
+
+    def next_batch(self, n: int) -> Optional[InstanceBatch]:
+        if n < 1:
+            raise ValueError("n must be a positive integer")
+        instances = []
+        while len(instances) < n and self.has_more_instances():
+            stop = min(self._chunk_index + n - len(instances), len(self._chunk))
+            instances.extend(self._chunk[self._chunk_index : stop])
+            self._chunk_index = stop
+        if len(instances) == 0:
+            return None
+        return InstanceBatch.from_instances(self.schema, instances)
+
+    def get_schema(self):
+        return self.schema
+
+    def get_moa_stream(self):
+        raise ValueError("Not a moa_stream, a prefetching wrapper")
+
+    def restart(self):
+        self._stop()
+        self.stream.restart()
+        self._reset_state()
+
+    def close(self):
+        """Stop the background threads until the stream is restarted."""
+        self._stop()
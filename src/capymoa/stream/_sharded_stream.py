@@ -0,0 +1,239 @@
+"""A datastream that concatenates many files as one logical stream."""
+
+import glob
+import json
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Union
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from capymoa.instance import InstanceBatch, LabeledInstance, RegressionInstance
+from capymoa.stream._arrow_stream import ArrowStream, ParquetStream
+from capymoa.stream._compressed import _uncompressed_suffix
+from capymoa.stream._memmap_stream import _HEADER_FILE, MemmapStream
+from capymoa.stream._stream import ARFFStream, CSVStream, Schema, Stream
+
+_FORMATS = {
+    "arff": ARFFStream,
+    "csv": CSVStream,
+    "parquet": ParquetStream,
+    "arrow": ArrowStream,
+    "feather": ArrowStream,
+    "binary": MemmapStream,
+}
+
+
+def _metadata_length(format, path: str, kwargs: dict) -> Optional[int]:
+    """Return the number of instances of a shard from the metadata of its
+    file, or None if the shard has to be opened as a stream to know it."""
+    if format is ParquetStream:
+        length = pq.ParquetFile(path).metadata.num_rows
+    elif format is ArrowStream:
+        # Only the headers of the record batches are read from the memory map.
+        with pa.memory_map(path, "r") as source:
+            reader = pa.ipc.open_file(source)
+            length = sum(
+                reader.get_batch(i).num_rows for i in range(reader.num_record_batches)
+            )
+    elif format is MemmapStream:
+        with open(Path(path) / _HEADER_FILE) as header_file:
+            return json.load(header_file)["num_instances"]
+    else:
+        return None
+    max_instances = kwargs.get("max_instances")
+    return length if max_instances is None else min(length, max_instances)
+
+
+def _schema_signature(schema: Schema) -> str:
+    """The ARFF header of a schema without its relation name."""
+    lines = str(schema).splitlines()
+    return "\n".join(line for line in lines if not line.lower().startswith("@relation"))
+
+
+class ShardedStream(Stream):
+    """Iterate over many files, one after another, as a single datastream.
+
+    Shards are read in the given order, or in sorted order when a glob pattern
+    is given. The next shard is opened on a background thread while the current
+    one is consumed. Every shard must have the same schema as the first one,
+    which is checked when the shard is opened.
+
+    >>> from tempfile import mkdtemp
+    >>> import pandas as pd
+    >>> from capymoa.stream import ShardedStream
+    >>> directory = mkdtemp()
+    >>> df = pd.read_csv("data/electricity_tiny.csv")
+    >>> for hour in range(4):
+    ...     df[hour * 500 : (hour + 1) * 500].to_parquet(f"{directory}/{hour:02d}.parquet")
+    >>> stream = ShardedStream(f"{directory}/*.parquet", target_type="categorical",
+    ...                        values_for_class_label=["0", "1"])
+    >>> len(stream)
+    2000
+    >>> stream.next_instance()
+    LabeledInstance(
+        Schema(00),
+        x=ndarray(..., 6),
+        y_index=1,
+        y_label='1'
+    )
+
+    Shards whose label values are inferred from their own data, such as CSV
+    and Parquet files, should be given ``values_for_class_label`` so that they
+    all share one schema.
+    """
+
+    def __init__(
+        self,
+        paths: Union[str, Path, Sequence[Union[str, Path]]],
+        format: Union[str, Callable[..., Stream], None] = None,
+        lengths: Optional[Sequence[int]] = None,
+        **kwargs,
+    ):
+        """Construct a ShardedStream from a list of paths or a glob pattern.
+
+        :param paths: A glob pattern such as ``"logs/*.csv.gz"`` or a sequence of paths.
+        :param format: ``"arff"``, ``"csv"``, ``"parquet"``, ``"arrow"``, ``"feather"``,
+            ``"binary"`` (see :func:`capymoa.stream.to_binary`) or a function that
+            opens a path as a stream. If None, it is inferred from the suffix of
+            the first shard.
+        :param lengths: The number of instances in each shard, if known beforehand.
+        :param kwargs: Keyword arguments given to the stream of each shard.
+        :raises ValueError: If there are no shards, the format is unknown or
+            ``lengths`` does not match the shards.
+        """
+        if isinstance(paths, (str, Path)):
+            self.paths = sorted(glob.glob(str(paths)))
+        else:
+            self.paths = [str(path) for path in paths]
+        if len(self.paths) == 0:
+            raise ValueError(f"No shards found for {paths}")
+        if lengths is not None and len(lengths) != len(self.paths):
+            raise ValueError("lengths must have one entry per shard")
+
+        if format is None:
+            suffix = _uncompressed_suffix(self.paths[0])
+            format = "binary" if suffix == "" else suffix[1:]
+        if isinstance(format, str):
+            if format not in _FORMATS:
+                raise ValueError(
+                    f"Unknown format {format!r}, expected one of {list(_FORMATS)}"
+                )
+            format = _FORMATS[format]
+        self._open_shard = format
+        self._kwargs = kwargs
+        self._lengths = None if lengths is None else list(lengths)
+
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._shard_index = 0
+        self._shard: Stream = self._open(0)
+        self._next_shard: Optional[Future] = None
+        self._signature = _schema_signature(self._shard.get_schema())
+        self._prefetch(1)
+
+        super().__init__(schema=self._shard.get_schema(), CLI=None, moa_stream=None)
+
+    def _open(self, index: int) -> Stream:
+        return self._open_shard(self.paths[index], **self._kwargs)
+
+    def _prefetch(self, index: int):
+        """Open the shard at ``index`` in the background."""
+        self._next_shard = None
+        if index < len(self.paths):
+            self._next_shard = self._executor.submit(self._open, index)
+
+    def _advance(self) -> bool:
+        """Move to the next shard. Return False after the last shard."""
+        if self._next_shard is None:
+            return False
+        shard = self._next_shard.result()
+        if _schema_signature(shard.get_schema()) != self._signature:
+            raise ValueError(
+                f"Shard {self.paths[self._shard_index + 1]} does not have the "
+                f"schema of {self.paths[0]}"
+            )
+        self._shard_index += 1
+        self._shard = shard
+        self._prefetch(self._shard_index + 1)
+        return True
+
+    def __len__(self) -> int:
+        if self._lengths is None:
+            lengths = []
+            for index in range(len(self.paths)):
+                if index == self._shard_index:
+                    lengths.append(self._shard_length(self._shard, index))
+                    continue
+                length = _metadata_length(
+                    self._open_shard, self.paths[index], self._kwargs
+                )
+                if length is None:
+                    shard = self._open(index)
+                    try:
+                        length = self._shard_length(shard, index)
+                    finally:
+                        # Shards such as CSV files hold an open file handle.
+                        close = getattr(shard, "close", None)
+                        if close is not None:
+                            close()
+                lengths.append(length)
+            self._lengths = lengths
+        return sum(self._lengths)
+
+    def _shard_length(self, shard: Stream, index: int) -> int:
+        try:
+            return len(shard)
+        except TypeError:
+            raise TypeError(
+                f"The length of shard {self.paths[index]} is unknown"
+            ) from None
+
+    def has_more_instances(self) -> bool:
+        while not self._shard.has_more_instances():
+            if not self._advance():
+                return False
+        return True
+
+    def next_instance(self) -> Union[LabeledInstance, RegressionInstance]:
+        if not self.has_more_instances():
+            return None
+        return self._shard.next_instance()
+
+    def next_batch(self, n: int) -> Optional[InstanceBatch]:
+        if n < 1:
+            raise ValueError("n must be a positive integer")
+        batches: List[InstanceBatch] = []
+        remaining = n
+        while remaining > 0 and self.has_more_instances():
+            batch = self._shard.next_batch(remaining)
+            batches.append(batch)
+            remaining -= len(batch)
+        if len(batches) == 0:
+            return None
+        if len(batches) == 1:
+            return InstanceBatch(self.schema, batches[0].x, batches[0].y)
+        # Shards opened with their own types are joined in the type of the
+        # first one rather than promoted.
+        return InstanceBatch(
+            self.schema,
+            np.concatenate([batch.x for batch in batches], dtype=self.schema.dtype),
+            np.concatenate([batch.y for batch in batches]),
+        )
+
+    def get_schema(self):
+        return self.schema
+
+    def get_moa_stream(self):
+        raise ValueError("Not a moa_stream, a stream over many files")
+
+    def restart(self):
+        if self._shard_index == 0:
+            self._shard.restart()
+            return
+        if self._next_shard is not None:
+            self._next_shard.cancel()
+        self._shard_index = 0
+        self._shard = self._open(0)
+        self._prefetch(1)
@@ -0,0 +1,116 @@
+"""A datastream over a sparse matrix that never densifies its instances."""
+
+from typing import Optional, Sequence, Union
+
+import numpy as np
+from scipy import sparse
+
+from capymoa.instance import (
+    InstanceBatch,
+    SparseLabeledInstance,
+    SparseRegressionInstance,
+)
+from capymoa.stream._stream import Stream, _targets_and_schema
+
+
+class SparseNumpyStream(Stream):
+    """A datastream originating from a ``scipy.sparse`` matrix.
+
+    Rows are returned as :class:`~capymoa.instance.SparseLabeledInstance` or
+    :class:`~capymoa.instance.SparseRegressionInstance` views into the CSR
+    arrays, MOA learners receive them as ``SparseInstance`` objects and
+    :meth:`next_batch` returns batches whose ``x`` is a CSR matrix. Memory and
+    conversion costs scale with the number of non-zeros, not the number of
+    features.
+
+    >>> import numpy as np
+    >>> from scipy import sparse
+    >>> from capymoa.stream import SparseNumpyStream
+    >>> X = sparse.random(100, 10_000, density=1e-3, format="csr", random_state=1)
+    >>> stream = SparseNumpyStream(X, np.arange(100) % 2, target_type="categorical")
+    >>> stream.next_instance()
+    SparseLabeledInstance(
+        Schema(No_Name),
+        x=sparse(nnz=8, 10000),
+        y_index=0,
+        y_label='0'
+    )
+    >>> stream.next_batch(10).x.shape
+    (10, 10000)
+    """
+
+    def __init__(
+        self,
+        X: sparse.spmatrix,
+        y: np.ndarray,
+        dataset_name: str = "No_Name",
+        feature_names: Optional[Sequence[str]] = None,
+        target_name: Optional[str] = None,
+        target_type: Optional[str] = None,
+        dtype=None,
+    ):
+        """Construct a SparseNumpyStream from a sparse matrix.
+
+        :param X: A sparse matrix of shape (n_samples, n_features), converted
+            to CSR if it is in another format.
+        :param y: Numpy array of shape (n_samples,) with the target values
+        :param dataset_name: The name to give to the datastream, defaults to "No_Name"
+        :param feature_names: The names given to the features, defaults to None
+        :param target_name: The name given to target values, defaults to None
+        :param target_type: 'categorical' or 'numeric' target, defaults to None
+        :param dtype: The floating point type of the features, see
+            :attr:`capymoa.stream.Schema.dtype`.
+        :raises ValueError: If ``X`` and ``y`` do not have the same number of samples.
+        """
+        X = sparse.csr_matrix(X)
+        y = np.asarray(y)
+        if X.shape[0] != len(y):
+            raise ValueError("X and y must have the same number of samples")
+
+        self._y, self.schema = _targets_and_schema(
+            y, X.shape[1], dataset_name, feature_names, target_name, target_type, dtype
+        )
+        self._X = X.astype(self.schema.dtype, copy=False)
+        self._X.sort_indices()  # MOA expects the indexes of sparse instances in order
+        self.current_instance_index = 0
+        super().__init__(schema=self.schema, CLI=None, moa_stream=None)
+
+    def __len__(self) -> int:
+        return self._X.shape[0]
+
+    def has_more_instances(self) -> bool:
+        return self._X.shape[0] > self.current_instance_index
+
+    def next_instance(self) -> Union[SparseLabeledInstance, SparseRegressionInstance]:
+        if not self.has_more_instances():
+            return None
+        i = self.current_instance_index
+        self.current_instance_index += 1
+        start, stop = self._X.indptr[i], self._X.indptr[i + 1]
+        indices = self._X.indices[start:stop]
+        values = self._X.data[start:stop]
+        if self.schema.is_classification():
+            return SparseLabeledInstance(self.schema, indices, values, int(self._y[i]))
+        return SparseRegressionInstance(self.schema, indices, values, float(self._y[i]))
+
+    def next_batch(self, n: int) -> Optional[InstanceBatch]:
+        if n < 1:
+            raise ValueError("n must be a positive integer")
+        if not self.has_more_instances():
+            return None
+        start = self.current_instance_index
+        self.current_instance_index = min(start + n, len(self))
+        return InstanceBatch(
+            self.schema,
+            self._X[start : self.current_instance_index],
+            self._y[start : self.current_instance_index],
+        )
+
+    def get_schema(self):
+        return self.schema
+
+    def get_moa_stream(self):
+        raise ValueError("Not a moa_stream, a sparse matrix")
+
+    def restart(self):
+        self.current_instance_index = 0
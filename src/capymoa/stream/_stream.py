@@ -1,6 +1,9 @@
+import copy
+import itertools
 import typing
 import warnings
-from typing import Dict, Optional, Sequence, Union
+from types import MappingProxyType
+from typing import Dict, Iterator, Mapping, Optional, Sequence, Tuple, Union
 
 import numpy as np
 from numpy.lib import recfunctions as rfn
@@ -14,16 +17,119 @@ from com.yahoo.labs.samoa.instances import (
 from moa.core import FastVector, InstanceExample
 from moa.streams import ArffFileStream, InstanceStream
 from java.lang import RuntimeException
+from jpype import JArray
 
 
+from capymoa.stream._compressed import (
+    _ArffDataReader,
+    _compression,
+    _open_binary,
+    _uncompressed_suffix,
+)
+from capymoa.env import capymoa_float_dtype
+from capymoa.stream._line_index import _LineIndex
 from capymoa.instance import (
     Instance,
+    InstanceBatch,
     LabeledInstance,
     RegressionInstance,
+    _features_from_values,
+    _java_values,
+    _values_from_features,
 )
 
 
 # Private functions
+def _next_batch_from_blocks(stream, n: int) -> Optional[InstanceBatch]:
+    """Slice the next ``n`` rows from the ``_x_block`` and ``_y_block`` arrays
+    of a stream that reads its data in blocks.
+
+    The stream's ``has_more_instances`` must load the next block into
+    ``_x_block``/``_y_block`` and reset ``_block_index`` once the current one
+    is exhausted. A batch within a single block is a view of that block.
+    """
+    if n < 1:
+        raise ValueError("n must be a positive integer")
+    x_parts, y_parts = [], []
+    while n > 0 and stream.has_more_instances():
+        start = stream._block_index
+        stop = min(start + n, len(stream._x_block))
+        x_parts.append(stream._x_block[start:stop])
+        y_parts.append(stream._y_block[start:stop])
+        stream._block_index = stop
+        n -= stop - start
+    if len(x_parts) == 0:
+        return None
+    x = x_parts[0] if len(x_parts) == 1 else np.concatenate(x_parts)
+    y = y_parts[0] if len(y_parts) == 1 else np.concatenate(y_parts)
+    return InstanceBatch(stream.schema, x, _batch_targets(stream.schema, y))
+
+
+def _batch_targets(schema, y: np.ndarray) -> np.ndarray:
+    """Return ``y`` as class indexes for classification or as float64 target
+    values for regression, without copying when it already has that type."""
+    if schema.is_classification():
+        return y.astype(np.int_, copy=False)
+    return y.astype(np.float64, copy=False)
+
+
+def _targets_and_schema(
+    y: np.ndarray,
+    num_features: int,
+    dataset_name: str,
+    feature_names: Optional[Sequence[str]],
+    target_name: Optional[str],
+    target_type: Optional[str],
+    dtype=None,
+) -> Tuple[np.ndarray, "Schema"]:
+    """Encode the targets of an in-memory dataset and build its schema.
+
+    :return: The class indexes (classification) or target values (regression)
+        and the schema.
+    """
+    class_labels = (
+        None
+        if not _target_is_categorical(y, target_type) or target_type == "numeric"
+        else [str(value) for value in np.unique(y)]
+    )
+    if class_labels is None:
+        targets = y.astype(np.float64)
+    elif np.issubdtype(y.dtype, np.number):
+        # Numeric labels are used as the index of the class value, which
+        # is how MOA interprets them with ``setClassValue``.
+        targets = y.astype(np.int64)
+    else:
+        # Labels such as strings or booleans are mapped to the index of
+        # their string representation.
+        _, targets = np.unique(y, return_inverse=True)
+
+    feature_names = (
+        [f"attrib_{i}" for i in range(num_features)]
+        if feature_names is None
+        else feature_names
+    )
+    _, moa_header = _init_moa_stream_and_create_moa_header(
+        number_of_instances=0,  # only the header is needed
+        feature_names=feature_names,
+        values_for_class_label=class_labels,
+        dataset_name=dataset_name,
+        target_attribute_name=target_name,
+        target_type=target_type,
+    )
+    return targets, Schema(moa_header=moa_header, dtype=dtype)
+
+
+def _float_dtype(dtype) -> np.dtype:
+    """Return ``dtype`` as a NumPy floating point type supported for features,
+    or the default type if it is None."""
+    if dtype is None:
+        return capymoa_float_dtype()
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float64, np.float32):
+        raise ValueError(f"dtype must be float64 or float32, got {dtype}")
+    return dtype
+
+
 def _target_is_categorical(targets, target_type):
     if target_type is None:
         if type(targets[0]) == str or type(targets[0]) == bool:
@@ -56,61 +162,138 @@ class Schema:
     :meth:`from_custom` method.
     """
 
-    def __init__(self, moa_header: InstancesHeader):
+    def __init__(self, moa_header: InstancesHeader, dtype=None):
         """Construct a schema by wrapping a ``InstancesHeader``.
 
         To create a schema without an ``InstancesHeader`` use
         :meth:`from_custom` method.
 
         :param moa_header: A Java MOA header object.
+        :param dtype: The floating point type of the features, ``float64`` or
+            ``float32``. Defaults to None which uses
+            :func:`capymoa.env.capymoa_float_dtype`.
+        :raises ValueError: If ``dtype`` is not ``float64`` or ``float32``.
         """
         assert (
             moa_header.numOutputAttributes() == 1
         ), "Only one output attribute is supported."
 
         self._moa_header = moa_header
+        self._dtype = _float_dtype(dtype)
         # Internally, we store the number of attributes + the class/target.
         # This is because MOA methods expect the numAttributes to also account for the class/target.
         self._regression = not self._moa_header.outputAttribute(1).isNominal()
         self._label_values: Optional[Sequence[str]] = None
         self._label_index_map: Optional[Dict[str, int]] = None
+        self._label_indexes: Optional[Sequence[int]] = None
 
+        # Everything needed per instance is looked up once here, so that the
+        # per-instance accessors do not cross into the JVM.
+        self._class_index = int(moa_header.classIndex())
+        self._num_attributes = int(moa_header.numAttributes()) - int(
+            moa_header.numOutputAttributes()
+        )
+        self._dataset_name = str(moa_header.getRelationName())
+        self._num_classes = 1
         if not self._regression:
             values = self._moa_header.outputAttribute(1).getAttributeValues()
             self._label_values = list(map(str, values))
             self._label_index_map = {
                 label: i for i, label in enumerate(self._label_values)
             }
-
-        # TODO: iterate over the attributes and create a dictionary representation for the nominal attributes.
-        # There should be a way to configure that manually like setting the self.labels instead of using a MOA header.
+            self._label_indexes = list(range(len(self._label_values)))
+            self._num_classes = len(self._label_values)
+
+        # The attribute tables cost a few JVM calls per attribute, so they are
+        # only built when first needed.
+        self._attribute_names: Optional[Tuple[str, ...]] = None
+        self._nominal_values: Optional[Mapping[str, Tuple[str, ...]]] = None
+        self._nominal_mask: Optional[np.ndarray] = None
+
+    def _load_attributes(self):
+        names, nominal_values, nominal_mask = [], {}, []
+        for i in range(self._moa_header.numAttributes()):
+            if i == self._class_index:
+                continue
+            attribute = self._moa_header.attribute(i)
+            name = str(attribute.name())
+            names.append(name)
+            nominal_mask.append(bool(attribute.isNominal()))
+            if nominal_mask[-1]:
+                nominal_values[name] = tuple(map(str, attribute.getAttributeValues()))
+        self._attribute_names = tuple(names)
+        self._nominal_values = MappingProxyType(nominal_values)
+        self._nominal_mask = np.array(nominal_mask, dtype=bool)
+        self._nominal_mask.flags.writeable = False
 
     def _assert_classification(self):
-        if not self.is_classification():
+        if self._regression:
             raise RuntimeError("Should only be called for classification problems.")
 
     def get_label_values(self) -> Sequence[str]:
-        """Return the possible values for the class label."""
+        """Return the possible values for the class label.
+
+        The list is shared by every caller and must not be modified.
+        """
         self._assert_classification()
         return self._label_values
 
     def get_label_indexes(self) -> Sequence[int]:
-        """Return the possible indexes for the class label."""
+        """Return the possible indexes for the class label.
+
+        The list is shared by every caller and must not be modified.
+        """
         self._assert_classification()
-        return list(range(self.get_num_classes()))
+        return self._label_indexes
 
     def get_value_for_index(self, y_index: Optional[int]) -> Optional[str]:
         """Return the value for the class label index y_index."""
-        self._assert_classification()
+        if self._regression:
+            self._assert_classification()
         if y_index is None:
             return None
         return self._label_values[y_index]
 
     def get_index_for_label(self, y: str):
         """Return the index for the class label y."""
-        self._assert_classification()
+        if self._regression:
+            self._assert_classification()
         return self._label_index_map[y]
 
+    def get_attribute_names(self) -> Tuple[str, ...]:
+        """Return the names of the attributes, excluding the target attribute.
+
+        >>> from capymoa.stream import Schema
+        >>> schema = Schema.from_custom(
+        ...     ["f1", "f2"],
+        ...     values_for_nominal_features={"f2": ["a", "b"]},
+        ...     values_for_class_label=["yes", "no"],
+        ... )
+        >>> schema.get_attribute_names()
+        ('f1', 'f2')
+        >>> schema.get_nominal_values()["f2"]
+        ('a', 'b')
+        >>> schema.get_nominal_mask()
+        array([False,  True])
+        """
+        if self._attribute_names is None:
+            self._load_attributes()
+        return self._attribute_names
+
+    def get_nominal_values(self) -> Mapping[str, Tuple[str, ...]]:
+        """Return a read-only mapping from the name of each nominal attribute
+        to its possible values."""
+        if self._nominal_values is None:
+            self._load_attributes()
+        return self._nominal_values
+
+    def get_nominal_mask(self) -> np.ndarray:
+        """Return a read-only boolean array that is True for the nominal
+        attributes, in the order of the feature vectors."""
+        if self._nominal_mask is None:
+            self._load_attributes()
+        return self._nominal_mask
+
     def get_moa_header(self) -> InstancesHeader:
         """Get the JAVA MOA header. Useful for advanced users.
 
@@ -121,13 +304,11 @@ class Schema:
 
     def get_num_attributes(self) -> int:
         """Return the number of attributes excluding the target attribute."""
-        return self._moa_header.numAttributes() - self._moa_header.numOutputAttributes()
+        return self._num_attributes
 
     def get_num_classes(self) -> int:
         """Return the number of possible classes. If regression, returns 1."""
-        if self._regression:
-            return 1
-        return len(self._label_values)
+        return self._num_classes
 
     def is_regression(self) -> bool:
         """Return True if the problem is a regression problem."""
@@ -139,12 +320,44 @@ class Schema:
 
     def is_y_index_in_range(self, y_index: int) -> bool:
         """Return True if the y_index is in the range of the class label indexes."""
-        return 0 <= y_index < self.get_num_classes()
+        return 0 <= y_index < self._num_classes
 
     @property
     def dataset_name(self) -> str:
         """Returns the name of the dataset."""
-        return self._moa_header.getRelationName()
+        return self._dataset_name
+
+    @property
+    def dtype(self) -> np.dtype:
+        """The floating point type of the features of the stream.
+
+        Streams produce feature arrays of this type and the batch buffers and
+        NumPy-based learners of the stream use it too. MOA only works with
+        ``float64``: features are converted to this type when they are copied
+        out of a Java instance, and back to ``float64`` when a Java instance is
+        built from them. Targets keep their own types.
+
+        >>> from capymoa.stream import Schema
+        >>> schema = Schema.from_custom(["f1", "f2"], values_for_class_label=["yes", "no"])
+        >>> schema.dtype
+        dtype('float64')
+        >>> schema.with_dtype("float32").dtype
+        dtype('float32')
+        """
+        return self._dtype
+
+    def with_dtype(self, dtype) -> "Schema":
+        """Return a copy of the schema whose features are of type ``dtype``.
+
+        :param dtype: ``float64`` or ``float32``.
+        :raises ValueError: If ``dtype`` is not ``float64`` or ``float32``.
+        """
+        dtype = _float_dtype(dtype)
+        if dtype == self._dtype:
+            return self
+        schema = copy.copy(self)
+        schema._dtype = dtype
+        return schema
 
     @staticmethod
     def from_custom(
@@ -154,6 +367,7 @@ class Schema:
         dataset_name="No_Name",
         target_attribute_name=None,
         target_type=None,
+        dtype=None,
     ):
         """Create a CapyMOA Schema that defines each attribute in the stream.
 
@@ -201,6 +415,7 @@ class Schema:
         :param target_attribute_name: Name of the target/class attribute.
             Default is None.
         :param target_type: Set the target type as 'categorical' or 'numeric', None to detect automatically.
+        :param dtype: The floating point type of the features, see :attr:`dtype`.
         :return CayMOA Schema: Initialized CapyMOA Schema which contain all
             necessary attribute information for all features and the class label
         """
@@ -212,7 +427,7 @@ class Schema:
             target_attribute_name=target_attribute_name,
             target_type=target_type,
         )
-        return Schema(moa_header=moa_header)
+        return Schema(moa_header=moa_header, dtype=dtype)
 
     def __repr__(self) -> str:
         """Return a string representation of the schema as an ARFF header."""
@@ -236,6 +451,7 @@ class Stream:
         moa_stream: Optional[InstanceStream] = None,
         schema: Optional[Schema] = None,
         CLI: Optional[str] = None,
+        dtype=None,
     ):
         """Construct a Stream from a MOA stream object.
 
@@ -247,6 +463,9 @@ class Stream:
         :param schema: The schema of the stream. If None, the schema is inferred
             from the moa_stream.
         :param CLI: Additional command line arguments to pass to the MOA stream.
+        :param dtype: The floating point type of the features, ``float64`` or
+            ``float32``. Defaults to None which keeps the type of the schema,
+            see :attr:`Schema.dtype`.
         :raises ValueError: If no schema is provided and no moa_stream is provided.
         :raises ValueError: If command line arguments are provided without a moa_stream.
         """
@@ -270,6 +489,8 @@ class Stream:
             self.schema = Schema(moa_header=self.moa_stream.getHeader())
         elif self.moa_stream is not None:
             self.moa_stream.prepareForUse()
+        if dtype is not None:
+            self.schema = self.schema.with_dtype(dtype)
 
     def __str__(self):
         """Return the name of the datastream from the schema."""
@@ -305,6 +526,92 @@ class Stream:
                 "or classification task"
             )
 
+    def next_batch(self, n: int) -> Optional[InstanceBatch]:
+        """Return the next ``n`` instances of the stream as a batch of arrays.
+
+        The last batch of a stream may contain fewer than ``n`` instances.
+
+        >>> from capymoa.stream import stream_from_file
+        >>> stream = stream_from_file("data/electricity_tiny.arff")
+        >>> batch = stream.next_batch(128)
+        >>> batch.x.shape, batch.y.shape
+        ((128, 6), (128,))
+
+        :param n: The maximum number of instances in the batch.
+        :raises ValueError: If ``n`` is not a positive integer.
+        :return: A batch of instances or None if the stream has no more instances.
+        """
+        if n < 1:
+            raise ValueError("n must be a positive integer")
+        if self.moa_stream is not None:
+            return self._next_moa_batch(n)
+        instances = []
+        while len(instances) < n and self.has_more_instances():
+            instances.append(self.next_instance())
+        if len(instances) == 0:
+            return None
+        return InstanceBatch.from_instances(self.schema, instances)
+
+    def _next_moa_batch(self, n: int) -> Optional[InstanceBatch]:
+        """Read a batch straight from the MOA stream, copying the values of
+        each Java instance in bulk without creating instance objects."""
+        rows = []
+        while len(rows) < n and self.moa_stream.hasMoreInstances():
+            rows.append(_java_values(self.moa_stream.nextInstance().getData()))
+        if len(rows) == 0:
+            return None
+        values = np.stack(rows)
+        class_index = self.schema._class_index
+        return InstanceBatch(
+            self.schema,
+            np.ascontiguousarray(
+                _features_from_values(values, class_index), dtype=self.schema.dtype
+            ),
+            _batch_targets(self.schema, values[:, class_index]),
+        )
+
+    def iter_batches(self, n: int) -> Iterator[InstanceBatch]:
+        """Iterate over the remaining instances of the stream in batches.
+
+        >>> from capymoa.stream import stream_from_file
+        >>> stream = stream_from_file("data/electricity_tiny.csv")
+        >>> sum(len(batch) for batch in stream.iter_batches(512))
+        2000
+
+        :param n: The maximum number of instances in each batch.
+        :return: An iterator over batches of at most ``n`` instances.
+        """
+        batch = self.next_batch(n)
+        while batch is not None:
+            yield batch
+            batch = self.next_batch(n)
+
+    def iter_instances(
+        self, batch_size: int = 1024, reuse: bool = False
+    ) -> Iterator[Union[LabeledInstance, RegressionInstance]]:
+        """Iterate over the remaining instances of the stream, reading them in
+        batches.
+
+        With ``reuse=True`` one instance object is recycled for every instance
+        of the stream (see :meth:`capymoa.instance.InstanceBatch.iter_reused`),
+        so hot loops do not allocate an object per instance. Each instance is
+        then only valid until the iterator advances.
+
+        >>> from capymoa.stream import stream_from_file
+        >>> stream = stream_from_file("data/electricity_tiny.csv")
+        >>> sum(instance.y_index for instance in stream.iter_instances(reuse=True))
+        792
+
+        :param batch_size: The number of instances read at once, defaults to 1024.
+        :param reuse: Recycle a single instance object, defaults to False.
+        :return: An iterator over the instances of the stream.
+        """
+        for batch in self.iter_batches(batch_size):
+            if reuse:
+                yield from batch.iter_reused()
+            else:
+                yield from batch
+
     def get_schema(self) -> Schema:
         """Return the schema of the stream."""
         return self.schema
@@ -319,27 +626,114 @@ class Stream:
 
 
 class ARFFStream(Stream):
-    """A datastream originating from an ARFF file."""
+    """A datastream originating from an ARFF file.
+
+    Plain ARFF files are read by MOA. Files compressed with gzip, bzip2, xz or
+    zstd (``.gz``, ``.bz2``, ``.xz`` or ``.zst``) are decompressed while they
+    are read, without extracting them to disk, and parsed in chunks of rows.
+    Restarting a compressed stream reopens the file.
+    """
 
     def __init__(
             self,
             path: str,
             CLI: Optional[str] = None,
-            class_index: int = -1
+            class_index: int = -1,
+            dtype=None,
     ):
         """Construct an ARFFStream object from a file path.
 
         :param path: A filepath
         :param CLI: Additional command line arguments to pass to the MOA stream.
+            Not supported for compressed files.
+        :param class_index: The class attribute, -1 for the last attribute,
+            otherwise the 1-based index of the attribute.
+        :param dtype: The floating point type of the features, see
+            :attr:`Schema.dtype`.
         """
-        moa_stream = ArffFileStream(path, class_index)
-        super().__init__(moa_stream=moa_stream, CLI=CLI)
+        self._reader: Optional[_ArffDataReader] = None
+        if _compression(path) is None:
+            moa_stream = ArffFileStream(str(path), class_index)
+            super().__init__(moa_stream=moa_stream, CLI=CLI, dtype=dtype)
+            return
+
+        self._reader = _ArffDataReader(path, class_index)
+        self._x_block: Optional[np.ndarray] = None
+        self._y_block: Optional[np.ndarray] = None
+        self._block_index = 0
+        super().__init__(
+            schema=Schema(moa_header=self._reader.moa_header, dtype=dtype), CLI=CLI
+        )
+
+    def _read_chunk(self) -> bool:
+        values = self._reader.read_chunk()
+        if values is None:
+            self._x_block, self._y_block = None, None
+            return False
+        class_index = self._reader.moa_header.classIndex()
+        self._x_block = np.ascontiguousarray(
+            _features_from_values(values, class_index), dtype=self.schema.dtype
+        )
+        self._y_block = _batch_targets(self.schema, values[:, class_index])
+        self._block_index = 0
+        return True
+
+    def has_more_instances(self) -> bool:
+        if self._reader is None:
+            return super().has_more_instances()
+        if self._x_block is not None and self._block_index < len(self._x_block):
+            return True
+        return self._read_chunk()
+
+    def next_instance(self) -> Union[LabeledInstance, RegressionInstance]:
+        if self._reader is None:
+            return super().next_instance()
+        if not self.has_more_instances():
+            return None
+
+        x = self._x_block[self._block_index]
+        y = self._y_block[self._block_index]
+        self._block_index += 1
+        if self.schema.is_classification():
+            return LabeledInstance.from_array(self.schema, x, int(y))
+        return RegressionInstance.from_array(self.schema, x, float(y))
+
+    def next_batch(self, n: int) -> Optional[InstanceBatch]:
+        if self._reader is None:
+            return super().next_batch(n)
+        return _next_batch_from_blocks(self, n)
+
+    def restart(self):
+        if self._reader is None:
+            return super().restart()
+        self._reader.restart()
+        self._x_block, self._y_block = None, None
+        self._block_index = 0
 
 
 class NumpyStream(Stream):
-    """A datastream originating from a numpy array."""
+    """A datastream originating from a numpy array.
+
+    The arrays are kept as they are and each instance is a view into a row of
+    ``X``. No Java object is created unless a MOA learner asks for the
+    :attr:`~capymoa.instance.Instance.java_instance` of an instance.
+
+    >>> import numpy as np
+    >>> from capymoa.stream import NumpyStream
+    >>> X = np.array([[0.1, 0.2], [0.3, 0.4], [0.5, 0.6]])
+    >>> y = np.array([0, 1, 0])
+    >>> stream = NumpyStream(X, y, dataset_name="Toy", target_type="categorical")
+    >>> len(stream)
+    3
+    >>> stream.next_instance()
+    LabeledInstance(
+        Schema(Toy),
+        x=ndarray(..., 2),
+        y_index=0,
+        y_label='0'
+    )
+    """
 
-    # This class is more complex than ARFFStream because it needs to read and convert the CSV to an ARFF in memory.
     # target_type to specify the target as 'categorical' or 'numeric', None for detecting automatically.
 
     def __init__(
@@ -350,6 +744,7 @@ class NumpyStream(Stream):
         feature_names=None,
         target_name=None,
         target_type: str = None,   # numeric or categorical
+        dtype=None,
     ):
         """Construct a NumpyStream object from a numpy array.
 
@@ -359,46 +754,43 @@ class NumpyStream(Stream):
         :param feature_names: The names given to the features, defaults to None
         :param target_name: The name given to target values, defaults to None
         :param target_type: 'categorical' or 'numeric' target, defaults to None
+        :param dtype: The floating point type of the features, see
+            :attr:`Schema.dtype`. ``X`` is not copied when it already has this
+            type.
         """
-        self.current_instance_index = 0
+        X = np.asarray(X)
+        y = np.asarray(y)
+        if X.ndim != 2:
+            raise ValueError("X must be a 2D array of shape (n_samples, n_features)")
+        if len(X) != len(y):
+            raise ValueError("X and y must have the same number of samples")
 
-        self.arff_instances_data, self.arff_instances_header, class_labels = (
-            _numpy_to_arff(
-                X,
-                y,
-                dataset_name,
-                feature_names=feature_names,
-                target_name=target_name,
-                target_type=target_type,
-            )
+        self.current_instance_index = 0
+        self._y, self.schema = _targets_and_schema(
+            y, X.shape[1], dataset_name, feature_names, target_name, target_type, dtype
         )
-
-        self.schema = Schema(moa_header=self.arff_instances_header)
-
+        self._X = X.astype(self.schema.dtype, copy=False)
         super().__init__(schema=self.schema, CLI=None, moa_stream=None)
 
+    def __len__(self) -> int:
+        return len(self._X)
+
     def has_more_instances(self):
-        return self.arff_instances_data.numInstances() > self.current_instance_index
+        return len(self._X) > self.current_instance_index
 
     def next_instance(self) -> Union[LabeledInstance, RegressionInstance]:
         # Return None if all instances have been read already.
         if not self.has_more_instances():
             return None
 
-        instance = self.arff_instances_data.instance(self.current_instance_index)
+        x = self._X[self.current_instance_index]
+        y = self._y[self.current_instance_index]
         self.current_instance_index += 1
 
-        # TODO: We should natively support Numpy as a type of instance, rather
-        # than converting it to a Java instance. We can probably combine the logic
-        # for pytorch and numpy into a single method.
         if self.schema.is_classification():
-            return LabeledInstance.from_java_instance(
-                self.schema, InstanceExample(instance)
-            )
+            return LabeledInstance.from_array(self.schema, x, int(y))
         elif self.schema.is_regression():
-            return RegressionInstance.from_java_instance(
-                self.schema, InstanceExample(instance)
-            )
+            return RegressionInstance.from_array(self.schema, x, float(y))
         else:
             raise ValueError(
                 "Unknown machine learning task must be a regression or "
@@ -408,6 +800,19 @@ class NumpyStream(Stream):
     def get_schema(self):
         return self.schema
 
+    def next_batch(self, n: int) -> Optional[InstanceBatch]:
+        if n < 1:
+            raise ValueError("n must be a positive integer")
+        if not self.has_more_instances():
+            return None
+        start = self.current_instance_index
+        self.current_instance_index = min(start + n, len(self._X))
+        return InstanceBatch(
+            self.schema,
+            self._X[start : self.current_instance_index],
+            self._y[start : self.current_instance_index],
+        )
+
     def get_moa_stream(self):
         raise ValueError("Not a moa_stream, a numpy read file")
 
@@ -420,6 +825,7 @@ def stream_from_file(
     dataset_name: str = "NoName",
     class_index: int = -1,
     target_type: str = None,  # "numeric" or "categorical"
+    dtype=None,
 ) -> Stream:
     """Create a datastream from a csv or arff file.
 
@@ -435,7 +841,8 @@ def stream_from_file(
     >>> stream.next_instance().x
     array([0.021277, 0.051699, 0.415055, 0.003467, 0.422915, 0.414912])
 
-    :param path_to_csv_or_arff: A file path to a CSV or ARFF file.
+    :param path_to_csv_or_arff: A file path to a CSV or ARFF file, optionally
+        compressed with gzip, bzip2, xz or zstd (e.g. ``data.arff.gz``).
     :param dataset_name: A descriptive name given to the dataset, defaults to "NoName"
     :param class_index: The index of the column containing the class label. By default, the algorithm assumes that the
         class label is located in the column specified by this index. However, if the class label is located in a
@@ -443,19 +850,26 @@ def stream_from_file(
     :param target_type: When working with a CSV file, this parameter
         allows the user to specify the target values in the data to be interpreted as categorical or numeric.
         Defaults to None to detect automatically.
+    :param dtype: The floating point type of the features, see
+        :attr:`Schema.dtype`. Defaults to None which uses
+        :func:`capymoa.env.capymoa_float_dtype`.
     """
     assert path_to_csv_or_arff is not None, "A file path must be provided."
-    if path_to_csv_or_arff.endswith(".arff"):
+    suffix = _uncompressed_suffix(path_to_csv_or_arff)
+    if suffix == ".arff":
         try:
             # Delegate to the ARFFFileStream object within ARFFStream to read the file.
-            return ARFFStream(path=path_to_csv_or_arff, class_index=class_index)
+            return ARFFStream(
+                path=path_to_csv_or_arff, class_index=class_index, dtype=dtype
+            )
         except RuntimeException as ex:
             if 'ArffFileStream restart failed' in str(ex):
                 raise FileNotFoundError("Failed to open ARFF file stream, file could not be found.") from None
             else:
                 raise
-    elif path_to_csv_or_arff.endswith(".csv"):
-        x_features = np.genfromtxt(path_to_csv_or_arff, delimiter=",", skip_header=1)
+    elif suffix == ".csv":
+        with _open_binary(path_to_csv_or_arff) as file:
+            x_features = np.genfromtxt(file, delimiter=",", skip_header=1)
         targets = x_features[:, class_index]
         if _target_is_categorical(targets, target_type) and type(targets[0]) == np.float64:
             targets = targets.astype(np.int64)
@@ -465,6 +879,7 @@ def stream_from_file(
             targets,
             dataset_name=dataset_name,
             target_type=target_type,
+            dtype=dtype,
         )
 
 
@@ -584,22 +999,59 @@ def _init_moa_stream_and_create_moa_header(
 
 
 def _add_instances_to_moa_stream(moa_stream, moa_header, X, y):
-    for instance_index in range(X.shape[0]):
-        instance = DenseInstance(moa_header.numAttributes())
+    y = np.asarray(y)
+    if not np.issubdtype(y.dtype, np.number):
+        # Labels given by value are stored as the index of that value.
+        class_attribute = moa_header.classAttribute()
+        y = np.array([class_attribute.indexOfValue(str(value)) for value in y])
+
+    # The whole block crosses to Java as a single double[][].
+    values = JArray.of(
+        _values_from_features(X, y.astype(np.float64), moa_header.classIndex())
+    )
+    for row in values:
+        instance = DenseInstance(1.0, row)  # a default weight of 1.0
+        instance.setDataset(moa_header)
+        moa_stream.add(instance)
 
-        for attribute_index in range(X.shape[1]):
-            instance.setValue(
-                attribute_index, X[instance_index, attribute_index]
-            )  # set value for each attribute
 
-        instance.setDataset(moa_header)
-        instance.setWeight(1.0)  # a default weight of 1.0
-        instance.setClassValue(y[instance_index])  # set class value
+def _decode_strings(column: np.ndarray) -> np.ndarray:
+    """Return the values of a text column as an object array of ``str``."""
+    return np.array(
+        [value.decode() if isinstance(value, bytes) else str(value) for value in column],
+        dtype=object,
+    )
 
-        moa_stream.add(instance)
+
+def _sorted_labels(labels) -> list:
+    """Sort class labels numerically when they are all numbers, as the
+    labels of a numeric column would be, and alphabetically otherwise."""
+    labels = [str(label) for label in labels]
+    try:
+        return sorted(labels, key=float)
+    except ValueError:
+        return sorted(labels)
 
 
 class CSVStream(Stream):
+    """A datastream originating from a CSV file.
+
+    The file is read through a single open handle. Rows are parsed in chunks of
+    ``chunk_size`` lines into a NumPy block and instances are handed out as views
+    into that block, so reading the whole file costs a single linear pass. Files
+    compressed with gzip, bzip2, xz or zstd are decompressed while they are read.
+
+    >>> from capymoa.stream import CSVStream
+    >>> stream = CSVStream("data/electricity_tiny.csv")
+    >>> stream.next_instance()
+    LabeledInstance(
+        Schema(CSVDataset),
+        x=ndarray(..., 6),
+        y_index=1,
+        y_label='1'
+    )
+    """
+
     def __init__(
         self,
         csv_file_path,
@@ -611,7 +1063,32 @@ class CSVStream(Stream):
         target_type: str = None,
         skip_header: bool = False,
         delimiter=",",
+        chunk_size: int = 1024,
+        dtype=None,
     ):
+        """Construct a CSVStream object from a file path.
+
+        :param csv_file_path: A path to a CSV file whose first line names the columns.
+        :param dtypes: The data type of each column. If None, the types are
+            inferred from the first ``chunk_size`` rows of the file.
+        :param values_for_nominal_features: Possible values of each nominal feature.
+        :param class_index: The index of the column containing the target, defaults to -1
+        :param values_for_class_label: Possible values for the class label. If None
+            and the target is not numeric, they are collected in a single
+            streaming pass over the file.
+        :param target_attribute_name: The name given to the target attribute.
+        :param target_type: 'categorical' or 'numeric' target, None to detect automatically.
+        :param skip_header: Always treat the first line as a header. Otherwise,
+            the first line is skipped when it differs from the second one.
+        :param delimiter: The string used to separate values, defaults to ","
+        :param chunk_size: The number of rows parsed at once, defaults to 1024
+        :param dtype: The floating point type of the features, see
+            :attr:`Schema.dtype`.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer")
+        self._dtype = _float_dtype(dtype)
+
         self.csv_file_path = csv_file_path
         self.values_for_nominal_features = values_for_nominal_features
         self.class_index = class_index
@@ -620,91 +1097,67 @@ class CSVStream(Stream):
         self.target_type = target_type
         self.skip_header = skip_header
         self.delimiter = delimiter
-
-        self.dtypes = (
-            []
-        )  # [('column1', np.float64), ('column2', np.int32), ('column3', np.float64), ('column3', str)] reads nomonal attributes as str
-        if (
-            dtypes is None or len(dtypes) == 0
-        ):  # data definition for each column not provided
-            if (
-                len(self.values_for_nominal_features) == 0
-            ):  # data definition for nominal features are given
-                # need to infer number of columns, then generate full data definition using nominal information
-                # LOADS FIRST TWO ROWS INTO THE MEMORY
-                data = np.genfromtxt(
-                    self.csv_file_path,
-                    delimiter=self.delimiter,
-                    dtype=None,
-                    names=True,
-                    skip_header=0,
-                    max_rows=2,
-                )
-                if not self.target_type == 'numeric' and self.values_for_class_label is None:
-                    # LOADS THE FULL FILE INTO THE MEMORY
-                    data = np.genfromtxt(
-                        self.csv_file_path,
-                        delimiter=self.delimiter,
-                        dtype=None,
-                        names=True,
-                        skip_header=1 if skip_header else 0,
-                    )
-                    y = data[data.dtype.names[self.class_index]]
-                    self.values_for_class_label = [str(value) for value in np.unique(y)]
-                for i, data_info in enumerate(data.dtype.descr):
-                    column_name, data_type = data_info
-                    if (
-                        self.values_for_nominal_features.get(i) is not None
-                    ):  # i is in nominal feature keys
-                        self.dtypes.append((column_name, "str"))
-                    else:
-                        self.dtypes.append((column_name, data_type))
-            else:  # need to infer data definitions
-                # LOADS THE FULL FILE INTO THE MEMORY
-                data = np.genfromtxt(
-                    self.csv_file_path,
+        self.chunk_size = chunk_size
+
+        if dtypes is None or len(dtypes) == 0:
+            # Infer the data definition of each column from a bounded sample
+            # rather than from the whole file.
+            with _open_binary(self.csv_file_path) as file:
+                sample = np.genfromtxt(
+                    file,
                     delimiter=self.delimiter,
                     dtype=None,
                     names=True,
-                    skip_header=1 if skip_header else 0,
+                    max_rows=self.chunk_size,
+                    encoding=None,
                 )
-                self.dtypes = data.dtype
-                if not self.target_type == 'numeric' and self.values_for_class_label is None:
-                    y = data[data.dtype.names[self.class_index]]
-                    self.values_for_class_label = [str(value) for value in np.unique(y)]
+            self.dtypes = self._widen_dtypes(sample.dtype.descr)
         else:  # data definition for each column are provided
             self.dtypes = dtypes
 
-        self.total_number_of_lines = 0
+        column_names = [data_info[0] for data_info in self.dtypes]
+        target_name = column_names[self.class_index]
+        # Nominal features are given by column index or by name, their values
+        # are read as strings and stored as the index of the value.
+        self._nominal_values = {
+            (column_names[key] if isinstance(key, int) else key): [
+                str(value) for value in values
+            ]
+            for key, values in self.values_for_nominal_features.items()
+        }
+        self._nominal_indexes = {
+            name: {value: index for index, value in enumerate(values)}
+            for name, values in self._nominal_values.items()
+        }
+        self._label_indexes: Optional[Dict[str, int]] = None
+
         if self.skip_header:
             self.n_lines_to_skip = 1
         else:
-            row1_data = np.genfromtxt(
-                self.csv_file_path,
-                delimiter=self.delimiter,
-                dtype=None,
-                names=True,
-                skip_header=0,
-                max_rows=1,
-            )
-            row2_data = np.genfromtxt(
-                self.csv_file_path,
-                delimiter=self.delimiter,
-                dtype=None,
-                names=True,
-                skip_header=1,
-                max_rows=1,
-            )
-            if row1_data.dtype.names != row2_data.dtype.names:
-                self.n_lines_to_skip = 1
-            else:
-                self.n_lines_to_skip = 0
+            with _open_binary(self.csv_file_path) as file:
+                row1, row2 = file.readline(), file.readline()
+            self.n_lines_to_skip = 1 if row1.strip() != row2.strip() else 0
+
+        self._file = None
+        self._x_block: Optional[np.ndarray] = None
+        self._y_block: Optional[np.ndarray] = None
+        self._block_index = 0
+
+        if not self.target_type == 'numeric' and self.values_for_class_label is None:
+            # A single streaming pass over the file, only the unique labels of
+            # each chunk are kept in memory.
+            self._open()
+            unique_labels = set()
+            while self._read_chunk():
+                unique_labels.update(self._y_block.tolist())
+            self.close()
+            self.values_for_class_label = _sorted_labels(unique_labels)
 
         self.__moa_stream_with_only_header, self.moa_header = (
             _init_moa_stream_and_create_moa_header(
                 number_of_instances=1,  # we only need this to initialize the MOA header
-                feature_names=[data_info[0] for data_info in self.dtypes],
-                values_for_nominal_features=self.values_for_nominal_features,
+                feature_names=[name for name in column_names if name != target_name],
+                values_for_nominal_features=self._nominal_values,
                 values_for_class_label=self.values_for_class_label,
                 dataset_name="CSVDataset",
                 target_attribute_name=self.target_attribute_name,
@@ -712,46 +1165,166 @@ class CSVStream(Stream):
             )
         )
 
-        self.schema = Schema(moa_header=self.moa_header)
+        self.schema = Schema(moa_header=self.moa_header, dtype=self._dtype)
         super().__init__(schema=self.schema, CLI=None, moa_stream=None)
-        self.count_number_of_lines()
+        if self.schema.is_classification():
+            self._label_indexes = {
+                str(label): index
+                for index, label in enumerate(self.schema.get_label_values())
+            }
+        # The number of lines is only counted when it is first needed.
+        self._line_index: Optional[_LineIndex] = None
+        self._open()
+
+    def _widen_dtypes(self, descr: list) -> list:
+        """Make the column types inferred from the first rows safe for the
+        rest of the file: integer columns become float64, text columns and
+        nominal features become unbounded strings, and so does the target
+        unless it is numeric."""
+        column_names = [name for name, _ in descr]
+        target_name = column_names[self.class_index]
+        widened = []
+        for i, (name, data_type) in enumerate(descr):
+            kind = np.dtype(data_type).kind
+            if name == target_name:
+                numeric = self.target_type == "numeric"
+                widened.append((name, np.float64 if numeric else object))
+            elif i in self.values_for_nominal_features or name in self.values_for_nominal_features:
+                widened.append((name, object))
+            elif kind in "iub":
+                widened.append((name, np.float64))
+            elif kind in "SUO":
+                widened.append((name, object))
+            else:
+                widened.append((name, data_type))
+        return widened
+
+    def _open(self, row: int = 0):
+        """(Re)open the file and position it at the given row of data."""
+        self.close()
+        if row == 0:
+            self._file = _open_binary(self.csv_file_path)
+            for _ in range(self.n_lines_to_skip):
+                self._file.readline()
+        else:
+            self._file = self.line_index.open_at(self.n_lines_to_skip + row)
+        self._x_block = None
+        self._y_block = None
+        self._block_index = 0
+
+    def _read_chunk(self) -> bool:
+        """Parse the next ``chunk_size`` rows into the current block.
+
+        :return: False if the end of the file has been reached.
+        """
+        lines = [
+            line.decode()
+            for line in itertools.islice(self._file, self.chunk_size)
+            if line.strip()
+        ]
+        if len(lines) == 0:
+            self._x_block = None
+            self._y_block = None
+            return False
+
+        data = np.atleast_1d(
+            np.genfromtxt(
+                lines,
+                delimiter=self.delimiter,
+                dtype=self.dtypes,
+                names=None,
+                encoding=None,
+            )
+        )
+        target_name = data.dtype.names[self.class_index]
+        feature_names = [name for name in data.dtype.names if name != target_name]
+        y = data[target_name]
+        if y.dtype == object or y.dtype.kind in "SU" or self._label_indexes is not None:
+            y = _decode_strings(y)
+            if self._label_indexes is not None:
+                try:
+                    y = np.fromiter(
+                        (self._label_indexes[label] for label in y), np.int_, len(y)
+                    )
+                except KeyError as error:
+                    raise ValueError(f"Unknown class label {error.args[0]!r}") from None
+        self._y_block = y
+
+        if any(data.dtype[name] == object for name in feature_names):
+            x = np.empty((len(data), len(feature_names)), dtype=self._dtype)
+            for j, name in enumerate(feature_names):
+                x[:, j] = self._feature_column(name, data[name])
+        else:
+            x = rfn.structured_to_unstructured(data[feature_names])
+        self._x_block = np.ascontiguousarray(x, dtype=self._dtype)
+        self._block_index = 0
+        return True
+
+    def _feature_column(self, name: str, column: np.ndarray) -> np.ndarray:
+        """Return a feature column as numbers, nominal values as their index."""
+        if column.dtype != object:
+            return column
+        values = _decode_strings(column)
+        indexes = self._nominal_indexes.get(name)
+        if indexes is None:
+            return values.astype(np.float64)
+        try:
+            return np.fromiter((indexes[value] for value in values), np.float64, len(values))
+        except KeyError as error:
+            raise ValueError(
+                f"Unknown value {error.args[0]!r} of the nominal feature {name!r}"
+            ) from None
+
+    def close(self):
+        """Close the file handle of the stream. :meth:`restart` reopens it."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @property
+    def line_index(self) -> _LineIndex:
+        """The line count and row offsets of the file, loaded from the sidecar
+        ``<file>.index.json`` or built with a single buffered scan."""
+        if self._line_index is None:
+            self._line_index = _LineIndex.load_or_build(self.csv_file_path)
+        return self._line_index
+
+    @property
+    def total_number_of_lines(self) -> int:
+        """The number of lines of the file, including the header."""
+        return self.line_index.num_lines
+
+    def count_number_of_lines(self) -> int:
+        return self.total_number_of_lines
 
-    def count_number_of_lines(self):
-        with open(self.csv_file_path, "r") as file:
-            for line in file:
-                # Process each line here
-                self.total_number_of_lines += 1
+    def __len__(self) -> int:
+        return max(self.total_number_of_lines - self.n_lines_to_skip, 0)
+
+    def seek(self, row: int):
+        """Move the stream so that the next instance is the one at ``row``.
+
+        Only a bounded number of lines is read to get there, using the offsets
+        of the line index.
+
+        :param row: The index of the next instance, between 0 and ``len(self)``.
+        :raises IndexError: If the row is out of range.
+        """
+        if not 0 <= row <= len(self):
+            raise IndexError(f"Row {row} out of range for a stream of {len(self)}")
+        self._open(row)
 
     def has_more_instances(self):
-        return self.total_number_of_lines > self.n_lines_to_skip
+        if self._x_block is not None and self._block_index < len(self._x_block):
+            return True
+        return self._read_chunk()
 
     def next_instance(self):
         if not self.has_more_instances():
             return None
-        # skip header
-        data = np.genfromtxt(
-            self.csv_file_path,
-            delimiter=self.delimiter,
-            dtype=self.dtypes,
-            names=None,
-            skip_header=self.n_lines_to_skip,
-            max_rows=1,
-        )
-        self.n_lines_to_skip += 1
 
-        y = rfn.structured_to_unstructured(data[[data.dtype.names[self.class_index]]])[
-            0
-        ]
-        # X = data[[item for item in data.dtype.names if item != data.dtype.names[self.class_index]]].view('f4')
-        X = rfn.structured_to_unstructured(
-            data[
-                [
-                    item
-                    for item in data.dtype.names
-                    if item != data.dtype.names[self.class_index]
-                ]
-            ]
-        )
+        X = self._x_block[self._block_index]
+        y = self._y_block[self._block_index]
+        self._block_index += 1
 
         if self.schema.is_classification():
             return LabeledInstance.from_array(self.schema, X, y)
@@ -766,9 +1339,11 @@ class CSVStream(Stream):
     def get_schema(self):
         return self.schema
 
+    def next_batch(self, n: int) -> Optional[InstanceBatch]:
+        return _next_batch_from_blocks(self, n)
+
     def get_moa_stream(self):
         raise ValueError("No moa_stream available, this is a CSV")
 
     def restart(self):
-        self.total_number_of_lines = 0
-        self.n_lines_to_skip = 1 if self.skip_header else 0
+        self._open()
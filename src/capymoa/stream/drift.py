@@ -4,14 +4,135 @@ import inspect
 import re
 from collections import OrderedDict
 from itertools import cycle
+from typing import List, Optional, Sequence, Tuple, Union
 
-from capymoa.stream._stream import Stream
+import numpy as np
+
+from capymoa.instance import InstanceBatch, LabeledInstance, RegressionInstance
+from capymoa.stream._stream import Stream, _batch_targets, _next_batch_from_blocks
 from capymoa._utils import _get_moa_creation_CLI
 from moa.streams import ConceptDriftStream as MOA_ConceptDriftStream
 
 
+# Beyond 10 widths from its position, a sigmoid drift is certain to within
+# the resolution of a uniform double.
+_SIGMOID_SPAN = 10
+_BLOCK_SIZE = 1024
+
+
+class _DriftComposer:
+    """Mix the instances of several streams, one concept after another.
+
+    Instance ``t`` (counting from 1) comes from the stream after drift ``j``
+    with probability ``1 / (1 + exp(-4 * (t - position) / width))``, as in
+    MOA's ``ConceptDriftStream``. When drifts overlap, the latest one takes
+    precedence, as in MOA's nesting of one ``ConceptDriftStream`` per drift.
+    Only the streams of the concepts in use are read, and only the drifts in
+    transition are evaluated, so the cost per instance does not depend on the
+    number of concepts.
+    """
+
+    def __init__(self, streams: Sequence[Stream], drifts: Sequence["Drift"]):
+        if len(streams) != len(drifts) + 1:
+            raise ValueError("There must be exactly one Drift between two Stream objects.")
+        self.streams = list(streams)
+        self.positions = np.array([drift.position for drift in drifts], dtype=np.float64)
+        if np.any(np.diff(self.positions) < 0):
+            raise ValueError("Drifts must be ordered by position.")
+        self.widths = np.array([_drift_width(drift) for drift in drifts], dtype=np.float64)
+        self.seeds = [drift.random_seed for drift in drifts]
+        self._lows = self.positions - _SIGMOID_SPAN * self.widths
+        self._highs = self.positions + _SIGMOID_SPAN * self.widths
+        self.restart()
+
+    def restart(self):
+        for stream in self.streams:
+            stream.restart()
+        self._t = 0  # the number of instances composed so far
+        self._first_drift = 0  # drifts before it are certainly over
+        self._rngs = {}
+
+    def _concepts(self, n: int) -> np.ndarray:
+        """Return the concept of each of the next ``n`` instances."""
+        t = np.arange(self._t + 1, self._t + n + 1, dtype=np.float64)
+        while (
+            self._first_drift < len(self.positions)
+            and self._highs[self._first_drift] < t[0]
+            and self.positions[self._first_drift] <= t[0]
+        ):
+            self._rngs.pop(self._first_drift, None)
+            self._first_drift += 1
+
+        concepts = np.full(n, self._first_drift, dtype=np.intp)
+        j = self._first_drift
+        while j < len(self.positions) and self._lows[j] <= t[-1]:
+            if self.widths[j] == 0:
+                concepts[t >= self.positions[j]] = j + 1
+            else:
+                if j not in self._rngs:
+                    self._rngs[j] = np.random.default_rng(self.seeds[j])
+                with np.errstate(over="ignore"):
+                    probability = 1.0 / (
+                        1.0 + np.exp(-4.0 * (t - self.positions[j]) / self.widths[j])
+                    )
+                concepts[self._rngs[j].random(n) < probability] = j + 1
+            j += 1
+        return concepts
+
+    def compose(self, n: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Return the features and targets of the next ``n`` instances, fewer
+        if a stream ends, or None once a stream has ended."""
+        concepts = self._concepts(n)
+        x, y, stop = None, None, n
+        for concept in np.unique(concepts):
+            rows = np.flatnonzero(concepts == concept)
+            batch = self.streams[concept].next_batch(len(rows))
+            available = 0 if batch is None else len(batch)
+            if available < len(rows):
+                # The composed stream ends where this stream ran out.
+                stop = min(stop, rows[available])
+            if available == 0:
+                continue
+            if x is None:
+                x = np.empty((n, batch.x.shape[1]), dtype=batch.x.dtype)
+                y = np.empty(n, dtype=batch.y.dtype)
+            x[rows[:available]] = batch.x
+            y[rows[:available]] = batch.y
+        if x is None or stop == 0:
+            return None
+        self._t += stop
+        return x[:stop], y[:stop]
+
+
+def _drift_width(drift: "Drift") -> int:
+    """The width of a drift, derived from its angle of change as MOA does when
+    ``alpha`` is set."""
+    if drift.alpha != 0.0:
+        return int(1 / np.tan(drift.alpha * np.pi / 180))
+    return drift.width
+
+
+def _rebuild_recurrences(streams: Sequence[Stream]) -> List[Stream]:
+    """Replace every repeated occurrence of a stream with a new stream built
+    from the same arguments, as MOA builds each concept from its CLI."""
+    rebuilt, seen = [], set()
+    for stream in streams:
+        if id(stream) in seen:
+            if not hasattr(stream, "__init_args_kwargs__"):
+                raise ValueError(
+                    f"{type(stream).__name__} cannot be rebuilt for a recurrence, "
+                    "pass a separate Stream object for each concept"
+                )
+            cls, args = get_class_and_init_attributes_with_values(stream)
+            stream = cls(**args)
+        else:
+            seen.add(id(stream))
+        rebuilt.append(stream)
+    return rebuilt
+
+
 class DriftStream(Stream):
-    def __init__(self, schema=None, CLI=None, moa_stream=None, stream=None):
+    def __init__(self, schema=None, CLI=None, moa_stream=None, stream=None, backend="moa"):
         """
         Initialize the stream with the specified parameters.
 
@@ -24,6 +145,13 @@ class DriftStream(Stream):
         :param stream: A list that defines a composite stream consisting of various concepts
             and drifts. If this is set, the ConceptDriftStream object will be built according
             to the list of concepts and drifts specified. Default is None.
+        :param backend: ``"moa"`` to build a MOA ConceptDriftStream from ``stream`` or
+            ``"python"`` to mix the streams in Python. The Python backend accepts any
+            Stream objects, such as a NumpyStream or a CSVStream, and reads only the
+            streams of the concepts in use. As in MOA, a Stream object that recurs in
+            ``stream`` is rebuilt for each recurrence, which restarts from its seed;
+            this requires a generator, so other streams may appear only once.
+            Default is "moa".
 
         Notes:
         ------
@@ -40,6 +168,31 @@ class DriftStream(Stream):
         """
         self.stream = stream
         self.drifts = []
+        self._composer: Optional[_DriftComposer] = None
+
+        if backend not in ("moa", "python"):
+            raise ValueError(f"Unknown backend {backend!r}, expected 'moa' or 'python'")
+        if backend == "python":
+            if self.stream is None:
+                raise ValueError("The python backend requires a stream list")
+            streams = [c for c in self.stream if isinstance(c, Stream)]
+            self.drifts = [c for c in self.stream if isinstance(c, Drift)]
+            if any(
+                isinstance(a, Stream) == isinstance(b, Stream)
+                for a, b in zip(self.stream, self.stream[1:])
+            ):
+                raise ValueError(
+                    "A Drift object must be specified between two Stream objects."
+                )
+            streams = _rebuild_recurrences(streams)
+            self._composer = _DriftComposer(streams, self.drifts)
+            self._x_block: Optional[np.ndarray] = None
+            self._y_block: Optional[np.ndarray] = None
+            self._block_index = 0
+            super().__init__(
+                schema=streams[0].get_schema() if schema is None else schema
+            )
+            return
 
         if CLI is None:
             stream1 = None
@@ -107,6 +260,49 @@ class DriftStream(Stream):
 
         super().__init__(schema=schema, CLI=CLI, moa_stream=moa_stream)
 
+    def has_more_instances(self) -> bool:
+        if self._composer is None:
+            return super().has_more_instances()
+        if self._x_block is not None and self._block_index < len(self._x_block):
+            return True
+        block = self._composer.compose(_BLOCK_SIZE)
+        if block is None:
+            self._x_block, self._y_block = None, None
+            return False
+        self._x_block = block[0].astype(self.schema.dtype, copy=False)
+        self._y_block = _batch_targets(self.schema, block[1])
+        self._block_index = 0
+        return True
+
+    def next_instance(self) -> Union[LabeledInstance, RegressionInstance]:
+        if self._composer is None:
+            return super().next_instance()
+        if not self.has_more_instances():
+            return None
+        x = self._x_block[self._block_index]
+        y = self._y_block[self._block_index]
+        self._block_index += 1
+        if self.schema.is_classification():
+            return LabeledInstance.from_array(self.schema, x, int(y))
+        return RegressionInstance.from_array(self.schema, x, float(y))
+
+    def next_batch(self, n: int) -> Optional[InstanceBatch]:
+        if self._composer is None:
+            return super().next_batch(n)
+        return _next_batch_from_blocks(self, n)
+
+    def get_moa_stream(self):
+        if self._composer is None:
+            return super().get_moa_stream()
+        raise ValueError("Not a moa_stream, drifts are composed in Python")
+
+    def restart(self):
+        if self._composer is None:
+            return super().restart()
+        self._composer.restart()
+        self._x_block, self._y_block = None, None
+        self._block_index = 0
+
     def get_num_drifts(self):
         return len(self.drifts)
 
@@ -354,7 +550,8 @@ class RecurrentConceptDriftStream(DriftStream):
                  concept_list: list,
                  max_recurrences_per_concept: int = 3,
                  transition_type_template: Drift = AbruptDrift(position=5000),
-                 concept_name_list: list = None
+                 concept_name_list: list = None,
+                 backend: str = "moa",
                  ):
         self.concept_info, stream_list = get_recurrent_concept_drift_stream_list(
             concept_list=concept_list,
@@ -363,5 +560,5 @@ class RecurrentConceptDriftStream(DriftStream):
             concept_name_list = concept_name_list
         )
 
-        super().__init__(stream=stream_list)
+        super().__init__(stream=stream_list, backend=backend)
 
@@ -1,8 +1,20 @@
 """Generate artificial data streams."""
 import copy
+from typing import Callable, Optional, Union
 
+import numpy as np
+
+from capymoa.instance import InstanceBatch, LabeledInstance, RegressionInstance
 from capymoa.stream import Stream
-from capymoa.stream._stream import Schema
+from capymoa.stream._numpy_generator import (
+    _NumpyGenerator,
+    _NumpyHyperplaneClassification,
+    _NumpyRandomRBF,
+    _NumpySEA,
+    _NumpySine,
+    _NumpySTAGGER,
+)
+from capymoa.stream._stream import Schema, _batch_targets, _next_batch_from_blocks
 from moa.streams import InstanceStream
 from moa.streams.generators import RandomTreeGenerator as MOA_RandomTreeGenerator
 from moa.streams.generators import SEAGenerator as MOA_SEAGenerator
@@ -19,6 +31,73 @@ from moa.streams.generators import STAGGERGenerator as MOA_STAGGERGenerator
 from moa.streams.generators import SineGenerator as MOA_SineGenerator
 from capymoa._utils import build_cli_str_from_mapping_and_locals
 
+_BACKENDS = ("moa", "numpy")
+_BLOCK_SIZE = 4096
+
+
+class _GeneratorStream(Stream):
+    """A MOA generator that can instead generate its instances with NumPy.
+
+    With ``backend="numpy"`` the MOA generator is only used for its header, so
+    that the schema is the same as with ``backend="moa"``. Instances are then
+    generated in blocks of :data:`_BLOCK_SIZE` by a
+    :class:`~capymoa.stream._numpy_generator._NumpyGenerator`, without calls
+    into the JVM. The sequence of instances only depends on the seeds, not on
+    how the stream is read.
+    """
+
+    _generator: Optional[_NumpyGenerator] = None
+
+    def _set_backend(self, backend: str, numpy_generator: Callable[[], _NumpyGenerator]):
+        """Switch to the NumPy backend if requested. Called after the MOA
+        generator has been set up by ``Stream.__init__``."""
+        if backend not in _BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {_BACKENDS}")
+        self.backend = backend
+        if backend == "numpy":
+            self._generator = numpy_generator()
+            self.moa_stream = None
+            self._x_block: Optional[np.ndarray] = None
+            self._y_block: Optional[np.ndarray] = None
+            self._block_index = 0
+
+    def has_more_instances(self) -> bool:
+        if self._generator is None:
+            return super().has_more_instances()
+        if self._x_block is None or self._block_index >= len(self._x_block):
+            x, y = self._generator.generate(_BLOCK_SIZE)
+            self._x_block = x.astype(self.schema.dtype, copy=False)
+            self._y_block = _batch_targets(self.schema, y)
+            self._block_index = 0
+        return True
+
+    def next_instance(self) -> Union[LabeledInstance, RegressionInstance]:
+        if self._generator is None:
+            return super().next_instance()
+        self.has_more_instances()
+        x = self._x_block[self._block_index]
+        y = self._y_block[self._block_index]
+        self._block_index += 1
+        if self.schema.is_classification():
+            return LabeledInstance.from_array(self.schema, x, int(y))
+        return RegressionInstance.from_array(self.schema, x, float(y))
+
+    def next_batch(self, n: int) -> Optional[InstanceBatch]:
+        if self._generator is None:
+            return super().next_batch(n)
+        return _next_batch_from_blocks(self, n)
+
+    def get_moa_stream(self):
+        if self._generator is None:
+            return super().get_moa_stream()
+        raise ValueError("Not a moa_stream, the numpy backend is used")
+
+    def restart(self):
+        if self._generator is None:
+            return super().restart()
+        self._generator.restart()
+        self._x_block, self._y_block = None, None
+        self._block_index = 0
 
 
 class RandomTreeGenerator(Stream):
@@ -126,7 +205,7 @@ class RandomTreeGenerator(Stream):
         return f"RTG({', '.join(non_default_attributes)})"
 
 
-class SEA(Stream):
+class SEA(_GeneratorStream):
     """Generates SEA concepts functions.
 
     >>> from capymoa.stream.generator import SEA
@@ -152,6 +231,7 @@ class SEA(Stream):
             function: int = 1,
             balance_classes: bool = False,
             noise_percentage: int = 10,
+            backend: str = "moa",
     ):
         """Construct a SEA datastream generator.
 
@@ -159,6 +239,11 @@ class SEA(Stream):
         :param function: Classification function used, as defined in the original paper, defaults to 1
         :param balance_classes: Balance the number of instances of each class, defaults to False
         :param noise_percentage: Percentage of noise to add to the data, defaults to 10
+        :param backend: ``"moa"`` to generate instances with MOA or ``"numpy"`` to
+            generate them in vectorised blocks with NumPy, defaults to ``"moa"``.
+            The NumPy backend follows the same generating process with NumPy's
+            random generator seeded with the same seeds, so its instances are
+            statistically equivalent to MOA's but not identical.
         """
         self.__init_args_kwargs__ = copy.copy(locals())  # save init args for recreation. not a deep copy to avoid unnecessary use of memory
 
@@ -173,6 +258,12 @@ class SEA(Stream):
             {'-b' if self.balance_classes else ''} -p {self.noise_percentage}"
 
         super().__init__(CLI=self.CLI, moa_stream=self.moa_stream)
+        self._set_backend(
+            backend,
+            lambda: _NumpySEA(
+                instance_random_seed, function, balance_classes, noise_percentage
+            ),
+        )
 
     def __str__(self):
         attributes = [
@@ -193,7 +284,7 @@ class SEA(Stream):
         return f"SEA({', '.join(non_default_attributes)})"
 
 
-class HyperPlaneClassification(Stream):
+class HyperPlaneClassification(_GeneratorStream):
     """Generates HyperPlane concepts functions.
 
     >>> from capymoa.stream.generator import HyperPlaneClassification
@@ -220,6 +311,7 @@ class HyperPlaneClassification(Stream):
             magnitude_of_change: float = 0.0,
             noise_percentage: int = 5,
             sigma_percentage: int = 10,
+            backend: str = "moa",
     ):
         """Construct a HyperPlane Classification datastream generator.
 
@@ -230,6 +322,11 @@ class HyperPlaneClassification(Stream):
         :param magnitude_of_change: Magnitude of change in the generated instances, defaults to 0.0
         :param noise_percentage: Percentage of noise to add to the data, defaults to 10
         :param sigma_percentage: Percentage of sigma to add to the data, defaults to 10
+        :param backend: ``"moa"`` to generate instances with MOA or ``"numpy"`` to
+            generate them in vectorised blocks with NumPy, defaults to ``"moa"``.
+            The NumPy backend follows the same generating process with NumPy's
+            random generator seeded with the same seeds, so its instances are
+            statistically equivalent to MOA's but not identical.
         """
         self.__init_args_kwargs__ = copy.copy(locals())  # save init args for recreation. not a deep copy to avoid unnecessary use of memory
 
@@ -250,6 +347,17 @@ class HyperPlaneClassification(Stream):
             moa_stream=self.moa_stream,
             CLI=config_str,
         )
+        self._set_backend(
+            backend,
+            lambda: _NumpyHyperplaneClassification(
+                instance_random_seed,
+                number_of_attributes,
+                number_of_drifting_attributes,
+                magnitude_of_change,
+                noise_percentage,
+                sigma_percentage,
+            ),
+        )
 
     # def __str__(self):
         # attributes = [
@@ -389,7 +497,7 @@ class HyperPlaneRegression(Stream):
     #     return f"HyperPlaneRegression({', '.join(non_default_attributes)})"
 
 
-class RandomRBFGenerator(Stream):
+class RandomRBFGenerator(_GeneratorStream):
     """
     An Random RBF Generator
 
@@ -414,7 +522,8 @@ class RandomRBFGenerator(Stream):
             instance_random_seed: int = 1,
             number_of_classes: int = 2,
             number_of_attributes: int = 10,
-            number_of_centroids: int = 50
+            number_of_centroids: int = 50,
+            backend: str = "moa",
     ):
         """Construct a Random RBF Generator .
 
@@ -422,6 +531,11 @@ class RandomRBFGenerator(Stream):
         :param number_of_classes: The number of classes of the generated instances, defaults to 2
         :param number_of_attributes: The number of attributes of the generated instances, defaults to 10
         :param number_of_drifting_centroids: The number of drifting attributes, defaults to 2
+        :param backend: ``"moa"`` to generate instances with MOA or ``"numpy"`` to
+            generate them in vectorised blocks with NumPy, defaults to ``"moa"``.
+            The NumPy backend follows the same generating process with NumPy's
+            random generator seeded with the same seeds, so its instances are
+            statistically equivalent to MOA's but not identical.
         """
 
         mapping = {
@@ -439,6 +553,16 @@ class RandomRBFGenerator(Stream):
             moa_stream=self.moa_stream,
             CLI=config_str
         )
+        self._set_backend(
+            backend,
+            lambda: _NumpyRandomRBF(
+                model_random_seed,
+                instance_random_seed,
+                number_of_classes,
+                number_of_attributes,
+                number_of_centroids,
+            ),
+        )
 
 
     def __str__(self):
@@ -915,7 +1039,7 @@ class WaveformGeneratorDrift(Stream):
         non_default_attributes = [attr for attr in attributes if attr is not None]
         return f"WaveformGeneratorDrift({', '.join(non_default_attributes)})"
     
-class STAGGERGenerator(Stream):
+class STAGGERGenerator(_GeneratorStream):
     """
     An STAGGER Generator
 
@@ -937,13 +1061,19 @@ class STAGGERGenerator(Stream):
             self,
             instance_random_seed: int = 1,
             classification_function: int = 1,
-            balance_classes: bool = False
+            balance_classes: bool = False,
+            backend: str = "moa",
     ):
         """Construct a STAGGER Generator .
 
         :param instance_random_seed: Seed for random generation of instances, defaults to 1
         :param classification_function: Classification function used, as defined in the original paper.
         :param balance: Balance the number of instances of each class.
+        :param backend: ``"moa"`` to generate instances with MOA or ``"numpy"`` to
+            generate them in vectorised blocks with NumPy, defaults to ``"moa"``.
+            The NumPy backend follows the same generating process with NumPy's
+            random generator seeded with the same seeds, so its instances are
+            statistically equivalent to MOA's but not identical.
         """
 
         mapping = {
@@ -959,6 +1089,12 @@ class STAGGERGenerator(Stream):
             moa_stream=self.moa_stream,
             CLI=config_str
         )
+        self._set_backend(
+            backend,
+            lambda: _NumpySTAGGER(
+                instance_random_seed, classification_function, balance_classes
+            ),
+        )
 
 
     def __str__(self):
@@ -983,7 +1119,7 @@ class STAGGERGenerator(Stream):
         return f"STAGGERGenerator({', '.join(non_default_attributes)})"
     
 
-class SineGenerator(Stream):
+class SineGenerator(_GeneratorStream):
     """
     An SineGenerator
 
@@ -1006,7 +1142,8 @@ class SineGenerator(Stream):
             instance_random_seed: int = 1,
             classification_function: int = 1,
             suppress_irrelevant_attributes: bool = False,
-            balance_classes: bool = False
+            balance_classes: bool = False,
+            backend: str = "moa",
     ):
         """Construct a SineGenerator .
 
@@ -1014,6 +1151,11 @@ class SineGenerator(Stream):
         :param classification_function: Classification function used, as defined in the original paper.
         :param suppress_irrelevant_attributes: Reduce the data to only contain 2 relevant numeric attributes
         :param balance: Balance the number of instances of each class.
+        :param backend: ``"moa"`` to generate instances with MOA or ``"numpy"`` to
+            generate them in vectorised blocks with NumPy, defaults to ``"moa"``.
+            The NumPy backend follows the same generating process with NumPy's
+            random generator seeded with the same seeds, so its instances are
+            statistically equivalent to MOA's but not identical.
         """
 
         mapping = {
@@ -1030,6 +1172,15 @@ class SineGenerator(Stream):
             moa_stream=self.moa_stream,
             CLI=config_str
         )
+        self._set_backend(
+            backend,
+            lambda: _NumpySine(
+                instance_random_seed,
+                classification_function,
+                suppress_irrelevant_attributes,
+                balance_classes,
+            ),
+        )
 
 
     def __str__(self):
@@ -101,3 +101,23 @@ def test_all_datasets(dataset_type: Type[DownloadableDataset]):
         assert str(dataset)
         assert isinstance(dataset, Sized), "Dataset must be an instance of Sized"
         assert len(dataset) == i, "Dataset length must be correct"
+
+
+def test_compressed_dataset_arguments_are_checked_before_download(tmp_path):
+    class NoArchiveDataset(DownloadableDataset):
+        _filename = "no_archive.arff"
+
+        def download(self, working_directory):
+            raise AssertionError("nothing should be downloaded")
+
+        def extract(self, stream_archive):
+            raise AssertionError("nothing should be extracted")
+
+        def to_stream(self, stream):
+            raise AssertionError("no stream should be created")
+
+    with pytest.raises(ValueError, match="compressed archive"):
+        NoArchiveDataset(directory=tmp_path, compressed=True)
+    with pytest.raises(ValueError, match="schema"):
+        ElectricityTiny(directory=tmp_path, compressed=True, schema="schema")
+    assert list(tmp_path.iterdir()) == []
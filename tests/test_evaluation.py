@@ -248,3 +248,245 @@ def test_restart_stream_flag(restart_stream, optimise, regression, evaluation):
             assert y_remaining == y_stream[5:10]
         else:
             assert y_remaining == y_stream[15:20]
+
+
+@pytest.mark.parametrize("num_classes", [2, 3])
+def test_numpy_classification_evaluator_matches_moa(num_classes):
+    import numpy as np
+    from capymoa.evaluation import ClassificationEvaluator, ClassificationWindowedEvaluator
+    from capymoa.stream import Schema
+
+    schema = Schema.from_custom(
+        ["f1"], values_for_class_label=[str(i) for i in range(num_classes)]
+    )
+    rng = np.random.default_rng(num_classes)
+    y_true = rng.integers(0, num_classes, 1000)
+    y_pred = np.where(rng.random(1000) < 0.7, y_true, rng.integers(0, num_classes, 1000))
+    # Predictions out of range are counted as errors, as in MOA.
+    y_pred[::97] = -1
+
+    evaluators = {
+        backend: (
+            ClassificationEvaluator(schema, backend=backend),
+            ClassificationWindowedEvaluator(schema, window_size=100, backend=backend),
+        )
+        for backend in ("numpy", "moa")
+    }
+    for target, prediction in zip(y_true, y_pred):
+        for cumulative, windowed in evaluators.values():
+            cumulative.update(int(target), int(prediction))
+            windowed.update(int(target), int(prediction))
+
+    (cumulative, windowed), (moa_cumulative, moa_windowed) = evaluators.values()
+    assert cumulative.metrics_header() == moa_cumulative.metrics_header()
+    assert cumulative.metrics() == pytest.approx(moa_cumulative.metrics(), nan_ok=True)
+    assert windowed.metrics_per_window().values == pytest.approx(
+        moa_windowed.metrics_per_window().values, nan_ok=True
+    )
+
+
+def test_classification_backends_agree_on_a_stream():
+    from capymoa.evaluation import ClassificationEvaluator, ClassificationWindowedEvaluator
+
+    stream = ElectricityTiny()
+    schema = stream.get_schema()
+    assert ClassificationEvaluator(schema).backend == "moa"
+    assert ClassificationWindowedEvaluator(schema).moa_basic_evaluator is not None
+
+    learner = HoeffdingTree(schema=schema)
+    evaluators = {
+        backend: (
+            ClassificationEvaluator(schema, backend=backend),
+            ClassificationWindowedEvaluator(schema, window_size=300, backend=backend),
+        )
+        for backend in ("moa", "numpy")
+    }
+    while stream.has_more_instances():
+        instance = stream.next_instance()
+        prediction = learner.predict(instance)
+        for cumulative, windowed in evaluators.values():
+            cumulative.update(instance.y_index, prediction)
+            windowed.update(instance.y_index, prediction)
+        learner.train(instance)
+
+    (moa_cumulative, moa_windowed), (cumulative, windowed) = evaluators.values()
+    assert cumulative.metrics_dict() == pytest.approx(
+        moa_cumulative.metrics_dict(), nan_ok=True
+    )
+    assert windowed.metrics_per_window().values == pytest.approx(
+        moa_windowed.metrics_per_window().values, nan_ok=True
+    )
+
+
+def test_update_batch_matches_update():
+    import numpy as np
+    from capymoa.evaluation import (
+        ClassificationEvaluator,
+        ClassificationWindowedEvaluator,
+        RegressionWindowedEvaluator,
+    )
+    from capymoa.stream import Schema
+
+    rng = np.random.default_rng(0)
+    schema = Schema.from_custom(["f1"], values_for_class_label=["a", "b", "c"])
+    y_true = rng.integers(0, 3, 1050)
+    y_pred = rng.integers(-1, 3, 1050)
+
+    def make_evaluators():
+        return [
+            ClassificationEvaluator(schema, window_size=100, backend="numpy"),
+            ClassificationWindowedEvaluator(schema, window_size=100, backend="numpy"),
+            ClassificationWindowedEvaluator(schema, window_size=100),
+        ]
+
+    one_by_one, batched = make_evaluators(), make_evaluators()
+    for target, prediction in zip(y_true, y_pred):
+        for evaluator in one_by_one:
+            evaluator.update(int(target), int(prediction))
+    # Batches that straddle the window boundaries.
+    for start in range(0, 1050, 64):
+        for evaluator in batched:
+            evaluator.update_batch(y_true[start : start + 64], y_pred[start : start + 64])
+    for expected, actual in zip(one_by_one, batched):
+        assert actual.get_instances_seen() == 1050
+        assert actual.metrics() == pytest.approx(expected.metrics(), nan_ok=True)
+        assert actual.metrics_per_window().values == pytest.approx(
+            expected.metrics_per_window().values, nan_ok=True
+        )
+
+    schema = Schema.from_custom(["f1"], target_type="numeric")
+    y, y_hat = rng.random(250), rng.random(250)
+    expected, actual = (RegressionWindowedEvaluator(schema, window_size=50) for _ in range(2))
+    for target, prediction in zip(y, y_hat):
+        expected.update(target, prediction)
+    actual.update_batch(y[:120], y_hat[:120])
+    actual.update_batch(y[120:], y_hat[120:])
+    assert actual.metrics_per_window().values == pytest.approx(
+        expected.metrics_per_window().values, nan_ok=True
+    )
+
+
+@pytest.mark.parametrize("window_size", [None, 1, 7, 100])
+def test_confusion_matrix_add_batch_in_chunks(monkeypatch, window_size):
+    import numpy as np
+    from capymoa.evaluation import _confusion_matrix
+
+    # Chunks of 5 instances, smaller than both the batches and the windows.
+    monkeypatch.setattr(_confusion_matrix, "_CHUNK_SIZE", 15)
+    rng = np.random.default_rng(0)
+    expected = _confusion_matrix._ConfusionMatrix(3, window_size)
+    actual = _confusion_matrix._ConfusionMatrix(3, window_size)
+    for n in [0, 1, 4, 33, 250]:
+        y_true, y_pred = rng.integers(0, 3, n), rng.integers(0, 3, n)
+        for target, prediction in zip(y_true, y_pred):
+            expected.add(int(target), int(prediction))
+        actual.add_batch(y_true, y_pred)
+        assert actual.measurements() == pytest.approx(
+            expected.measurements(), nan_ok=True
+        )
+        assert np.array_equal(actual.matrix, expected.matrix)
+
+
+def test_metric_accessors_use_cached_header():
+    from capymoa.evaluation import ClassificationEvaluator, RegressionEvaluator
+    from capymoa.stream import Schema
+
+    schema = Schema.from_custom(["f1"], values_for_class_label=["a", "b", "c"])
+    evaluator = ClassificationEvaluator(schema, backend="moa")
+    for target, prediction in [(0, 0), (1, 2), (2, 2), (1, 1)]:
+        evaluator.update(target, prediction)
+    header = evaluator.metrics_header()
+    assert evaluator.metrics_header() is header
+    assert "recall_2" in header
+
+    # The accessors keep following the evaluator after the header is cached.
+    evaluator.update(0, 1)
+    metrics = evaluator.metrics_dict()
+    assert list(metrics) == header
+    assert evaluator.accuracy() == pytest.approx(metrics["accuracy"])
+    assert evaluator.recall_2() == pytest.approx(metrics["recall_2"])
+    assert evaluator["kappa"] == pytest.approx(metrics["kappa"])
+
+    schema = Schema.from_custom(["f1"], target_type="numeric")
+    evaluator = RegressionEvaluator(schema)
+    evaluator.update(1.0, 0.5)
+    evaluator.update(2.0, 2.5)
+    assert evaluator.mae() == pytest.approx(0.5)
+    assert evaluator.metrics_dict()["mae"] == pytest.approx(0.5)
+
+
+def test_prequential_evaluation_batch_size():
+    from capymoa.classifier import SGDClassifier
+
+    stream = ElectricityTiny()
+    # Mini-batches of one instance are the instance-by-instance evaluation.
+    expected = prequential_evaluation(
+        stream, NaiveBayes(schema=stream.get_schema()), window_size=300, optimise=False
+    )
+    actual = prequential_evaluation(
+        stream, NaiveBayes(schema=stream.get_schema()), window_size=300, batch_size=1
+    )
+    assert actual.cumulative.metrics() == pytest.approx(
+        expected.cumulative.metrics(), nan_ok=True
+    )
+    assert actual.windowed.metrics_per_window().values == pytest.approx(
+        expected.windowed.metrics_per_window().values, nan_ok=True
+    )
+
+    results = prequential_evaluation(
+        stream,
+        SGDClassifier(stream.get_schema()),
+        max_instances=1050,
+        window_size=300,
+        batch_size=128,
+        store_predictions=True,
+        store_y=True,
+    )
+    assert results.cumulative.get_instances_seen() == 1050
+    assert len(results.windowed.metrics_per_window()) == 4
+    assert len(results.predictions()) == len(results.ground_truth_y()) == 1050
+    # The first mini-batch is predicted before any training.
+    assert results.predictions()[:128] == [None] * 128
+
+    with pytest.raises(ValueError):
+        prequential_evaluation(stream, NaiveBayes(schema=stream.get_schema()), batch_size=0)
+
+
+def test_parallel_prequential_evaluation_multiple_learners():
+    from capymoa.evaluation import (
+        parallel_prequential_evaluation_multiple_learners,
+        prequential_evaluation_multiple_learners,
+    )
+
+    stream = ElectricityTiny()
+
+    def make_learners():
+        return {
+            "nb": NaiveBayes(schema=stream.get_schema()),
+            "ht": HoeffdingTree(schema=stream.get_schema()),
+            "nb2": NaiveBayes(schema=stream.get_schema()),
+        }
+
+    expected = prequential_evaluation_multiple_learners(
+        stream, make_learners(), max_instances=1500, window_size=400, store_predictions=True
+    )
+    # Batches that do not align with the windows, and two learners in one worker.
+    actual = parallel_prequential_evaluation_multiple_learners(
+        stream,
+        make_learners(),
+        max_instances=1500,
+        window_size=400,
+        store_predictions=True,
+        n_workers=2,
+        batch_size=256,
+    )
+    assert list(actual) == ["nb", "ht", "nb2"]
+    for name, result in actual.items():
+        assert result.learner == expected[name].learner
+        assert result.cumulative.metrics() == pytest.approx(
+            expected[name].cumulative.metrics(), nan_ok=True
+        )
+        assert result.windowed.metrics_per_window().values == pytest.approx(
+            expected[name].windowed.metrics_per_window().values, nan_ok=True
+        )
+        assert result.predictions() == expected[name].predictions()
@@ -11,6 +11,7 @@ from capymoa.stream import Stream
 from capymoa.instance import Instance
 from capymoa.stream._stream import CSVStream
 import csv
+import pytest
 
 
 def _get_streams() -> List[Stream]:
@@ -46,3 +47,868 @@ def test_stream_consistency():
             assert (
                 prototype.y_index == instance.y_index
             ), f"Streams are not consistent at instance {i}"
+
+
+def test_csv_stream_chunks_and_restart():
+    """Chunk boundaries and restarts must not change the instances produced."""
+    reference = stream_from_file("data/electricity_tiny.csv")
+    stream = CSVStream("data/electricity_tiny.csv", chunk_size=7)
+    assert stream.schema.get_num_attributes() == reference.schema.get_num_attributes()
+
+    for _ in range(2):
+        reference.restart()
+        stream.restart()
+        count = 0
+        while reference.has_more_instances():
+            assert stream.has_more_instances()
+            expected, actual = reference.next_instance(), stream.next_instance()
+            assert np.allclose(expected.x, actual.x)
+            assert expected.y_index == actual.y_index
+            count += 1
+        assert not stream.has_more_instances()
+        assert stream.next_instance() is None
+        assert count == 2000
+
+
+def test_csv_stream_values_after_the_inferred_sample(tmp_path):
+    """Types inferred from the first chunk must not truncate later rows."""
+    path = tmp_path / "late.csv"
+    path.write_text("a,b,colour,class\n1,2,red,x\n3,4,blue,y\n5.7,6,red,zzzzz\n")
+    stream = CSVStream(str(path), values_for_nominal_features={2: ["red", "blue"]},
+                       chunk_size=2)
+    assert stream.schema.get_label_values() == ["x", "y", "zzzzz"]
+    instances = [stream.next_instance() for _ in range(3)]
+    assert [instance.x.tolist() for instance in instances] == [
+        [1.0, 2.0, 0.0], [3.0, 4.0, 1.0], [5.7, 6.0, 0.0]
+    ]
+    assert [instance.y_label for instance in instances] == ["x", "y", "zzzzz"]
+    stream.restart()
+    assert stream.next_batch(3).y.tolist() == [0, 1, 2]
+    stream.close()
+
+
+def test_parquet_and_arrow_streams(tmp_path):
+    import pandas as pd
+    from capymoa.stream import ArrowStream, ParquetStream
+
+    df = pd.read_csv("data/electricity_tiny.csv")
+    df["day"] = pd.Categorical(np.where(df["period"] < 0.5, "am", "pm"))
+    df.to_parquet(tmp_path / "electricity.parquet", row_group_size=300)
+    df.to_feather(tmp_path / "electricity.arrow")
+
+    reference = stream_from_file("data/electricity_tiny.csv")
+    columns = ["period", "nswprice", "nswdemand", "vicprice", "vicdemand", "transfer"]
+    for stream in [
+        ParquetStream(tmp_path / "electricity.parquet", target="class", columns=columns,
+                      target_type="categorical", batch_size=64),
+        ArrowStream(tmp_path / "electricity.arrow", target="class", columns=columns,
+                    target_type="categorical"),
+    ]:
+        reference.restart()
+        assert len(stream) == 2000
+        count = 0
+        while stream.has_more_instances():
+            expected, actual = reference.next_instance(), stream.next_instance()
+            assert np.allclose(expected.x, actual.x)
+            assert expected.y_index == actual.y_index
+            count += 1
+        assert count == 2000
+
+    # Dictionary-encoded columns become nominal attributes and reading stops
+    # after max_instances.
+    stream = ParquetStream(tmp_path / "electricity.parquet", target="class",
+                           columns=["day", "period"], target_type="categorical",
+                           max_instances=500)
+    assert stream.schema.get_num_attributes() == 2
+    assert "@attribute day {am,pm}" in str(stream.schema)
+    instances = []
+    while stream.has_more_instances():
+        instances.append(stream.next_instance())
+    assert len(instances) == len(stream) == 500
+    for instance, period in zip(instances, df["period"]):
+        assert instance.x[0] == (0.0 if period < 0.5 else 1.0)
+
+    # Class labels outside of the label values are not turned into an index.
+    labels = pd.DataFrame({"x": [0.0, 1.0, 2.0], "class": ["a", None, "b"]})
+    labels.to_parquet(tmp_path / "labels.parquet")
+    stream = ParquetStream(tmp_path / "labels.parquet", values_for_class_label=["a", "b"])
+    assert stream.next_instance().y_index == 0
+    with pytest.raises(ValueError, match="row 1"):
+        stream.next_instance()
+    labels.iloc[[0, 2]].reset_index(drop=True).to_feather(tmp_path / "labels.arrow")
+    stream = ArrowStream(tmp_path / "labels.arrow", values_for_class_label=["a"])
+    with pytest.raises(ValueError, match="'b'"):
+        stream.next_batch(2)
+
+
+def test_numpy_stream_keeps_arrays():
+    from capymoa.stream import NumpyStream
+
+    X = np.arange(12, dtype=np.float64).reshape(6, 2)
+    y = np.array(["b", "a", "b", "c", "a", "b"])
+    stream = NumpyStream(X, y, target_type="categorical")
+    assert len(stream) == 6
+    assert stream.schema.get_label_values() == ["a", "b", "c"]
+
+    labels = []
+    while stream.has_more_instances():
+        instance = stream.next_instance()
+        assert np.shares_memory(instance.x, X)
+        assert instance._java_instance is None
+        labels.append(instance.y_label)
+    assert labels == list(y)
+    assert stream.next_instance() is None
+
+    # The Java instance is only built on request and holds the same values.
+    stream.restart()
+    instance = stream.next_instance()
+    java_instance = instance.java_instance.getData()
+    assert [java_instance.value(i) for i in range(2)] == [0.0, 1.0]
+    assert java_instance.classValue() == 1.0
+
+    stream = NumpyStream(X, np.linspace(0, 1, 6), target_type="numeric")
+    instances = [stream.next_instance() for _ in range(len(stream))]
+    assert [i.y_value for i in instances] == list(np.linspace(0, 1, 6))
+
+
+def test_next_batch_matches_next_instance(tmp_path):
+    import pandas as pd
+    from capymoa.stream import NumpyStream, ParquetStream
+
+    pd.read_csv("data/electricity_tiny.csv").to_parquet(
+        tmp_path / "electricity.parquet", row_group_size=300
+    )
+    streams = _get_streams() + [
+        CSVStream("data/electricity_tiny.csv", chunk_size=100),
+        ParquetStream(tmp_path / "electricity.parquet", target="class",
+                      target_type="categorical", max_instances=1500, batch_size=64),
+    ]
+    for stream in streams:
+        batches = list(stream.iter_batches(150))
+        assert stream.next_batch(150) is None
+        stream.restart()
+        x = np.concatenate([batch.x for batch in batches])
+        y = np.concatenate([batch.y for batch in batches])
+        assert [len(batch) for batch in batches[:-1]] == [150] * (len(batches) - 1)
+        assert len(x) == len(y) == (1500 if isinstance(stream, ParquetStream) else 2000)
+
+        for i, batch_instance in enumerate(batches[0]):
+            instance = stream.next_instance()
+            assert np.allclose(x[i], instance.x)
+            assert y[i] == batch_instance.y_index == instance.y_index
+
+    stream = NumpyStream(np.zeros((10, 3)), np.linspace(0, 1, 10), target_type="numeric")
+    batch = stream.next_batch(4)
+    assert batch.y.dtype == np.float64
+    assert batch[3].y_value == batch.y[3]
+    assert [len(batch) for batch in stream.iter_batches(4)] == [4, 2]
+
+
+def test_moa_instance_features_bulk_copy():
+    """Features read from Java instances skip the class attribute wherever it is."""
+    for class_index in [-1, 1]:  # MOA class indexes are 1-based, -1 is the last
+        stream = stream_from_file("data/electricity_tiny.arff", class_index=class_index)
+        header = stream.get_schema().get_moa_header()
+        java_instance = stream.moa_stream.nextInstance().getData()
+        expected = [
+            java_instance.value(i)
+            for i in range(header.numAttributes())
+            if i != header.classIndex()
+        ]
+        stream.restart()
+        assert stream.next_instance().x.tolist() == expected
+        stream.restart()
+        assert stream.next_batch(3).x[0].tolist() == expected
+
+
+def test_java_instance_from_array():
+    from capymoa.instance import Instance, LabeledInstance, RegressionInstance
+    from capymoa.stream import Schema
+
+    schema = Schema.from_custom(
+        ["f1", "f2", "f3"], values_for_class_label=["yes", "no"]
+    )
+    x = np.array([0.1, 0.2, 0.3])
+    java_instance = LabeledInstance.from_array(schema, x, 1).java_instance.getData()
+    assert list(java_instance.toDoubleArray()) == [0.1, 0.2, 0.3, 1.0]
+    assert java_instance.classValue() == 1.0
+    assert java_instance.weight() == 1.0
+    assert Instance.from_array(schema, x).java_instance.getData().classIsMissing()
+
+    schema = Schema.from_custom(["f1", "f2", "f3"], target_type="numeric")
+    java_instance = RegressionInstance.from_array(schema, x, 2.5).java_instance.getData()
+    assert java_instance.classValue() == 2.5
+    assert RegressionInstance.from_java_instance(
+        schema, RegressionInstance.from_array(schema, x, 2.5).java_instance
+    ).x.tolist() == x.tolist()
+
+
+def test_memmap_stream(tmp_path):
+    from capymoa.stream import MemmapStream, NumpyStream, to_binary
+
+    reference = stream_from_file("data/electricity_tiny.arff")
+    stream = MemmapStream(to_binary(reference, tmp_path / "electricity"))
+    assert str(stream.schema) == str(reference.schema)
+    assert len(stream) == 2000
+
+    for _ in range(2):
+        reference.restart()
+        stream.restart()
+        while reference.has_more_instances():
+            expected, actual = reference.next_instance(), stream.next_instance()
+            assert np.array_equal(expected.x, actual.x)
+            assert expected.y_index == actual.y_index
+        assert not stream.has_more_instances()
+
+    stream.seek(1990)
+    assert [len(batch) for batch in stream.iter_batches(4)] == [4, 4, 2]
+    assert np.array_equal(stream[5:8].x[1], stream[6].x)
+    assert stream[-1].y_index == stream[1999].y_index
+
+    # Regression streams and max_instances.
+    X, y = np.random.rand(100, 3), np.random.rand(100)
+    path = to_binary(NumpyStream(X, y, target_type="numeric"), tmp_path / "r", max_instances=30)
+    stream = MemmapStream(path)
+    assert len(stream) == 30
+    assert np.array_equal(stream[0:30].x, X[:30])
+    assert np.array_equal(stream[0:30].y, y[:30])
+
+
+def test_prefetch_stream_preserves_order():
+    from capymoa.stream import PrefetchStream
+
+    for workers in [1, 3]:
+        reference = stream_from_file("data/electricity_tiny.arff")
+        stream = PrefetchStream(
+            stream_from_file("data/electricity_tiny.arff"),
+            buffer_size=96,
+            workers=workers,
+            chunk_size=32,
+        )
+        for _ in range(2):
+            reference.restart()
+            stream.restart()
+            count = 0
+            while stream.has_more_instances():
+                expected, actual = reference.next_instance(), stream.next_instance()
+                assert np.array_equal(expected.x, actual.x)
+                assert expected.y_index == actual.y_index
+                count += 1
+            assert count == 2000
+            assert stream.next_instance() is None
+
+        stream.restart()
+        assert [len(batch) for batch in stream.iter_batches(900)] == [900, 900, 200]
+        stream.close()
+
+
+def test_compressed_streams(tmp_path):
+    import bz2
+    import gzip
+    import lzma
+    from capymoa.stream import ARFFStream
+
+    openers = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+    for suffix, open_compressed in openers.items():
+        for name in ["electricity_tiny.arff", "electricity_tiny.csv"]:
+            path = tmp_path / (name + suffix)
+            with open(f"data/{name}", "rb") as f_in, open_compressed(path, "wb") as f_out:
+                f_out.write(f_in.read())
+
+            reference = stream_from_file(f"data/{name}")
+            stream = stream_from_file(str(path))
+            for _ in range(2):
+                reference.restart()
+                stream.restart()
+                count = 0
+                while reference.has_more_instances():
+                    expected, actual = reference.next_instance(), stream.next_instance()
+                    assert np.allclose(expected.x, actual.x)
+                    assert expected.y_index == actual.y_index
+                    count += 1
+                assert count == 2000
+                assert not stream.has_more_instances()
+
+        csv_stream = CSVStream(str(tmp_path / f"electricity_tiny.csv{suffix}"))
+        assert sum(len(batch) for batch in csv_stream.iter_batches(300)) == 2000
+
+    # Compressed ARFF rows are parsed like MOA parses them.
+    arff = "\n".join([
+        "@relation mixed",
+        "% a comment",
+        "@attribute a numeric",
+        "@attribute b {x,'y z'}",
+        "@attribute c numeric",
+        "@attribute class {no,yes}",
+        "@data",
+        "1.5,x,2,yes",
+        "?, 'y z', -1, no",
+        "% another comment",
+        "",
+        "{0 3, 1 'y z', 3 yes}",
+        "{2 7}",
+    ])
+    (tmp_path / "mixed.arff").write_text(arff)
+    with gzip.open(tmp_path / "mixed.arff.gz", "wt") as file:
+        file.write(arff)
+    reference = ARFFStream(str(tmp_path / "mixed.arff"))
+    stream = ARFFStream(str(tmp_path / "mixed.arff.gz"))
+    assert str(stream.schema) == str(reference.schema)
+    for _ in range(4):
+        expected, actual = reference.next_instance(), stream.next_instance()
+        assert np.allclose(expected.x, actual.x, equal_nan=True)
+        assert expected.y_index == actual.y_index
+    assert not stream.has_more_instances()
+
+
+def test_sharded_stream(tmp_path):
+    import pandas as pd
+    from capymoa.stream import ShardedStream, MemmapStream, to_binary
+
+    df = pd.read_csv("data/electricity_tiny.csv")
+    for i, start in enumerate(range(0, 2000, 300)):
+        df[start : start + 300].to_csv(tmp_path / f"{i:02d}.csv", index=False)
+
+    reference = stream_from_file("data/electricity_tiny.csv")
+    stream = ShardedStream(str(tmp_path / "*.csv"), values_for_class_label=["0", "1"])
+    assert len(stream.paths) == 7
+    for _ in range(2):
+        reference.restart()
+        stream.restart()
+        count = 0
+        while stream.has_more_instances():
+            expected, actual = reference.next_instance(), stream.next_instance()
+            assert np.allclose(expected.x, actual.x)
+            assert expected.y_index == actual.y_index
+            count += 1
+        assert count == 2000
+
+    stream.restart()
+    batches = list(stream.iter_batches(450))
+    assert [len(batch) for batch in batches] == [450, 450, 450, 450, 200]
+    assert np.allclose(np.concatenate([b.x for b in batches]), df.iloc[:, :-1].to_numpy())
+
+    # Lengths come from the shards when they are sized.
+    paths = [to_binary(CSVStream(str(path), values_for_class_label=["0", "1"]),
+                       tmp_path / path.stem) for path in sorted(tmp_path.glob("*.csv"))]
+    stream = ShardedStream(paths, format="binary")
+    assert len(stream) == 2000
+    assert ShardedStream(paths, format=MemmapStream, lengths=[1] * 7).__len__() == 7
+
+    # Shards opened only to get their length are closed again.
+    opened = []
+
+    def open_csv(path, **kwargs):
+        opened.append(CSVStream(path, **kwargs))
+        return opened[-1]
+
+    stream = ShardedStream(str(tmp_path / "*.csv"), format=open_csv,
+                           values_for_class_label=["0", "1"])
+    assert len(stream) == 2000
+    stream._next_shard.result()
+    assert len(opened) == 8  # the current and prefetched shards are kept open
+    assert sum(shard._file is None for shard in opened) == 6
+
+    # Parquet shards are sized from their metadata.
+    for i, start in enumerate(range(0, 2000, 300)):
+        df[start : start + 300].to_parquet(tmp_path / f"{i:02d}.parquet")
+    stream = ShardedStream(str(tmp_path / "*.parquet"), target_type="categorical",
+                           values_for_class_label=["0", "1"], max_instances=100)
+    assert len(stream) == 700
+
+    # Shards must share a schema.
+    df.iloc[:10, :-2].assign(**{"class": 0}).to_csv(tmp_path / "99.csv", index=False)
+    stream = ShardedStream(str(tmp_path / "*.csv"), values_for_class_label=["0", "1"])
+    with pytest.raises(ValueError):
+        while stream.has_more_instances():
+            stream.next_instance()
+
+
+def test_pytorch_stream_data_loader():
+    torch = pytest.importorskip("torch")
+    from capymoa.stream import PytorchStream
+
+    class _Dataset(torch.utils.data.TensorDataset):
+        classes = ["a", "b", "c"]
+
+    X = torch.rand(50, 2, 3)
+    y = torch.randint(0, 3, (50,))
+    dataset = _Dataset(X, y)
+
+    reference = PytorchStream(dataset)
+    stream = PytorchStream(dataset, batch_size=8)
+    for _ in range(2):
+        reference.restart()
+        stream.restart()
+        while reference.has_more_instances():
+            expected, actual = reference.next_instance(), stream.next_instance()
+            assert np.array_equal(expected.x, actual.x)
+            assert int(expected.y_index) == actual.y_index
+        assert not stream.has_more_instances()
+
+    stream.restart()
+    batches = list(stream.iter_batches(20))
+    assert [len(batch) for batch in batches] == [20, 20, 10]
+    assert np.array_equal(np.concatenate([b.x for b in batches]), X.reshape(50, -1).numpy())
+    assert np.array_equal(np.concatenate([b.y for b in batches]), y.numpy())
+
+
+def test_csv_stream_length_and_seek(tmp_path):
+    import shutil
+    from capymoa.stream._line_index import _LineIndex
+
+    path = tmp_path / "electricity.csv"
+    shutil.copy("data/electricity_tiny.csv", path)
+    stream = CSVStream(str(path), chunk_size=64)
+    assert not (tmp_path / "electricity.csv.index.json").exists()
+    assert len(stream) == 2000
+    assert stream.total_number_of_lines == 2001
+    assert (tmp_path / "electricity.csv.index.json").exists()
+
+    index = _LineIndex.build(path, every=100)
+    assert index.num_lines == 2001
+    assert len(index.offsets) == 21
+    with open(path, "rb") as file:
+        lines = file.readlines()
+    for line in [0, 1, 99, 100, 1234, 2000]:
+        assert index.open_at(line).readline() == lines[line]
+
+    rows = np.genfromtxt(path, delimiter=",", skip_header=1)
+    stream._line_index = index
+    for row in [1999, 0, 1500, 64]:
+        stream.seek(row)
+        assert np.allclose(stream.next_instance().x, rows[row, :-1])
+    stream.seek(2000)
+    assert not stream.has_more_instances()
+
+    # The cached index is rebuilt when the file changes.
+    with open(path, "a") as file:
+        file.write("\n0.5,0.1,0.2,0.3,0.4,0.5,1")
+    assert len(CSVStream(str(path))) == 2001
+
+    # A trailing newline followed by a blank line adds no instance.
+    with open(path, "a") as file:
+        file.write("\n\n")
+    assert _LineIndex.build(path, every=100).num_lines == 2002
+    stream = CSVStream(str(path))
+    assert len(stream) == 2001
+    assert sum(1 for _ in iter(stream.next_instance, None)) == 2001
+
+
+def test_async_streams():
+    import asyncio
+    from capymoa.classifier import NaiveBayes
+    from capymoa.evaluation import (
+        async_prequential_evaluation,
+        prequential_evaluation,
+    )
+    from capymoa.stream import QueueStream, SocketStream
+
+    stream = stream_from_file("data/electricity_tiny.csv")
+    schema = stream.get_schema()
+    expected = prequential_evaluation(
+        stream, NaiveBayes(schema=schema), window_size=500, optimise=False
+    )
+    rows = np.genfromtxt("data/electricity_tiny.csv", delimiter=",", skip_header=1)
+
+    async def from_queue():
+        queue = QueueStream(schema, maxsize=10)
+
+        async def produce():
+            for row in rows:
+                await queue.put(row[:-1], int(row[-1]))
+            await queue.close()
+
+        producer = asyncio.create_task(produce())
+        results = await async_prequential_evaluation(
+            queue, NaiveBayes(schema=schema), window_size=500, batch_size=32
+        )
+        await producer
+        return results
+
+    async def from_socket():
+        async def send(reader, writer):
+            for row in rows:
+                values = ",".join(str(value) for value in row[:-1])
+                writer.write(f"{values},{int(row[-1])}\n".encode())
+                await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(send, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            socket_stream = await SocketStream.connect_tcp(schema, "127.0.0.1", port)
+            first = await socket_stream.next_batch(5)
+            assert np.allclose(first.x, rows[:5, :-1])
+            assert list(first.y) == list(rows[:5, -1].astype(int))
+            return await async_prequential_evaluation(
+                socket_stream, NaiveBayes(schema=schema), max_instances=1000
+            )
+
+    results = asyncio.run(from_queue())
+    assert results.cumulative.get_instances_seen() == 2000
+    assert results.cumulative.accuracy() == pytest.approx(expected.cumulative.accuracy())
+    assert len(results.windowed.metrics_per_window()) == 4
+
+    results = asyncio.run(from_socket())
+    assert results.cumulative.get_instances_seen() == 1000
+
+    with pytest.raises(ValueError):
+        asyncio.run(QueueStream(schema).next_batch(0))
+
+    # The queue belongs to the loop that uses it, not the one that built it.
+    queue = QueueStream(schema, maxsize=1)
+
+    async def put_and_get():
+        producer = asyncio.create_task(queue.put(rows[0, :-1], int(rows[0, -1])))
+        instance = await queue.next_instance()
+        await producer
+        return instance
+
+    assert np.allclose(asyncio.run(put_and_get()).x, rows[0, :-1])
+
+
+@pytest.mark.parametrize(
+    "generator",
+    [
+        "SEA",
+        "HyperPlaneClassification",
+        "RandomRBFGenerator",
+        "STAGGERGenerator",
+        "SineGenerator",
+    ],
+)
+def test_numpy_generator_backend(generator):
+    from capymoa.stream import generator as generators
+
+    cls = getattr(generators, generator)
+    moa = cls()
+    stream = cls(backend="numpy")
+    assert str(stream.get_schema()) == str(moa.get_schema())
+    with pytest.raises(ValueError):
+        stream.get_moa_stream()
+
+    batch = stream.next_batch(5000)
+    assert batch.x.shape == (5000, moa.get_schema().get_num_attributes())
+    stream.restart()
+    instances = [stream.next_instance() for _ in range(5000)]
+    assert np.array_equal(np.stack([instance.x for instance in instances]), batch.x)
+    assert [instance.y_index for instance in instances] == list(batch.y)
+
+    # The instances follow the same distribution as MOA's. The centroids of
+    # RandomRBFGenerator are themselves random, so they only roughly agree.
+    moa_batch = moa.next_batch(5000)
+    x_tolerance, y_tolerance = (0.5, 0.25) if generator == "RandomRBFGenerator" else (0.1, 0.05)
+    moa_std = moa_batch.x.std(axis=0)
+    assert np.all(np.abs(batch.x.mean(axis=0) - moa_batch.x.mean(axis=0)) <= x_tolerance * moa_std)
+    assert np.all(np.abs(batch.x.std(axis=0) - moa_std) <= x_tolerance * moa_std)
+    if generator != "RandomRBFGenerator":
+        # Bounded attributes cover the same range.
+        assert np.all(np.abs(batch.x.min(axis=0) - moa_batch.x.min(axis=0)) <= 0.1 * moa_std)
+        assert np.all(np.abs(batch.x.max(axis=0) - moa_batch.x.max(axis=0)) <= 0.1 * moa_std)
+    for label in range(stream.get_schema().get_num_classes()):
+        frequency = np.mean(batch.y == label)
+        assert abs(frequency - np.mean(moa_batch.y == label)) <= y_tolerance
+
+    with pytest.raises(ValueError):
+        cls(backend="java")
+
+
+def test_numpy_generator_backend_is_classification_only():
+    from capymoa.stream.generator import HyperPlaneRegression
+
+    # MOA's regression target is not reproduced by the NumPy backend.
+    with pytest.raises(TypeError):
+        HyperPlaneRegression(backend="numpy")
+
+
+@pytest.mark.parametrize(
+    "backend,max_memory", [("memory", None), ("memory", 20_000), ("mmap", None)]
+)
+def test_cached_stream(tmp_path, backend, max_memory):
+    from capymoa.stream import CachedStream, MemmapStream
+
+    source = stream_from_file("data/electricity_tiny.csv")
+    expected = source.next_batch(1500)
+    source.restart()
+
+    stream = CachedStream(
+        source,
+        max_instances=1500,
+        backend=backend,
+        max_memory=max_memory,
+        directory=tmp_path / "cache",
+        chunk_size=100,
+    )
+    assert len(stream) == 1500
+    first = [stream.next_instance() for _ in range(10)]
+    assert np.array_equal(np.stack([i.x for i in first]), expected.x[:10])
+    stream.restart()  # before the first pass is complete
+    assert not stream.is_complete
+    batches = list(stream.iter_batches(256))
+    assert stream.is_complete
+    assert np.array_equal(np.concatenate([b.x for b in batches]), expected.x)
+    assert np.array_equal(np.concatenate([b.y for b in batches]), expected.y)
+
+    # Later passes never touch the wrapped stream.
+    source.restart()
+    stream.restart()
+    replay = stream.next_batch(2000)
+    assert np.array_equal(replay.x, expected.x)
+    assert stream.next_instance() is None
+
+    if backend == "mmap" or max_memory is not None:
+        assert len(MemmapStream(tmp_path / "cache")) == 1500
+    else:
+        assert not (tmp_path / "cache").exists()
+
+
+def test_python_drift_stream():
+    from capymoa.stream import NumpyStream
+    from capymoa.stream.drift import (
+        AbruptDrift,
+        DriftStream,
+        GradualDrift,
+        RecurrentConceptDriftStream,
+    )
+    from capymoa.stream.generator import SEA
+
+    def concept(value, n=3000):
+        X = np.column_stack([np.full(n, value), np.arange(n)]).astype(float)
+        return NumpyStream(X, np.full(n, value % 2), target_type="categorical")
+
+    stream = DriftStream(
+        stream=[
+            concept(0),
+            AbruptDrift(position=1000),
+            concept(1),
+            GradualDrift(position=2000, width=200),
+            concept(2),
+        ],
+        backend="python",
+    )
+    batch = stream.next_batch(3000)
+    concepts = batch.x[:, 0]
+    assert np.all(concepts[:999] == 0)
+    assert np.all(concepts[999:1800] == 1)
+    assert 0 < np.mean(concepts[1900:2100] == 2) < 1
+    assert np.all(concepts[2300:] == 2)
+    # Each concept is read in order and only when it is used.
+    for value in (0, 1, 2):
+        assert np.array_equal(
+            batch.x[concepts == value, 1], np.arange(np.sum(concepts == value))
+        )
+
+    stream.restart()
+    instances = [stream.next_instance() for _ in range(3000)]
+    assert np.array_equal(np.stack([i.x for i in instances]), batch.x)
+    assert stream.get_num_drifts() == 2
+    with pytest.raises(ValueError):
+        stream.get_moa_stream()
+    with pytest.raises(ValueError):
+        DriftStream(stream=[concept(0), concept(1)], backend="python")
+
+    recurrent = RecurrentConceptDriftStream(
+        concept_list=[SEA(function=1, backend="numpy"), SEA(function=3, backend="numpy")],
+        max_recurrences_per_concept=50,
+        transition_type_template=AbruptDrift(position=100),
+        backend="python",
+    )
+    assert recurrent.get_num_drifts() == 99
+    assert len(recurrent.next_batch(10_000)) == 10_000
+
+    # A recurring stream object restarts from its seed, as in MOA.
+    def recurring(first, second):
+        return DriftStream(
+            stream=[
+                first,
+                AbruptDrift(position=100),
+                second,
+                AbruptDrift(position=200),
+                first,
+            ],
+            backend="python",
+        )
+
+    sea = SEA(function=1, backend="numpy")
+    batch = recurring(sea, SEA(function=3, backend="numpy")).next_batch(300)
+    assert np.array_equal(batch.x[199:298], batch.x[:99])
+    with pytest.raises(ValueError):
+        recurring(concept(0), concept(1))
+
+
+def test_instances_are_compact_and_reusable():
+    from capymoa.instance import Instance, InstanceBatch, LabeledInstance, RegressionInstance
+
+    stream = stream_from_file("data/electricity_tiny.csv")
+    instance = stream.next_instance()
+    for cls in (Instance, LabeledInstance, RegressionInstance, InstanceBatch):
+        assert "__dict__" not in dir(cls)
+    with pytest.raises(AttributeError):
+        instance.extra = 1
+
+    stream.restart()
+    expected = stream.next_batch(2000)
+    stream.restart()
+    seen = set()
+    x, y = [], []
+    for instance in stream.iter_instances(batch_size=300, reuse=True):
+        seen.add(id(instance))
+        x.append(instance.x.copy())
+        y.append(instance.y_index)
+    assert len(seen) == 7  # one object per batch
+    assert np.array_equal(np.stack(x), expected.x)
+    assert y == list(expected.y)
+
+    # The java instance follows the row the instance points at.
+    instances = expected.iter_reused()
+    first = next(instances).java_instance.getData().value(1)
+    second = next(instances).java_instance.getData().value(1)
+    assert (first, second) == (expected.x[0, 1], expected.x[1, 1])
+
+
+def test_schema_lookup_tables():
+    from capymoa.stream import Schema
+
+    schema = Schema.from_custom(
+        ["f1", "f2", "f3"],
+        values_for_nominal_features={"f3": ["x", "y", "z"]},
+        values_for_class_label=["no", "yes"],
+        dataset_name="Lookup",
+    )
+    assert schema.get_num_attributes() == 3
+    assert schema.get_num_classes() == 2
+    assert schema.dataset_name == "Lookup"
+    assert schema.get_label_indexes() == [0, 1]
+    assert schema.get_label_indexes() is schema.get_label_indexes()
+    assert schema.get_value_for_index(1) == "yes"
+    assert schema.get_index_for_label("no") == 0
+    assert schema.is_y_index_in_range(1) and not schema.is_y_index_in_range(2)
+    assert schema.get_attribute_names() == ("f1", "f2", "f3")
+    assert dict(schema.get_nominal_values()) == {"f3": ("x", "y", "z")}
+    assert list(schema.get_nominal_mask()) == [False, False, True]
+    with pytest.raises(TypeError):
+        schema.get_nominal_values()["f1"] = ("a",)
+    with pytest.raises(ValueError):
+        schema.get_nominal_mask()[0] = True
+
+    regression = Schema.from_custom(["f1"], target_type="numeric")
+    assert regression.get_num_classes() == 1
+    with pytest.raises(RuntimeError):
+        regression.get_value_for_index(0)
+
+
+def test_sparse_numpy_stream():
+    from scipy import sparse
+    from sklearn.linear_model import SGDClassifier
+    from capymoa.base import SKClassifier
+    from capymoa.classifier import NaiveBayes, ShrubsClassifier
+    from capymoa.evaluation import prequential_evaluation
+    from capymoa.instance import SparseLabeledInstance
+    from capymoa.stream import NumpyStream, SparseNumpyStream
+
+    X = sparse.random(500, 5000, density=0.002, format="csr", random_state=7)
+    y = (X[:, :2500].sum(axis=1).A1 > X[:, 2500:].sum(axis=1).A1).astype(int)
+    stream = SparseNumpyStream(X, y, target_type="categorical")
+    assert len(stream) == 500
+
+    instance = stream.next_instance()
+    assert isinstance(instance, SparseLabeledInstance)
+    assert np.shares_memory(instance.values, stream._X.data)
+    assert np.array_equal(instance.x, X[0].toarray()[0])
+    data = instance.java_instance.getData()
+    assert data.numValues() == len(instance.indices) + 1
+    for k, index in enumerate(instance.indices):
+        assert data.value(int(index)) == instance.values[k]
+    assert data.classValue() == y[0]
+
+    batch = stream.next_batch(100)
+    assert batch.is_sparse and batch.x.shape == (100, 5000)
+    assert np.array_equal(batch[-1].x, X[100].toarray()[0])
+
+    for learner in (
+        NaiveBayes(schema=stream.get_schema()),
+        SKClassifier(SGDClassifier(), schema=stream.get_schema()),
+    ):
+        results = prequential_evaluation(stream, learner, optimise=False)
+        assert results.cumulative.get_instances_seen() == 500
+
+    # Mini-batches of a sparse stream are densified for the shrubs.
+    dense = NumpyStream(X.toarray(), y, target_type="categorical")
+    accuracies = [
+        prequential_evaluation(
+            s, ShrubsClassifier(schema=s.get_schema()), batch_size=50
+        ).cumulative.accuracy()
+        for s in (stream, dense)
+    ]
+    assert accuracies[0] == pytest.approx(accuracies[1])
+
+
+def test_float32_features(tmp_path, monkeypatch):
+    from capymoa.classifier import NaiveBayes
+    from capymoa.evaluation import prequential_evaluation
+    from capymoa.stream import NumpyStream, Schema
+
+    X = np.random.default_rng(0).random((200, 3)).astype(np.float32)
+    stream = NumpyStream(X, np.arange(200) % 2, target_type="categorical", dtype="float32")
+    assert stream.get_schema().dtype == np.float32
+    batch = stream.next_batch(50)
+    assert batch.x.dtype == np.float32 and np.shares_memory(batch.x, X)
+    instance = stream.next_instance()
+    assert instance.x.dtype == np.float32
+    # Features become float64 again in MOA, without changing their values.
+    java_values = np.array(instance.java_instance.getData().toDoubleArray())
+    assert np.array_equal(java_values[:3], instance.x.astype(np.float64))
+
+    for path in ["data/electricity_tiny.arff", "data/electricity_tiny.csv"]:
+        stream = stream_from_file(path, dtype=np.float32)
+        assert stream.next_instance().x.dtype == np.float32
+        assert stream.next_batch(10).x.dtype == np.float32
+        stream.restart()
+        results = prequential_evaluation(
+            stream, NaiveBayes(schema=stream.get_schema()), optimise=False
+        )
+        assert results.cumulative.get_instances_seen() == 2000
+
+    import pandas as pd
+    from capymoa.instance import LabeledInstance
+    from capymoa.stream import ArrowStream, MemmapStream, ParquetStream, ShardedStream
+    from capymoa.stream import to_binary
+
+    df = pd.read_csv("data/electricity_tiny.csv")
+    df.to_parquet(tmp_path / "0.parquet")
+    df.to_feather(tmp_path / "0.arrow")
+    df.to_parquet(tmp_path / "1.parquet")
+    binary = to_binary(stream_from_file("data/electricity_tiny.arff"), tmp_path / "bin")
+    float32_streams = [
+        MemmapStream(binary, dtype=np.float32),
+        ParquetStream(tmp_path / "0.parquet", target_type="categorical", dtype="float32"),
+        ArrowStream(tmp_path / "0.arrow", target_type="categorical", dtype="float32"),
+        ShardedStream(
+            str(tmp_path / "*.parquet"),
+            target_type="categorical",
+            values_for_class_label=["0", "1"],
+            dtype="float32",
+        ),
+    ]
+    for stream in float32_streams:
+        assert stream.get_schema().dtype == np.float32
+        assert stream.next_instance().x.dtype == np.float32
+        assert stream.next_batch(10).x.dtype == np.float32
+    # A batch spanning two shards keeps the type of the schema.
+    assert float32_streams[-1].next_batch(2500).x.dtype == np.float32
+
+    # The binary format stores the features in the type of the schema.
+    binary = to_binary(float32_streams[0], tmp_path / "bin32")
+    assert MemmapStream(binary, dtype="float32")._X.dtype == np.float32
+    assert MemmapStream(binary, dtype="float64").next_batch(5).x.dtype == np.float64
+
+    schema = float32_streams[0].get_schema()
+    assert LabeledInstance.from_array(schema, np.zeros(6), 0).x.dtype == np.float32
+
+    with pytest.raises(ValueError):
+        Schema.from_custom(["f1"], values_for_class_label=["a", "b"], dtype=np.int64)
+    monkeypatch.setenv("CAPYMOA_FLOAT_DTYPE", "float32")
+    schema = Schema.from_custom(["f1"], values_for_class_label=["a", "b"])
+    assert schema.dtype == np.float32
+    assert schema.with_dtype("float64").dtype == np.float64